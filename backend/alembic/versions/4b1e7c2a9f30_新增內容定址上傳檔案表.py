@@ -0,0 +1,40 @@
+"""新增內容定址上傳檔案表 stored_files
+
+Revision ID: 4b1e7c2a9f30
+Revises: d711f173f9e3
+Create Date: 2026-10-19 10:00:00.000000
+
+uploads/ 改為依 SHA-256 內容定址（uploads/ab/cd/<sha256>.<ext>），
+相同內容只儲存一次，stored_files.ref_count 記錄 WorkExperience、Project、
+ProjectAttachment 的引用數量。
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b1e7c2a9f30'
+down_revision: Union[str, None] = 'd711f173f9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, None] = None
+
+
+def upgrade() -> None:
+    # Use CREATE TABLE IF NOT EXISTS for idempotent migrations
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS stored_files (
+            sha256 VARCHAR(64) PRIMARY KEY NOT NULL,
+            storage_key VARCHAR(255) NOT NULL,
+            size INTEGER NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS stored_files")
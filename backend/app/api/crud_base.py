@@ -5,15 +5,29 @@ Date: 2026-02-27
 
 Creates a complete CRUD APIRouter (GET /, GET /{id}, POST /, PUT /{id}, DELETE /{id})
 for any SQLAlchemy model + Pydantic schema combination.
+
+Modified on 2026-10-19: the GET endpoints go through a SingleFlight per router.
+Concurrent identical reads share one query and serialization, and the
+serialized JSON is returned as is. The list is published as a snapshot
+(app.services.snapshots) named after the table, shared by all workers and
+kept across worker restarts. The shared loads open their own session: they
+can outlive the request that started them (a stale-while-revalidate
+refresh, or a waiter that disconnected), and with it the request's Session.
 """
 
 from typing import Type, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from starlette.concurrency import run_in_threadpool
 
+import app.db.base as db_base
 from app.db.base import get_db
+from app.db.coherence import database_token
 from app.api.endpoints.auth import get_current_user
+from app.api.snapshot_response import SnapshotResponse, snapshot_response
+from app.core.single_flight import SingleFlight
+from app.services import snapshots
 from app.models.user import User
 
 
@@ -25,6 +39,7 @@ def create_crud_router(
     not_found_detail: str = "Record not found",
     order_by_field: str = "display_order",
     entity_name: str = "Record",
+    stale_while_revalidate: float = 0,
 ) -> APIRouter:
     """
     Factory that returns an APIRouter with standard CRUD endpoints.
@@ -37,20 +52,53 @@ def create_crud_router(
         not_found_detail: Error message for 404 responses
         order_by_field: Model attribute name to sort list results by
         entity_name: Human-readable name used in success messages
+        stale_while_revalidate: Seconds a previous GET result may still be
+            served while it is refreshed after a change (0 = never stale)
     """
     router = APIRouter()
+    # Added on 2026-10-19, Reason: collapse concurrent identical reads
+    flight = SingleFlight(model.__tablename__, stale_seconds=stale_while_revalidate)
+    list_store = snapshots.store_for(model.__tablename__)
+    list_adapter = TypeAdapter(List[response_schema])
+    item_adapter = TypeAdapter(response_schema)
+
+    # Modified on 2026-10-19, Reason: own session instead of the request's;
+    # db_base.SessionLocal is looked up at call time (import_database replaces it)
+    def load_all() -> bytes:
+        db = db_base.SessionLocal()
+        try:
+            items = db.query(model).order_by(getattr(model, order_by_field)).all()
+            return list_adapter.dump_json(list_adapter.validate_python(items, from_attributes=True))
+        finally:
+            db.close()
+
+    def load_one(item_id: int) -> bytes:
+        db = db_base.SessionLocal()
+        try:
+            item = db.query(model).filter(model.id == item_id).first()
+            if not item:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+            return item_adapter.dump_json(item_adapter.validate_python(item, from_attributes=True))
+        finally:
+            db.close()
 
-    @router.get("/", response_model=List[response_schema])
-    def get_all(db: Session = Depends(get_db)):
-        return db.query(model).order_by(getattr(model, order_by_field)).all()
+    # Modified on 2026-10-19, Reason: single-flight and a shared, persistent
+    # snapshot; previously a sync handler returning the ORM objects
+    @router.get("/", response_model=List[response_schema], response_class=SnapshotResponse)
+    async def get_all(request: Request, db: Session = Depends(get_db)):
+        token = database_token(db)
+        snapshot = list_store.cached(token)
+        if snapshot is None:
+            snapshot = await flight.do(
+                "all", lambda: run_in_threadpool(list_store.get, token, load_all), token
+            )
+        return snapshot_response(request, snapshot)
 
     # Modified on 2026-04-01, Reason: Issue #8 — standardize status codes
     @router.get("/{item_id}", response_model=response_schema)
-    def get_one(item_id: int, db: Session = Depends(get_db)):
-        item = db.query(model).filter(model.id == item_id).first()
-        if not item:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
-        return item
+    async def get_one(item_id: int, db: Session = Depends(get_db)):
+        body = await flight.do(item_id, lambda: run_in_threadpool(load_one, item_id), database_token(db))
+        return Response(content=body, media_type="application/json")
 
     # Modified on 2026-04-01, Reason: Issue #5 — add transaction rollback
     @router.post("/", response_model=response_schema)
@@ -3,7 +3,7 @@ from app.api.endpoints import (
     auth, personal_info, work_experience,
     education, certifications, languages,
     publications, github_projects, projects,
-    import_data,
+    import_data, uploads, files, resume, metrics,
 )
 
 __all__ = [
@@ -17,4 +17,8 @@ __all__ = [
     "github_projects",
     "projects",
     "import_data",
+    "uploads",  # Added on 2026-10-19
+    "files",  # Added on 2026-10-19
+    "resume",  # Added on 2026-10-19
+    "metrics",  # Added on 2026-10-19
 ]
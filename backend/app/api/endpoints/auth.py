@@ -1,9 +1,18 @@
+import ipaddress
+import math
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.core.security import verify_password, create_access_token, decode_access_token
+from app.core import auth_cache
+from app.core.login_throttle import LoginThrottle
+from app.core.security import (
+    PasswordCheckBusy,
+    verify_password_async,
+    create_access_token,
+    decode_access_token,
+)
 from app.db.base import get_db
 from app.models.user import User
 from app.schemas.user import Token, UserInDB
@@ -11,13 +20,53 @@ from app.schemas.user import Token, UserInDB
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-
-def authenticate_user(db: Session, username: str, password: str) -> User | None:
+# Added on 2026-10-19, Reason: fail-fast login throttling per client IP and username
+ip_throttle = LoginThrottle(settings.LOGIN_IP_BURST, settings.LOGIN_IP_PER_MINUTE)
+username_throttle = LoginThrottle(settings.LOGIN_USERNAME_BURST, settings.LOGIN_USERNAME_PER_MINUTE)
+
+
+def address_allowed(host: str, entries) -> bool:
+    """Whether host is one of entries (addresses or CIDR networks)"""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        address = None
+    for entry in entries:
+        if address is None:
+            if host == entry:
+                return True
+            continue
+        try:
+            if address in ipaddress.ip_network(entry, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    return address_allowed(host, settings.LOGIN_TRUSTED_PROXIES)
+
+
+# Modified on 2026-10-19, Reason: trust the proxy header only from LOGIN_TRUSTED_PROXIES
+def client_ip(request: Request) -> str:
+    """Client address, from the reverse proxy header when the peer is a trusted proxy"""
+    peer = request.client.host if request.client else "unknown"
+    if settings.LOGIN_CLIENT_IP_HEADER and _is_trusted_proxy(peer):
+        forwarded = request.headers.get(settings.LOGIN_CLIENT_IP_HEADER)
+        if forwarded:
+            return forwarded.strip()
+    return peer
+
+
+# Modified on 2026-10-19, Reason: verify the bcrypt hash on the password pool
+# instead of on the event loop
+async def authenticate_user(db: Session, username: str, password: str) -> User | None:
     """Authenticate user"""
     user = db.query(User).filter(User.username == username).first()
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
     return user
 
@@ -33,6 +82,13 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    # Added on 2026-10-19, Reason: skip JWT decode and user lookup for a token
+    # that was verified recently (see app.core.auth_cache)
+    cached_user = auth_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    seen_generation = auth_cache.generation()
+
     payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
@@ -45,16 +101,37 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
 
+    auth_cache.put(token, payload, user, seen_generation)
     return user
 
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Login endpoint"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    # Added on 2026-10-19, Reason: reject throttled attempts before any DB / bcrypt work
+    retry_after = max(
+        ip_throttle.try_acquire(client_ip(request)),
+        username_throttle.try_acquire(form_data.username.lower()),
+    )
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    try:
+        user = await authenticate_user(db, form_data.username, form_data.password)
+    except PasswordCheckBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login is busy, please try again",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
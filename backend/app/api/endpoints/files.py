@@ -0,0 +1,178 @@
+"""
+Attachment download endpoint
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Replaces the StaticFiles mount at /uploads. Only files referenced by a
+WorkExperience, Project or ProjectAttachment row are served; temp files,
+upload sessions and orphans are not. In production the response is an empty
+X-Accel-Redirect so nginx sends the bytes with sendfile and the uvicorn
+worker is released immediately. Without nginx the file is streamed from disk
+with Range support.
+
+Upload filenames are unique (content hashes or uuid4), so responses carry a
+strong ETag and are cached as immutable.
+
+Image derivatives live under derived/ and are served for as long as their
+source blob is referenced. A derivative that has not been rendered yet (or
+failed to render) redirects to the original; a download never schedules a
+render, only storing the image does.
+"""
+
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import get_db
+from app.models.project import Project, ProjectAttachment
+from app.models.stored_file import StoredFile
+from app.models.work_experience import WorkExperience
+from app.services import image_derivatives
+import app.api.upload_utils as upload_utils
+from app.api.upload_utils import UPLOAD_CHUNK_SIZE, sha256_from_reference
+
+router = APIRouter()
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+
+def _is_referenced(db: Session, file_key: str) -> bool:
+    """True if some record links to /uploads/{file_key}"""
+    sha256 = sha256_from_reference(file_key)
+    if sha256:
+        stored = db.query(StoredFile).filter(StoredFile.sha256 == sha256).first()
+        return stored is not None and stored.ref_count > 0 and stored.storage_key == file_key
+    url = f"/uploads/{file_key}"
+    for column in (WorkExperience.attachment_url, Project.attachment_url, ProjectAttachment.file_url):
+        if db.query(column).filter(column == url).first():
+            return True
+    return False
+
+
+def _strong_etag(file_key: str, stat: os.stat_result) -> str:
+    sha256 = sha256_from_reference(file_key)
+    if sha256:
+        return f'"{sha256}"'
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _parse_range(header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single bytes range; returns (start, end) inclusive or None to serve the whole file
+
+    Raises 416 when the range cannot be satisfied. Multi-range requests are
+    answered with the full file, which RFC 9110 allows.
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start = max(file_size - int(last), 0)
+        end = file_size - 1
+    else:
+        start = int(first)
+        end = min(int(last), file_size - 1) if last else file_size - 1
+    if start >= file_size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"},
+        )
+    return start, end
+
+
+def _iter_file_range(path: Path, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _derivative_source(db: Session, parts: tuple) -> Optional[StoredFile]:
+    """Referenced image blob that a derived/<ab>/<sha256>/<variant>.webp key belongs to"""
+    if len(parts) != 4 or parts[3] not in {f"{v}.webp" for v in image_derivatives.DERIVATIVE_VARIANTS}:
+        return None
+    stored = db.query(StoredFile).filter(StoredFile.sha256 == parts[2]).first()
+    if stored is None or stored.ref_count <= 0 or not image_derivatives.is_image_key(stored.storage_key):
+        return None
+    return stored
+
+
+@router.get("/{file_key:path}")
+def download_upload(file_key: str, request: Request, db: Session = Depends(get_db)):
+    """Serve an attachment referenced by a resume record (public endpoint)"""
+    parts = Path(file_key).parts
+    if not parts or any(part.startswith(".") for part in parts):
+        raise _not_found()
+    path = upload_utils.UPLOAD_DIR / file_key
+
+    if parts[0] == image_derivatives.DERIVED_DIR_NAME:
+        source = _derivative_source(db, parts)
+        if source is None:
+            raise _not_found()
+        if not path.is_file():
+            source_path = upload_utils.UPLOAD_DIR / source.storage_key
+            if not source_path.is_file():
+                raise _not_found()
+            return RedirectResponse(
+                f"/uploads/{source.storage_key}",
+                status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+                headers={"Cache-Control": "no-store"},
+            )
+    elif not _is_referenced(db, file_key) or not path.is_file():
+        raise _not_found()
+
+    stat = path.stat()
+    etag = _strong_etag(file_key, stat)
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.UPLOADS_ACCEL_REDIRECT_PREFIX:
+        # nginx handles Range, conditional requests and sendfile for the internal location
+        prefix = settings.UPLOADS_ACCEL_REDIRECT_PREFIX.rstrip("/")
+        headers["X-Accel-Redirect"] = f"{prefix}/{quote(file_key)}"
+        return Response(media_type=media_type, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _iter_file_range(path, start, end),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers=headers,
+            )
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
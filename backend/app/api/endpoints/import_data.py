@@ -11,12 +11,18 @@ Updated: 2025-12-05 - Fixed database import to properly reload database connecti
 from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends
 from fastapi.responses import JSONResponse, FileResponse
 from pathlib import Path
+import os
 import shutil
+import uuid
 from datetime import datetime
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 # 已新增於 2026-04-01，原因：修正 CRITICAL-4 — 匯出/匯入端點缺少身份驗證
 from app.api.endpoints.auth import get_current_user
+from app.db import coherence
+from app.db.migrations import upgrade_database_file
+from app.services.upload_reconciler import backfill_stored_files
 from app.models.user import User
 
 import logging
@@ -38,6 +44,24 @@ MAX_DB_FILE_SIZE = 100 * 1024 * 1024  # 100MB
 # 原函式：create_database - 重新建立資料庫表格
 
 
+# Added on 2026-10-19, Reason: imported files are migrated before the swap
+def prepare_imported_database(db_path: Path) -> None:
+    """Upgrade an imported database file to head and backfill stored_files
+
+    Runs on the temp file, so a failure leaves the live database untouched.
+    """
+    upgrade_database_file(db_path)
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        with Session(engine) as db:
+            created = backfill_stored_files(db)
+            db.commit()
+        if created:
+            logger.info(f"Imported database: created {created} missing stored_files rows")
+    finally:
+        engine.dispose()
+
+
 # 已新增於 2025-11-30，原因：新增資料庫匯出功能以方便遷移主機
 # 已修正於 2025-12-01，原因：修正路徑解析以正確定位資料庫檔案，與 config.py 中 DATABASE_URL 一致
 # 已修正於 2025-12-05，原因：修正路徑錯誤，DATABASE_URL 相對於 backend 目錄而非專案根目錄
@@ -140,31 +164,38 @@ async def import_database(
             backup_created = True
 
         # 已新增於 2025-12-05，原因：在覆寫資料庫前，先關閉所有現有連接
-        # Step 1: Close all existing database connections
-        from app.db.base import engine, SessionLocal
-
-        # Dispose of the current engine (closes all connections in the pool)
-        engine.dispose()
+        # Modified on 2026-10-19, Reason: the file is written next to the database
+        # and swapped in with os.replace(); the swap is atomic and other workers
+        # notice the new inode (app.db.coherence) and reopen their engines.
+        # Previously: engine.dispose(), overwrite db_path in place, then build
+        # a new engine / SessionLocal here.
+        import app.db.base as db_base
 
         # 已修改於 2025-01-12，原因：使用已讀取的檔案內容直接寫入
         # Save the uploaded database file
-        with open(db_path, "wb") as buffer:
-            buffer.write(file_content)
+        tmp_path = db_path.with_name(f".{db_path.name}.import-{uuid.uuid4().hex}")
+        try:
+            with open(tmp_path, "wb") as buffer:
+                buffer.write(file_content)
+            # Added on 2026-10-19, Reason: an export from an older version
+            # lacks later tables (stored_files); bring it to the current
+            # schema before it goes live, and keep the current database if
+            # that is not possible
+            try:
+                await run_in_threadpool(prepare_imported_database, tmp_path)
+            except Exception as migrate_error:
+                logger.error(f"Imported database could not be migrated: {migrate_error}")
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Imported database could not be migrated to the current schema"
+                )
+            os.replace(tmp_path, db_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
         # 已新增於 2025-12-05，原因：資料庫檔案更新後，重新建立資料庫引擎和 Session
-        # Step 2: Recreate the engine and SessionLocal with the new database file
-        from app.core.config import settings
-        import app.db.base as db_base
-
-        # Create new engine
-        new_engine = create_engine(
-            settings.DATABASE_URL,
-            connect_args={"check_same_thread": False}
-        )
-
-        # Replace the global engine and SessionLocal
-        db_base.engine = new_engine
-        db_base.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=new_engine)
+        # Step 2: Recreate the engine and SessionLocal, and drop this worker's caches
+        coherence.watcher.database_replaced()
 
         # Verify the new database can be accessed
         test_session = db_base.SessionLocal()
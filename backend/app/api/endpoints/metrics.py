@@ -0,0 +1,142 @@
+"""
+Prometheus metrics endpoint
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+GET /metrics renders app.core.metrics in the Prometheus text format. Besides
+the request and database metrics recorded on the hot path, it reports stats
+that other modules already keep, read at scrape time:
+
+* cache_requests_total{cache, result}: the auth cache (hit / miss) and the
+  payload snapshots (hit / shared = mapped from another worker's file /
+  miss = built here). Hit ratio: hit / sum by (cache).
+* single_flight_calls_total{flight, outcome}: executions vs. collapsed calls.
+* admission_* per priority class, db_coherence_invalidations_total.
+* worker_* from the supervisor's stats file (recycles, RSS).
+
+The route is mounted at the root, outside /api, so nginx does not proxy it.
+The backend port itself is published on the host (58433 in
+docker-compose.yml), though, so the endpoint checks every request: the
+connection must come from settings.METRICS_ALLOWED_IPS (loopback by
+default) or carry "Authorization: Bearer <METRICS_TOKEN>". Anything else
+gets 403.
+"""
+
+import hmac
+import json
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.endpoints.auth import address_allowed
+from app.core import auth_cache, metrics
+from app.core.config import settings
+from app.core.single_flight import flights
+from app.db import coherence
+from app.services import snapshots
+
+router = APIRouter()
+
+
+def require_metrics_access(request: Request) -> None:
+    """Allow the scrape from METRICS_ALLOWED_IPS or with the METRICS_TOKEN bearer token"""
+    # The peer address, not X-Real-IP: that header is set by whoever connects
+    peer = request.client.host if request.client else ""
+    if address_allowed(peer, settings.METRICS_ALLOWED_IPS):
+        return
+    if settings.METRICS_TOKEN:
+        scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(
+            credentials.strip().encode(), settings.METRICS_TOKEN.encode()
+        ):
+            return
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to read metrics")
+
+
+@router.get("", response_class=PlainTextResponse, include_in_schema=False,
+            dependencies=[Depends(require_metrics_access)])
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _cache_requests() -> metrics.Samples:
+    auth = auth_cache.stats()
+    samples = [
+        ({"cache": "auth", "result": "hit"}, auth["hits"]),
+        ({"cache": "auth", "result": "miss"}, auth["misses"]),
+    ]
+    for name, store in list(snapshots.stores.items()):
+        cache = f"snapshot:{name}"
+        samples += [
+            ({"cache": cache, "result": "hit"}, store.hits),
+            ({"cache": cache, "result": "shared"}, store.maps),
+            ({"cache": cache, "result": "miss"}, store.builds),
+        ]
+    return samples
+
+
+def _single_flight_calls() -> metrics.Samples:
+    samples = []
+    for name, flight in list(flights.items()):
+        stats = flight.stats()
+        for outcome, key in (("executed", "executions"), ("collapsed", "collapsed"),
+                             ("fresh", "fresh_hits"), ("stale", "stale_served"), ("error", "errors")):
+            samples.append(({"flight": name, "outcome": outcome}, stats[key]))
+    return samples
+
+
+def _admission(key: str) -> metrics.Samples:
+    # Imported here: app.middleware imports the endpoint modules
+    from app.middleware.priority import PriorityAdmissionMiddleware
+
+    middleware = PriorityAdmissionMiddleware.current()
+    if middleware is None:
+        return []
+    return [({"class": name}, stats[key]) for name, stats in middleware.stats().items()]
+
+
+def _supervisor_stats() -> dict:
+    if not settings.SUPERVISOR_STATS_FILE:
+        return {}
+    try:
+        return json.loads(Path(settings.SUPERVISOR_STATS_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _worker_rss() -> metrics.Samples:
+    rss = _supervisor_stats().get("worker_rss_bytes")
+    return [({}, rss)] if rss is not None else []
+
+
+def _worker_recycles() -> metrics.Samples:
+    return [({"reason": reason}, count)
+            for reason, count in _supervisor_stats().get("recycles_total", {}).items()]
+
+
+metrics.register_collector(
+    "cache_requests_total", "counter", "Cache lookups by cache and result", _cache_requests)
+metrics.register_collector(
+    "single_flight_calls_total", "counter", "Single-flight calls by outcome", _single_flight_calls)
+metrics.register_collector(
+    "admission_active", "gauge", "Requests admitted and running, by priority class",
+    lambda: _admission("active"))
+metrics.register_collector(
+    "admission_queued", "gauge", "Requests waiting for admission, by priority class",
+    lambda: _admission("queued"))
+metrics.register_collector(
+    "admission_admitted_total", "counter", "Requests admitted, by priority class",
+    lambda: _admission("admitted"))
+metrics.register_collector(
+    "admission_shed_total", "counter", "Requests rejected with 503, by priority class",
+    lambda: _admission("shed"))
+metrics.register_collector(
+    "db_coherence_invalidations_total", "counter",
+    "Cache invalidations after another worker changed or replaced the database",
+    lambda: [({"reason": reason}, count) for reason, count in coherence.watcher.invalidations.items()])
+metrics.register_collector(
+    "worker_rss_bytes", "gauge", "Worker resident set size (supervisor)", _worker_rss)
+metrics.register_collector(
+    "worker_recycles_total", "counter", "Worker recycles by reason (supervisor)", _worker_recycles)
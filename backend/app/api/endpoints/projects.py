@@ -4,13 +4,24 @@ Author: Polo (林鴻全)
 Date: 2025-11-30
 """
 
+import asyncio
+import os
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Body
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.orm import Session, selectinload
 
 from app.db.base import get_db
-from app.models.project import Project
-from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
+from app.models.project import Project, ProjectDetail, ProjectAttachment
+from app.schemas.project import (
+    ProjectCreate,
+    ProjectUpdate,
+    ProjectResponse,
+    ProjectAttachmentInDB,
+    ProjectAttachmentIds,
+    ProjectDetailInDB,
+    ProjectDetailSyncItem,
+)
 from app.api.endpoints.auth import get_current_user
 from app.models.user import User
 from app.api.upload_utils import (
@@ -18,6 +29,10 @@ from app.api.upload_utils import (
     parse_date_string,
     save_upload_file,
     delete_upload_file,
+    ensure_upload_dir,
+    stream_upload_file,
+    store_content_file,
+    temp_upload_path,
 )
 
 router = APIRouter()
@@ -87,6 +102,11 @@ def delete_project(project_id: int, db: Session = Depends(get_db), current_user:
         if not db_project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
+        # Added on 2026-10-19, Reason: release the stored-file reference of the attachment
+        delete_upload_file(db_project.attachment_path, db)
+        for detail in db_project.details:
+            for attachment in detail.attachments:
+                delete_upload_file(attachment.file_url, db)
         db.delete(db_project)
         db.commit()
         return {"message": "Project deleted successfully"}
@@ -145,7 +165,7 @@ async def create_project_with_file(
 
         # Handle file upload
         if file and file.filename:
-            project_data.update(await save_upload_file(file))
+            project_data.update(await save_upload_file(file, db))
 
         # Create project
         db_project = Project(**project_data)
@@ -217,10 +237,14 @@ async def update_project_with_file(
 
         # Handle file upload
         if file and file.filename:
-            delete_upload_file(project.attachment_path)
-            project_data.update(await save_upload_file(file))
+            # Modified on 2026-10-19, Reason: store the new file before releasing
+            # the old one so re-uploading identical bytes keeps the shared blob
+            project_data.update(await save_upload_file(file, db))
+            delete_upload_file(project.attachment_path, db)
         else:
             # Clear attachment info if no file provided
+            # Modified on 2026-10-19, Reason: release the stored-file reference being cleared
+            delete_upload_file(project.attachment_path, db)
             project_data.update({
                 "attachment_name": None,
                 "attachment_path": None,
@@ -285,3 +309,290 @@ def update_project_attachment_name(
     except Exception:
         db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error occurred")
+
+
+# ===== Project details =====
+# Added on 2026-10-19, Reason: ProjectDetail CRUD; the editor saves the whole
+# ordered list in one call instead of one request per bullet point
+
+# Modified on 2026-10-19, Reason: N+1 fix — attachments in one query, not one per detail
+def _list_project_details(project_id: int, db: Session) -> List[ProjectDetail]:
+    return (
+        db.query(ProjectDetail)
+        .options(selectinload(ProjectDetail.attachments))
+        .filter(ProjectDetail.project_id == project_id)
+        .order_by(ProjectDetail.display_order, ProjectDetail.id)
+        .all()
+    )
+
+
+@router.get("/{project_id}/details", response_model=List[ProjectDetailInDB])
+def get_project_details(project_id: int, db: Session = Depends(get_db)):
+    """Get the details of a project in display order"""
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    return _list_project_details(project_id, db)
+
+
+@router.put("/{project_id}/details", response_model=List[ProjectDetailInDB])
+def sync_project_details(
+    project_id: int,
+    details: List[ProjectDetailSyncItem],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Replace the detail list of a project with the given ordered list
+
+    Items with an id update that detail, items without one are inserted, and
+    existing details missing from the list are deleted together with their
+    attachments. display_order becomes the position in the list. The diff is
+    applied with one bulk INSERT, UPDATE and DELETE in a single transaction.
+    """
+    try:
+        if not db.query(Project.id).filter(Project.id == project_id).first():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+        existing_ids = {
+            row.id for row in db.query(ProjectDetail.id).filter(ProjectDetail.project_id == project_id)
+        }
+        sent_ids = [item.id for item in details if item.id is not None]
+        if len(sent_ids) != len(set(sent_ids)):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Duplicate detail ids")
+        unknown = set(sent_ids) - existing_ids
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Project details not found: {sorted(unknown)}"
+            )
+
+        inserts, updates = [], []
+        for order, item in enumerate(details):
+            values = {
+                "description_zh": item.description_zh,
+                "description_en": item.description_en,
+                "display_order": order,
+            }
+            if item.id is None:
+                inserts.append({"project_id": project_id, **values})
+            else:
+                updates.append({"id": item.id, **values})
+
+        removed_ids = existing_ids - set(sent_ids)
+        if removed_ids:
+            removed_urls = db.query(ProjectAttachment.file_url).filter(
+                ProjectAttachment.project_detail_id.in_(removed_ids)
+            ).all()
+            for row in removed_urls:
+                delete_upload_file(row.file_url, db)
+            db.execute(delete(ProjectAttachment).where(ProjectAttachment.project_detail_id.in_(removed_ids)))
+            db.execute(delete(ProjectDetail).where(ProjectDetail.id.in_(removed_ids)))
+        if updates:
+            db.execute(update(ProjectDetail), updates)
+        if inserts:
+            db.execute(insert(ProjectDetail), inserts)
+        db.commit()
+        db.expire_all()
+        return _list_project_details(project_id, db)
+    except HTTPException:
+        raise
+    except Exception:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error occurred")
+
+
+# ===== Project detail attachments =====
+# Added on 2026-10-19, Reason: multi-file attachment API for ProjectAttachment
+# All parts of one multipart request are streamed / hashed concurrently and
+# the rows are inserted in a single transaction.
+
+MAX_FILES_PER_REQUEST = 20
+
+ATTACHMENT_FILE_TYPES = {
+    ".pdf": "pdf",
+    ".doc": "word",
+    ".docx": "word",
+    ".txt": "text",
+    ".jpg": "jpg",
+    ".jpeg": "jpg",
+    ".png": "png",
+}
+
+
+def _get_project_detail(project_id: int, detail_id: int, db: Session) -> ProjectDetail:
+    detail = db.query(ProjectDetail).filter(
+        ProjectDetail.id == detail_id,
+        ProjectDetail.project_id == project_id,
+    ).first()
+    if not detail:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project detail not found")
+    return detail
+
+
+def _list_detail_attachments(detail_id: int, db: Session) -> List[ProjectAttachment]:
+    return (
+        db.query(ProjectAttachment)
+        .filter(ProjectAttachment.project_detail_id == detail_id)
+        .order_by(ProjectAttachment.display_order, ProjectAttachment.id)
+        .all()
+    )
+
+
+@router.get("/{project_id}/details/{detail_id}/attachments", response_model=List[ProjectAttachmentInDB])
+def get_project_detail_attachments(project_id: int, detail_id: int, db: Session = Depends(get_db)):
+    """Get the attachments of a project detail in display order"""
+    _get_project_detail(project_id, detail_id, db)
+    return _list_detail_attachments(detail_id, db)
+
+
+@router.post(
+    "/{project_id}/details/{detail_id}/attachments",
+    response_model=List[ProjectAttachmentInDB],
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_project_detail_attachments(
+    project_id: int,
+    detail_id: int,
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload several attachments to a project detail in one request
+
+    Every part is validated before anything is written. The parts are then
+    copied and hashed concurrently (file I/O runs in the threadpool), and the
+    StoredFile references and ProjectAttachment rows are added in one
+    transaction. New attachments are appended after the existing ones in
+    the order they were sent.
+    """
+    if len(files) > MAX_FILES_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_FILES_PER_REQUEST} files can be uploaded per request"
+        )
+    for file in files:
+        if not file.filename or not validate_file(file):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid file: {file.filename}"
+            )
+
+    _get_project_detail(project_id, detail_id, db)
+
+    ensure_upload_dir()
+    extensions = [os.path.splitext(file.filename)[1].lower() for file in files]
+    temp_paths = [temp_upload_path(ext) for ext in extensions]
+    results = await asyncio.gather(
+        *(stream_upload_file(file, path) for file, path in zip(files, temp_paths)),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        for path in temp_paths:
+            path.unlink(missing_ok=True)
+        if isinstance(errors[0], HTTPException):
+            raise errors[0]
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to save uploaded files")
+
+    try:
+        # The session is not thread-safe, so references are added in order
+        next_order = db.query(
+            func.coalesce(func.max(ProjectAttachment.display_order) + 1, 0)
+        ).filter(ProjectAttachment.project_detail_id == detail_id).scalar()
+        attachments = []
+        for index, (file, ext, temp_path, (file_size, sha256)) in enumerate(
+            zip(files, extensions, temp_paths, results)
+        ):
+            stored = store_content_file(temp_path, sha256, file_size, ext, db)
+            attachments.append(ProjectAttachment(
+                project_detail_id=detail_id,
+                file_name=file.filename,
+                file_url=f"/uploads/{stored.storage_key}",
+                file_type=ATTACHMENT_FILE_TYPES[ext],
+                file_size=stored.size,
+                display_order=next_order + index,
+            ))
+        db.add_all(attachments)
+        db.commit()
+        for attachment in attachments:
+            db.refresh(attachment)
+        return attachments
+    except HTTPException:
+        raise
+    except Exception:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error occurred")
+
+
+@router.delete("/{project_id}/details/{detail_id}/attachments")
+def delete_project_detail_attachments(
+    project_id: int,
+    detail_id: int,
+    payload: ProjectAttachmentIds,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delete several attachments of a project detail in one transaction"""
+    try:
+        _get_project_detail(project_id, detail_id, db)
+        ids = set(payload.ids)
+        attachments = db.query(ProjectAttachment).filter(
+            ProjectAttachment.project_detail_id == detail_id,
+            ProjectAttachment.id.in_(ids),
+        ).all()
+        missing = ids - {attachment.id for attachment in attachments}
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Attachments not found: {sorted(missing)}"
+            )
+        for attachment in attachments:
+            delete_upload_file(attachment.file_url, db)
+            db.delete(attachment)
+        db.commit()
+        return {"message": f"Deleted {len(attachments)} attachments"}
+    except HTTPException:
+        raise
+    except Exception:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error occurred")
+
+
+@router.put("/{project_id}/details/{detail_id}/attachments/order", response_model=List[ProjectAttachmentInDB])
+def reorder_project_detail_attachments(
+    project_id: int,
+    detail_id: int,
+    payload: ProjectAttachmentIds,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Set the display order of a project detail's attachments
+
+    ids must list every attachment of the detail exactly once; display_order
+    becomes the position in the list. Applied as one bulk UPDATE.
+    """
+    try:
+        _get_project_detail(project_id, detail_id, db)
+        current_ids = {
+            row.id for row in db.query(ProjectAttachment.id)
+            .filter(ProjectAttachment.project_detail_id == detail_id)
+        }
+        if len(payload.ids) != len(set(payload.ids)) or set(payload.ids) != current_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ids must list every attachment of the detail exactly once"
+            )
+        if payload.ids:
+            db.execute(
+                update(ProjectAttachment),
+                [{"id": attachment_id, "display_order": order} for order, attachment_id in enumerate(payload.ids)],
+            )
+        db.commit()
+        return _list_detail_attachments(detail_id, db)
+    except HTTPException:
+        raise
+    except Exception:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error occurred")
@@ -0,0 +1,75 @@
+"""
+Public résumé endpoint
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Serves the whole résumé from the shared snapshot file (see
+app.services.resume_snapshot) without copying it into the worker.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import logging
+
+from app.api.snapshot_response import SnapshotResponse, snapshot_response
+from app.core.single_flight import SingleFlight
+import app.db.base as db_base
+from app.db.base import get_db
+from app.db.coherence import database_token
+from app.schemas.resume import ResumeSnapshot
+from app.services import resume_snapshot
+from app.services.snapshots import Snapshot
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Concurrent misses after a change wait for one rebuild without holding a thread
+resume_flight = SingleFlight("resume")
+
+
+def _load_snapshot(token: str) -> Snapshot:
+    """Map the published snapshot for token, or build and publish it
+
+    The build opens its own session: the shared call outlives a waiter that
+    disconnects, and with it that request's Session.
+    """
+    def build() -> bytes:
+        # Looked up at call time: import_database replaces SessionLocal
+        db = db_base.SessionLocal()
+        try:
+            return resume_snapshot.build_resume_json(db)
+        finally:
+            db.close()
+
+    return resume_snapshot.store.get(token, build)
+
+
+@router.get(
+    "/",
+    response_model=ResumeSnapshot,
+    response_class=SnapshotResponse,
+    responses={304: {"description": "Not modified (If-None-Match matched)"}},
+)
+async def get_resume(request: Request, db: Session = Depends(get_db)):
+    """Get the complete public résumé (public endpoint)
+
+    Sent gzip'd when accepted; ETag / If-None-Match are supported and
+    X-Snapshot-Version is the snapshot version.
+    """
+    try:
+        token = database_token(db)
+        snapshot = resume_snapshot.store.cached(token)
+        if snapshot is None:
+            snapshot = await resume_flight.do(
+                "resume", lambda: run_in_threadpool(_load_snapshot, token), token
+            )
+    except Exception as e:
+        logger.error(f"Error building resume snapshot: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error occurred"
+        )
+
+    return snapshot_response(request, snapshot)
@@ -0,0 +1,291 @@
+"""
+Resumable chunked upload API endpoints
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Large attachments are sent as a sequence of chunks instead of one 100MB
+request, so a dropped connection only costs the chunk in flight:
+
+    POST   /sessions                     create session -> upload_id
+    PUT    /sessions/{upload_id}?offset= append one chunk (raw request body)
+    GET    /sessions/{upload_id}         query the current offset to resume
+    POST   /sessions/{upload_id}/finalize attach to a work experience / project
+    DELETE /sessions/{upload_id}         abort
+
+Chunks are appended to a .part file on disk as they stream in; the offset is
+the size of that file, so it survives worker restarts.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.base import get_db
+from app.api.endpoints.auth import get_current_user
+from app.models.user import User
+from app.models.work_experience import WorkExperience
+from app.models.project import Project
+from app.services.upload_reconciler import reconcile_uploads
+from app.schemas.upload import (
+    UploadSessionCreate,
+    UploadSessionStatus,
+    UploadSessionFinalize,
+    UploadFinalizeResponse,
+)
+import app.api.upload_utils as upload_utils
+from app.api.upload_utils import (
+    ALLOWED_EXTENSIONS,
+    MAX_FILE_SIZE,
+    UPLOAD_CHUNK_SIZE,
+    attachment_metadata,
+    delete_upload_file,
+    store_content_file,
+)
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Largest single chunk accepted by PUT (also enforced by BodySizeLimitMiddleware)
+MAX_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+# Unfinished sessions idle for longer than this (no chunk received) are
+# removed when a new session starts
+SESSION_TTL_SECONDS = 24 * 60 * 60
+
+TARGET_MODELS = {
+    "work_experience": WorkExperience,
+    "project": Project,
+}
+
+# One lock per session so concurrent PUTs cannot interleave appends
+_session_locks: dict = {}
+
+
+def _sessions_dir() -> Path:
+    # Resolved on each call so tests can monkeypatch upload_utils.UPLOAD_DIR
+    return upload_utils.UPLOAD_DIR / ".sessions"
+
+
+def _session_dir(upload_id: str) -> Path:
+    # upload_id is a uuid4 hex string; reject anything else before touching disk
+    try:
+        if uuid.UUID(hex=upload_id).hex != upload_id:
+            raise ValueError
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return _sessions_dir() / upload_id
+
+
+def _load_session(upload_id: str) -> dict:
+    session_dir = _session_dir(upload_id)
+    meta_path = session_dir / "meta.json"
+    if not meta_path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    meta = json.loads(meta_path.read_text())
+    part_path = session_dir / "data.part"
+    meta["offset"] = part_path.stat().st_size if part_path.exists() else 0
+    return meta
+
+
+def _session_status(upload_id: str, meta: dict) -> dict:
+    return {
+        "upload_id": upload_id,
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "offset": meta["offset"],
+    }
+
+
+# Added on 2026-10-19, Reason: appending to data.part does not change the
+# directory's mtime, so an upload still in progress looked expired
+def _last_activity(session_dir: Path) -> float:
+    """Time the session last received a chunk (its creation time before that)"""
+    try:
+        return (session_dir / "data.part").stat().st_mtime
+    except OSError:
+        return session_dir.stat().st_mtime
+
+
+def _purge_expired_sessions() -> None:
+    sessions_dir = _sessions_dir()
+    if not sessions_dir.exists():
+        return
+    cutoff = time.time() - SESSION_TTL_SECONDS
+    for entry in os.scandir(sessions_dir):
+        if entry.is_dir() and _last_activity(Path(entry.path)) < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            _session_locks.pop(entry.name, None)
+
+
+@router.post("/sessions", response_model=UploadSessionStatus, status_code=status.HTTP_201_CREATED)
+def create_upload_session(
+    session_data: UploadSessionCreate,
+    current_user: User = Depends(get_current_user),
+):
+    """Start a resumable upload (requires authentication)"""
+    file_extension = os.path.splitext(session_data.filename)[1].lower()
+    if file_extension not in ALLOWED_EXTENSIONS or session_data.size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file type or size. Allowed types: PDF, DOC, DOCX, TXT, JPG, JPEG, PNG. Max size: 100MB"
+        )
+
+    _purge_expired_sessions()
+    upload_id = uuid.uuid4().hex
+    session_dir = _sessions_dir() / upload_id
+    session_dir.mkdir(parents=True)
+    meta = session_data.model_dump()
+    (session_dir / "meta.json").write_text(json.dumps(meta))
+    (session_dir / "data.part").touch()
+    meta["offset"] = 0
+    return _session_status(upload_id, meta)
+
+
+@router.get("/sessions/{upload_id}", response_model=UploadSessionStatus)
+def get_upload_session(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Return the offset to resume from (requires authentication)"""
+    return _session_status(upload_id, _load_session(upload_id))
+
+
+@router.put("/sessions/{upload_id}", response_model=UploadSessionStatus)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    current_user: User = Depends(get_current_user),
+):
+    """Append one chunk at offset (requires authentication)
+
+    offset must equal the current session offset; otherwise 409 is returned
+    with the offset the client should resume from.
+    """
+    lock = _session_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        meta = _load_session(upload_id)
+        if offset != meta["offset"]:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Offset mismatch: expected {meta['offset']}",
+                headers={"Upload-Offset": str(meta["offset"])},
+            )
+
+        part_path = _session_dir(upload_id) / "data.part"
+        received = 0
+        buffer = await run_in_threadpool(open, part_path, "ab")
+        try:
+            async for chunk in request.stream():
+                if not chunk:
+                    continue
+                received += len(chunk)
+                if received > MAX_CHUNK_SIZE or offset + received > meta["size"]:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Chunk exceeds the chunk size limit or the declared file size"
+                    )
+                await run_in_threadpool(buffer.write, chunk)
+        except HTTPException:
+            # Drop the partial chunk so the offset stays on a chunk boundary
+            await run_in_threadpool(buffer.truncate, offset)
+            raise
+        finally:
+            await run_in_threadpool(buffer.close)
+
+        meta["offset"] = offset + received
+        return _session_status(upload_id, meta)
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@router.post("/sessions/{upload_id}/finalize", response_model=UploadFinalizeResponse)
+async def finalize_upload_session(
+    upload_id: str,
+    finalize_data: UploadSessionFinalize,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Attach a completed upload to a work experience or project (requires authentication)"""
+    lock = _session_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        meta = _load_session(upload_id)
+        if meta["offset"] != meta["size"]:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload incomplete: {meta['offset']} of {meta['size']} bytes received",
+                headers={"Upload-Offset": str(meta["offset"])},
+            )
+
+        model = TARGET_MODELS[finalize_data.target]
+        record = db.query(model).filter(model.id == finalize_data.target_id).first()
+        if not record:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target record not found")
+
+        try:
+            session_dir = _session_dir(upload_id)
+            part_path = session_dir / "data.part"
+            sha256 = await run_in_threadpool(_hash_file, part_path)
+            file_extension = os.path.splitext(meta["filename"])[1].lower()
+            # The .part file stays in the session on rollback so finalize can be retried
+            stored = store_content_file(
+                part_path, sha256, meta["size"], file_extension, db, discard_on_rollback=False
+            )
+
+            old_attachment_path = record.attachment_path
+            attachment = attachment_metadata(stored, meta["filename"], meta.get("content_type"))
+            for key, value in attachment.items():
+                setattr(record, key, value)
+            delete_upload_file(old_attachment_path, db)
+
+            db.commit()
+        except HTTPException:
+            raise
+        except Exception:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error occurred")
+
+        shutil.rmtree(session_dir, ignore_errors=True)
+    _session_locks.pop(upload_id, None)
+    return {"target": finalize_data.target, "target_id": finalize_data.target_id, **attachment}
+
+
+@router.delete("/sessions/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abort_upload_session(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Abort an upload and discard received chunks (requires authentication)"""
+    _load_session(upload_id)
+    shutil.rmtree(_session_dir(upload_id), ignore_errors=True)
+    _session_locks.pop(upload_id, None)
+    return None
+
+
+@router.post("/reconcile")
+def reconcile_upload_storage(
+    full: bool = Query(False),
+    dry_run: bool = Query(False),
+    force: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Admin endpoint: clear stale attachment references and quarantine orphan files
+
+    Incremental by default (only files changed since the last run are orphan
+    candidates); pass full=true to re-examine every file. A run that would
+    clear most references (e.g. uploads/ not mounted) only reports; pass
+    force=true to apply it anyway.
+    """
+    return reconcile_uploads(db, full=full, dry_run=dry_run, force=force)
@@ -6,6 +6,7 @@ import os
 from pathlib import Path
 from app.db.base import get_db
 from app.models.work_experience import WorkExperience
+from app.models.project import Project, ProjectDetail
 from app.schemas.work_experience import (
     WorkExperienceInDB,
     WorkExperienceCreate,
@@ -27,6 +28,16 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Added on 2026-10-19, Reason: N+1 fix — the response includes every project's
+# details and their attachments, which were lazy loaded per project / detail.
+# Experiences, projects and details come in one joined query, attachments in a
+# second one, however many rows there are.
+_WITH_PROJECT_TREE = (
+    joinedload(WorkExperience.projects)
+    .joinedload(Project.details)
+    .selectinload(ProjectDetail.attachments)
+)
+
 
 def _cleanup_stale_attachments(experiences: list, db: Session) -> int:
     """Clear attachment metadata for records whose files no longer exist on disk.
@@ -38,8 +49,10 @@ def _cleanup_stale_attachments(experiences: list, db: Session) -> int:
     cleaned = 0
     for exp in experiences:
         if exp.attachment_path and exp.attachment_url:
+            # Modified on 2026-10-19, Reason: keep the ab/cd/ shard directories
+            # of content-addressed uploads instead of only the basename
             if not os.path.isabs(exp.attachment_path):
-                abs_path = UPLOAD_DIR / os.path.basename(exp.attachment_path)
+                abs_path = UPLOAD_DIR / exp.attachment_url.removeprefix("/uploads/")
             else:
                 abs_path = Path(exp.attachment_path)
 
@@ -68,7 +81,7 @@ def _cleanup_stale_attachments(experiences: list, db: Session) -> int:
 async def get_work_experiences(db: Session = Depends(get_db)):
     """Get all work experiences with projects (public endpoint)"""
     experiences = db.query(WorkExperience)\
-        .options(joinedload(WorkExperience.projects))\
+        .options(_WITH_PROJECT_TREE)\
         .order_by(WorkExperience.display_order)\
         .all()
     # Removed on 2026-04-01: attachment cleanup side effect (db.commit in GET)
@@ -163,7 +176,7 @@ async def create_work_experience_with_file(
 
         # Handle file upload
         if file and file.filename:
-            experience_data.update(await save_upload_file(file))
+            experience_data.update(await save_upload_file(file, db))
 
         # Create work experience
         db_experience = WorkExperience(**experience_data)
@@ -186,7 +199,7 @@ async def create_work_experience_with_file(
 async def get_work_experience(experience_id: int, db: Session = Depends(get_db)):
     """Get specific work experience with projects (public endpoint)"""
     experience = db.query(WorkExperience)\
-        .options(joinedload(WorkExperience.projects))\
+        .options(_WITH_PROJECT_TREE)\
         .filter(WorkExperience.id == experience_id)\
         .first()
     if not experience:
@@ -263,9 +276,12 @@ async def update_work_experience_with_file(
                     detail="Invalid file type or size. Allowed types: PDF, DOC, DOCX, TXT, JPG, JPEG, PNG. Max size: 100MB"
                 )
 
-            delete_upload_file(experience.attachment_path)
-            for key, value in (await save_upload_file(file)).items():
+            # Modified on 2026-10-19, Reason: store the new file before releasing
+            # the old one so re-uploading identical bytes keeps the shared blob
+            old_attachment_path = experience.attachment_path
+            for key, value in (await save_upload_file(file, db)).items():
                 setattr(experience, key, value)
+            delete_upload_file(old_attachment_path, db)
 
         db.commit()
         db.refresh(experience)
@@ -327,7 +343,15 @@ async def delete_work_experience(
     try:
         # Delete associated file if exists - added on 2025-12-22
         # Reason: Clean up file system when deleting work experience
-        delete_upload_file(experience.attachment_path)
+        delete_upload_file(experience.attachment_path, db)
+        # Added on 2026-10-19, Reason: projects are cascade-deleted with the
+        # experience, so release their stored-file references as well
+        # Modified on 2026-10-19, Reason: and the attachments of their details
+        for project in experience.projects:
+            delete_upload_file(project.attachment_path, db)
+            for detail in project.details:
+                for attachment in detail.attachments:
+                    delete_upload_file(attachment.file_url, db)
 
         db.delete(experience)
         db.commit()
@@ -0,0 +1,52 @@
+"""
+Responses for published snapshots (app.services.snapshots)
+Author: Polo (林鴻全)
+Date: 2026-10-19
+"""
+
+from fastapi import Request, status
+from fastapi.responses import Response
+
+from app.services.snapshots import Snapshot
+
+
+class SnapshotResponse(Response):
+    """Sends a memoryview (of a mapped snapshot) as the body without copying it"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> memoryview:
+        return content
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if the Accept-Encoding header allows gzip (q > 0)"""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        params = params.strip()
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 0.0
+        qualities[coding.strip().lower()] = q
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def snapshot_response(request: Request, snapshot: Snapshot) -> Response:
+    """200 with the body (gzip'd when accepted and smaller), or 304 for a matching ETag"""
+    use_gzip = len(snapshot.gzip) < len(snapshot.body) and accepts_gzip(request.headers.get("accept-encoding", ""))
+    # Each encoding is a separate representation with its own strong ETag
+    etag = f'"{snapshot.digest[:32]}-gzip"' if use_gzip else snapshot.etag
+    headers = {
+        "ETag": etag,
+        "X-Snapshot-Version": str(snapshot.version),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return SnapshotResponse(content=snapshot.gzip, headers=headers)
+    return SnapshotResponse(content=snapshot.body, headers=headers)
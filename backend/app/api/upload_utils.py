@@ -1,13 +1,21 @@
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+import hashlib
 import os
 import uuid
 from datetime import datetime, date
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.models.stored_file import StoredFile
+from app.services import image_derivatives
+from app.db import file_transactions
 
 UPLOAD_DIR = Path("uploads")
 ALLOWED_EXTENSIONS = {".pdf", ".doc", ".docx", ".txt", ".jpg", ".jpeg", ".png"}
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+# Added on 2026-10-19, Reason: copy uploads in fixed-size chunks instead of file.read()
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 
 
 def ensure_upload_dir():
@@ -20,7 +28,10 @@ def validate_file(file: UploadFile) -> bool:
     file_extension = os.path.splitext(file.filename)[1].lower()
     if file_extension not in ALLOWED_EXTENSIONS:
         return False
-    if hasattr(file, 'size') and file.size > MAX_FILE_SIZE:
+    # Modified on 2026-10-19, Reason: file.size may be None; the hard limit
+    # is enforced while streaming in stream_upload_file
+    file_size = getattr(file, "size", None)
+    if file_size is not None and file_size > MAX_FILE_SIZE:
         return False
     return True
 
@@ -35,31 +46,166 @@ def parse_date_string(date_str: Optional[str]) -> Optional[date]:
         return None
 
 
-async def save_upload_file(file: UploadFile) -> dict:
-    """Save uploaded file and return attachment metadata dict"""
-    ensure_upload_dir()
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
-    file_content = await file.read()
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_content)
+async def stream_upload_file(
+    file: UploadFile,
+    destination: Path,
+    max_size: int = MAX_FILE_SIZE,
+) -> Tuple[int, str]:
+    """Copy an upload to destination in fixed-size chunks.
+
+    Enforces max_size on the bytes actually received and computes the SHA-256
+    digest in the same pass. Blocking file I/O runs in the threadpool so the
+    event loop is never held by a large write. Returns (size, sha256 hex).
+    Added on 2026-10-19, Reason: replace await file.read() (up to 100MB in memory)
+    """
+    size = 0
+    digest = hashlib.sha256()
+    buffer = await run_in_threadpool(open, destination, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"File size exceeds maximum allowed size of {max_size / (1024 * 1024):.0f}MB"
+                )
+            digest.update(chunk)
+            await run_in_threadpool(buffer.write, chunk)
+    except BaseException:
+        await run_in_threadpool(buffer.close)
+        destination.unlink(missing_ok=True)
+        raise
+    await run_in_threadpool(buffer.close)
+    return size, digest.hexdigest()
+
+
+def temp_upload_path(extension: str) -> Path:
+    """Unique hidden path in UPLOAD_DIR for an upload that is still being written"""
+    return UPLOAD_DIR / f".upload-{uuid.uuid4()}{extension}"
+
+
+def content_storage_key(sha256: str, extension: str) -> str:
+    """Sharded key for a blob: ab/cd/<sha256><ext> (at most 256 entries per level)"""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+def sha256_from_reference(reference: str) -> Optional[str]:
+    """Extract the content hash from an attachment path or URL, if it has one"""
+    stem = Path(reference).stem
+    if len(stem) == 64 and all(c in "0123456789abcdef" for c in stem):
+        return stem
+    return None
+
+
+def store_content_file(
+    temp_path: Path,
+    sha256: str,
+    file_size: int,
+    file_extension: str,
+    db: Session,
+    discard_on_rollback: bool = True,
+) -> StoredFile:
+    """Add one reference to the content-addressed blob for a fully written temp file
+
+    Creates the StoredFile row if the content is new and queues the move of
+    temp_path to uploads/ab/cd/<sha256><ext> for when the transaction
+    commits. If the blob already exists the temp file is discarded. On
+    rollback temp_path is removed unless discard_on_rollback is False.
+    """
+    stored = db.query(StoredFile).filter(StoredFile.sha256 == sha256).first()
+    if stored and (
+        (UPLOAD_DIR / stored.storage_key).exists()
+        or file_transactions.is_pending_promotion(db, UPLOAD_DIR / stored.storage_key)
+    ):
+        if discard_on_rollback:
+            file_transactions.defer_discard(db, temp_path)
+        else:
+            file_transactions.defer_delete(db, temp_path)
+        stored.ref_count += 1
+        # Added on 2026-10-19, Reason: downloads no longer schedule renders, so
+        # a blob stored before derivatives existed gets them when re-uploaded
+        existing_path = UPLOAD_DIR / stored.storage_key
+        upload_dir = UPLOAD_DIR
+        file_transactions.defer_call(
+            db, lambda: image_derivatives.schedule_derivatives(existing_path, upload_dir, sha256)
+        )
+    else:
+        storage_key = content_storage_key(sha256, file_extension)
+        final_path = UPLOAD_DIR / storage_key
+        # Modified on 2026-10-19, Reason: promote only after a successful commit
+        file_transactions.defer_promote(db, temp_path, final_path, discard_on_rollback)
+        # Added on 2026-10-19, Reason: thumbnails / WebP renditions off the request path
+        upload_dir = UPLOAD_DIR
+        file_transactions.defer_call(
+            db, lambda: image_derivatives.schedule_derivatives(final_path, upload_dir, sha256)
+        )
+        if stored:
+            stored.storage_key = storage_key
+            stored.ref_count += 1
+        else:
+            stored = StoredFile(sha256=sha256, storage_key=storage_key, size=file_size, ref_count=1)
+            db.add(stored)
+    # SessionLocal uses autoflush=False; flush so a second upload of the same
+    # bytes in this transaction finds the row instead of inserting a duplicate
+    db.flush()
+    return stored
+
+
+def attachment_metadata(stored: StoredFile, file_name: str, content_type: Optional[str]) -> dict:
+    """Attachment column values for a record pointing at a stored file"""
     return {
-        "attachment_name": file.filename,
-        "attachment_path": str(file_path),
-        "attachment_size": len(file_content),
-        "attachment_type": file.content_type,
-        "attachment_url": f"/uploads/{unique_filename}",
+        "attachment_name": file_name,
+        "attachment_path": str(UPLOAD_DIR / stored.storage_key),
+        "attachment_size": stored.size,
+        "attachment_type": content_type,
+        "attachment_url": f"/uploads/{stored.storage_key}",
     }
 
 
-def delete_upload_file(file_path_str: Optional[str]) -> None:
-    """Delete a file from the filesystem, ignoring missing files"""
+# Modified on 2026-10-19, Reason: content-addressed, deduplicated storage
+# Identical bytes are stored once under uploads/ab/cd/<sha256><ext>; the
+# StoredFile row counts the WorkExperience / Project / ProjectAttachment
+# references and is updated in the caller's transaction.
+async def save_upload_file(file: UploadFile, db: Session) -> dict:
+    """Save uploaded file and return attachment metadata dict"""
+    ensure_upload_dir()
+    file_extension = os.path.splitext(file.filename)[1].lower()
+    temp_path = temp_upload_path(file_extension)
+    file_size, sha256 = await stream_upload_file(file, temp_path)
+    stored = store_content_file(temp_path, sha256, file_size, file_extension, db)
+    return attachment_metadata(stored, file.filename, file.content_type)
+
+
+def delete_upload_file(file_path_str: Optional[str], db: Session) -> None:
+    """Release one reference to an uploaded file, deleting it when unreferenced
+
+    Accepts an attachment path or URL. Files outside the content-addressed
+    store (legacy uuid4 names) have no StoredFile row and are deleted directly.
+    Modified on 2026-10-19: the file is removed after the transaction commits
+    and kept if it rolls back.
+    """
     if not file_path_str:
         return
-    path = Path(file_path_str)
-    if path.exists():
-        try:
-            path.unlink()
-        except Exception as e:
-            print(f"Warning: Could not delete file {path}: {e}")
+    sha256 = sha256_from_reference(file_path_str)
+    if sha256:
+        stored = db.query(StoredFile).filter(StoredFile.sha256 == sha256).first()
+        if stored:
+            stored.ref_count -= 1
+            if stored.ref_count > 0:
+                db.flush()
+                return
+            path = UPLOAD_DIR / stored.storage_key
+            db.delete(stored)
+            db.flush()
+            file_transactions.defer_delete(db, path)
+            upload_dir = UPLOAD_DIR
+            file_transactions.defer_call(db, lambda: image_derivatives.delete_derivatives(upload_dir, sha256))
+            return
+    if file_path_str.startswith("/uploads/"):
+        # Attachment URL (e.g. ProjectAttachment.file_url) of a legacy file
+        file_transactions.defer_delete(db, UPLOAD_DIR / file_path_str[len("/uploads/"):])
+    else:
+        file_transactions.defer_delete(db, Path(file_path_str))
@@ -0,0 +1,120 @@
+"""
+Authenticated-principal cache
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+get_current_user decodes the JWT and loads the user row on every
+authenticated request. This bounded TTL / LRU cache keyed by the SHA-256 of
+the bearer token keeps the verified claims and a snapshot of the user's
+columns, so repeated requests with the same token (e.g. each item of a bulk
+admin operation) skip both.
+
+Entries expire after AUTH_CACHE_TTL_SECONDS or when the token's exp claim
+passes, whichever is first. The whole cache is cleared when any User row is
+inserted, updated or deleted, and whenever app.db.coherence sees the
+database change (another worker wrote to it, or import_database replaced it).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import coherence
+from app.models.user import User
+
+_lock = threading.Lock()
+_entries: "OrderedDict[str, tuple]" = OrderedDict()
+# Bumped by clear(); a lookup that started before an invalidation must not
+# store what it read
+_generation = 0
+# Lookup outcomes, for the metrics endpoint
+_hits = 0
+_misses = 0
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def generation() -> int:
+    return _generation
+
+
+def get(token: str) -> Optional[User]:
+    """Return a detached User for a cached token, or None on a miss"""
+    global _hits, _misses
+    key = token_digest(token)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            _misses += 1
+            return None
+        expires_at, token_exp, snapshot = entry
+        if now >= expires_at or (token_exp is not None and time.time() >= token_exp):
+            del _entries[key]
+            _misses += 1
+            return None
+        _entries.move_to_end(key)
+        _hits += 1
+    # A fresh transient instance per request; callers never share ORM state
+    return User(**snapshot)
+
+
+def put(token: str, claims: dict, user: User, seen_generation: int) -> None:
+    """Cache the principal for token unless the cache was cleared since seen_generation"""
+    max_entries = settings.AUTH_CACHE_MAX_ENTRIES
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    if max_entries <= 0 or ttl <= 0:
+        return
+    snapshot = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    entry = (time.monotonic() + ttl, claims.get("exp"), snapshot)
+    with _lock:
+        if seen_generation != _generation:
+            return
+        _entries[token_digest(token)] = entry
+        _entries.move_to_end(token_digest(token))
+        while len(_entries) > max_entries:
+            _entries.popitem(last=False)
+
+
+def clear() -> None:
+    global _generation
+    with _lock:
+        _entries.clear()
+        _generation += 1
+
+
+def size() -> int:
+    return len(_entries)
+
+
+def stats() -> dict:
+    return {"hits": _hits, "misses": _misses, "size": len(_entries)}
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_user_change(mapper, connection, target):
+    clear()
+    # Clear again once the change is visible to other sessions, dropping
+    # anything cached from the old row in between
+    session = Session.object_session(target)
+    if session is not None:
+        session.info["auth_cache_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("auth_cache_dirty", False):
+        clear()
+
+
+coherence.register_invalidator(clear)
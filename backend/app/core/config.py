@@ -26,10 +26,89 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
 
+    # Added on 2026-10-19: run init_db (admin user) in the app's lifespan startup
+    INIT_DB_ON_STARTUP: bool = True
+
+    # Worker supervisor (supervisor.py) - added on 2026-10-19
+    # The worker is recycled (replacement started first) once its RSS
+    # exceeds WORKER_MAX_RSS_MB; 0 disables RSS-based recycling
+    WORKER_MAX_RSS_MB: int = 300
+    WORKER_RSS_CHECK_SECONDS: float = 5.0
+    WORKER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SUPERVISOR_STATS_FILE: str = "/tmp/resumexlab-supervisor.json"
+
+    # Added on 2026-10-19: how often a worker checks the SQLite file for changes
+    # by other workers (PRAGMA data_version / replaced file); negative disables
+    COHERENCE_CHECK_INTERVAL_MS: int = 100
+
+    # Added on 2026-10-19: public payload snapshots shared by all workers via
+    # mmap and kept across restarts (app.services.snapshots); empty = each
+    # worker keeps its own copy in memory
+    SNAPSHOT_DIR: str = "./data/snapshots"
+
+    # Added on 2026-10-19: Prometheus metrics at /metrics (app.core.metrics)
+    METRICS_ENABLED: bool = True
+    # Modified on 2026-10-19: the backend port is published on the host, so
+    # /metrics answers only connections from METRICS_ALLOWED_IPS (addresses
+    # or CIDR networks, matched against the peer, never X-Real-IP) or
+    # requests with "Authorization: Bearer <METRICS_TOKEN>" (empty = no token)
+    METRICS_ALLOWED_IPS: list = ["127.0.0.1", "::1"]
+    METRICS_TOKEN: str = ""
+
+    # Added on 2026-10-19: per-request SQL statistics (app.db.query_stats):
+    # Server-Timing header, slow-query log (0 disables), N+1 warning when one
+    # statement runs this many times in a request (0 disables)
+    QUERY_STATS_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 200
+    N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Authenticated-principal cache - added on 2026-10-19 (0 disables it)
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 256
+
+    # Login admission control - added on 2026-10-19
+    # bcrypt runs on PASSWORD_HASH_WORKERS threads; more than
+    # PASSWORD_VERIFY_MAX_PENDING verifications in flight get 503
+    PASSWORD_HASH_WORKERS: int = 1
+    PASSWORD_VERIFY_MAX_PENDING: int = 4
+    # Token buckets: burst size and refill rate (attempts per minute)
+    LOGIN_IP_BURST: int = 10
+    LOGIN_IP_PER_MINUTE: float = 10
+    LOGIN_USERNAME_BURST: int = 5
+    LOGIN_USERNAME_PER_MINUTE: float = 5
+    # Header carrying the client address set by the reverse proxy (nginx sets
+    # X-Real-IP); empty = use the peer address of the connection
+    LOGIN_CLIENT_IP_HEADER: str = "X-Real-IP"
+    # Modified on 2026-10-19: the header is only read when the connection comes
+    # from one of these proxies (addresses or CIDR networks); from any other
+    # peer it could be forged to get a fresh throttle bucket per attempt
+    LOGIN_TRUSTED_PROXIES: list = ["127.0.0.1", "::1"]
+
     # Admin user credentials (required - no defaults, must be set via environment)
     ADMIN_USERNAME: str
     ADMIN_PASSWORD: str
 
+    # Attachment downloads
+    # Added on 2026-10-19: when set (e.g. "/_protected_uploads/"), /uploads responds
+    # with X-Accel-Redirect to this internal nginx location instead of streaming
+    # the file from the uvicorn worker. Empty = serve from Python.
+    UPLOADS_ACCEL_REDIRECT_PREFIX: str = ""
+    # Upload admission gate - added on 2026-10-19
+    # At most MAX_CONCURRENT_UPLOADS multipart uploads / chunk PUTs at once, with
+    # at most UPLOAD_INFLIGHT_BYTE_BUDGET bytes declared in flight; others get 429
+    MAX_CONCURRENT_UPLOADS: int = 2
+    UPLOAD_INFLIGHT_BYTE_BUDGET: int = 210 * 1024 * 1024  # two full-size uploads
+    UPLOAD_RETRY_AFTER_SECONDS: int = 10
+    # Priority admission control - added on 2026-10-19
+    # Concurrent requests and queue depth per class (see app.middleware.priority);
+    # beyond both, or after waiting ADMISSION_QUEUE_TIMEOUT_SECONDS, 503
+    ADMISSION_CONCURRENCY: dict = {"public_read": 12, "admin_write": 4, "bulk": 2, "export": 1}
+    ADMISSION_QUEUE_DEPTH: dict = {"public_read": 32, "admin_write": 8, "bulk": 2, "export": 1}
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+    # Added on 2026-10-19: interval of the incremental uploads/ reconciler (0 = disabled)
+    UPLOAD_RECONCILE_INTERVAL_SECONDS: int = 3600
+
     # CORS
     # 原本設定 (已註解於 2025-11-30，原因：新增實際前端運行端口 5175)
     # BACKEND_CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000"]
@@ -0,0 +1,54 @@
+"""
+Login throttling
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Token buckets per client IP and per username for /auth/login. Each attempt
+takes one token; an empty bucket rejects the attempt immediately with the
+time until the next token, before any database or bcrypt work is done.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LoginThrottle:
+    """Token bucket per key (burst capacity, refilled at per_minute / 60 per second)
+
+    At most max_keys buckets are tracked; the least recently used bucket is
+    dropped first, which is equivalent to it being full again.
+    """
+
+    def __init__(self, burst: int, per_minute: float, max_keys: int = 4096):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str) -> float:
+        """Take a token for key. Returns 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now]
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                tokens, updated = bucket
+                bucket[0] = min(float(self.burst), tokens + (now - updated) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            if self.rate <= 0:
+                return float("inf")
+            return (1 - bucket[0]) / self.rate
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
@@ -0,0 +1,224 @@
+"""
+Prometheus metrics (text exposition format 0.0.4)
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+A small, dependency-free subset of prometheus_client: Counter, Gauge and
+Histogram, with optional labels, plus collectors that report stats other
+modules already keep (caches, admission control, supervisor) when /metrics
+is scraped.
+
+Recording is kept cheap because it runs on every request:
+* A labelled child is created once per label set and then found with one
+  dict lookup.
+* A histogram's bucket counts are a list preallocated when the child is
+  created. observe() bisects the bounds and increments one slot; the
+  cumulative counts are computed only when rendering.
+Updates are not locked. The event loop records request metrics from one
+thread; counters bumped from the threadpool may, rarely, lose an increment.
+"""
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Starlette appends "; charset=utf-8" to text/* media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; request latency
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes; response / payload sizes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 104857600)
+
+# (labels, value) pairs of one metric family, as returned by collectors
+Samples = List[Tuple[Dict[str, str], float]]
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        # One slot per bound plus +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        self._default = None if self.labelnames else self.labels()
+        register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Child for these label values (in labelnames order), created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _labels(self, values: tuple) -> Dict[str, str]:
+        return {name: str(value) for name, value in zip(self.labelnames, values)}
+
+    def render(self, lines: List[str]) -> None:
+        _header(lines, self.name, self.type, self.documentation)
+        for values, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self._labels(values))} {_format_value(child.value)}")
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def render(self, lines: List[str]) -> None:
+        _header(lines, self.name, self.type, self.documentation)
+        for values, child in list(self._children.items()):
+            labels = self._labels(values)
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), child.counts):
+                cumulative += count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+
+
+# ----- registry -----
+
+_metrics: Dict[str, _Metric] = {}
+# name -> (type, documentation, callback returning the current samples)
+_collectors: Dict[str, Tuple[str, str, Callable[[], Samples]]] = {}
+
+
+def register(metric: _Metric) -> None:
+    if metric.name in _metrics or metric.name in _collectors:
+        raise ValueError(f"Metric {metric.name} is already registered")
+    _metrics[metric.name] = metric
+
+
+def register_collector(name: str, metric_type: str, documentation: str, collect: Callable[[], Samples]) -> None:
+    """Report a metric family whose samples are read from collect() at scrape time"""
+    if name in _metrics:
+        raise ValueError(f"Metric {name} is already registered")
+    _collectors[name] = (metric_type, documentation, collect)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text format"""
+    lines: List[str] = []
+    for metric in list(_metrics.values()):
+        metric.render(lines)
+    for name, (metric_type, documentation, collect) in list(_collectors.items()):
+        try:
+            samples = collect()
+        except Exception:
+            continue
+        if not samples:
+            continue
+        _header(lines, name, metric_type, documentation)
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+# ----- text format -----
+
+def _header(lines: List[str], name: str, metric_type: str, documentation: str) -> None:
+    help_text = documentation.replace("\\", "\\\\").replace("\n", "\\n")
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
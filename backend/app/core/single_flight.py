@@ -0,0 +1,112 @@
+"""
+Single-flight request collapsing
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+After an admin save invalidates a cached result, the next burst of visitors
+all miss at once, and each would run the same queries and serialization.
+SingleFlight.do(key, fn, token) runs fn once per (key, token) at a time. The
+first caller starts it, and concurrent callers await the same result or
+exception. The call runs as a task of its own, so a caller that disconnects
+does not cancel it for the others.
+
+token identifies the data fn reads (app.db.coherence.database_token). A call
+that starts after a commit therefore never joins a run that may predate it.
+
+Stale-while-revalidate is optional (stale_seconds > 0). The last result per
+key is then kept with its token:
+* A call with the same token returns the kept result.
+* A call with a newer token gets the kept result at once, provided it is at
+  most stale_seconds old, while a single refresh runs in the background.
+
+Every instance is listed in ``flights``; stats() reports how many calls were
+collapsed.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# All instances by name, for the metrics endpoint
+flights: Dict[str, "SingleFlight"] = {}
+
+
+class _Result(NamedTuple):
+    token: Hashable
+    value: Any
+    stored_at: float
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls into one execution"""
+
+    def __init__(self, name: str, stale_seconds: float = 0) -> None:
+        self.name = name
+        self.stale_seconds = stale_seconds
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._results: Dict[Hashable, _Result] = {}
+        self.executions = 0
+        self.collapsed = 0
+        self.fresh_hits = 0
+        self.stale_served = 0
+        self.errors = 0
+        flights[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], token: Optional[Hashable] = None) -> Any:
+        """Result of fn() for key, shared with concurrent calls for the same token"""
+        if self.stale_seconds > 0:
+            kept = self._results.get(key)
+            if kept is not None:
+                if kept.token == token:
+                    self.fresh_hits += 1
+                    return kept.value
+                if time.monotonic() - kept.stored_at <= self.stale_seconds:
+                    self.stale_served += 1
+                    self._start(key, fn, token)
+                    return kept.value
+
+        task = self._inflight.get((key, token))
+        if task is None:
+            task = self._start(key, fn, token)
+        else:
+            self.collapsed += 1
+        # shield: cancelling this caller must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _start(self, key: Hashable, fn: Callable[[], Awaitable[Any]], token: Optional[Hashable]) -> asyncio.Future:
+        task = self._inflight.get((key, token))
+        if task is not None:
+            return task
+        self.executions += 1
+        task = asyncio.ensure_future(fn())
+        self._inflight[(key, token)] = task
+        task.add_done_callback(lambda done: self._finish(key, token, done))
+        return task
+
+    def _finish(self, key: Hashable, token: Optional[Hashable], task: asyncio.Future) -> None:
+        self._inflight.pop((key, token), None)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            self.errors += 1
+            logger.debug("%s: call for %r failed: %r", self.name, key, exc)
+            return
+        if self.stale_seconds > 0:
+            self._results[key] = _Result(token, task.result(), time.monotonic())
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "fresh_hits": self.fresh_hits,
+            "stale_served": self.stale_served,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+        }
@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import Pool
+from app.core import metrics
 from app.core.config import settings
 
 # Create database engine
@@ -16,10 +18,51 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def reset_engine() -> None:
+    """Dispose the engine and bind a fresh engine / SessionLocal to the same URL
+
+    Added on 2026-10-19: used when the database file was replaced (by
+    import_database in this or another worker); pooled connections would keep
+    reading the old file.
+    """
+    global engine, SessionLocal
+    url = engine.url
+    engine.dispose()
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False}
+    )
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+# Added on 2026-10-19, Reason: session / connection usage for /metrics
+DB_SESSIONS = metrics.Counter("db_sessions_total", "Database sessions opened for requests")
+DB_SESSIONS_OPEN = metrics.Gauge("db_sessions_open", "Database sessions currently open for requests")
+DB_CONNECTIONS_IN_USE = metrics.Gauge("db_connections_in_use", "Pooled database connections checked out")
+
+
+@event.listens_for(Pool, "checkout")
+def _connection_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_CONNECTIONS_IN_USE.inc()
+
+
+@event.listens_for(Pool, "checkin")
+def _connection_checkin(dbapi_connection, connection_record):
+    DB_CONNECTIONS_IN_USE.dec()
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
+    DB_SESSIONS.inc()
+    DB_SESSIONS_OPEN.inc()
     try:
         yield db
     finally:
         db.close()
+        DB_SESSIONS_OPEN.dec()
+
+
+# Added on 2026-10-19, Reason: statement timing hooks on every Engine
+# (per-request query counts, slow-query log); see app.db.query_stats
+from app.db import query_stats  # noqa: E402,F401
@@ -0,0 +1,191 @@
+"""
+Cross-worker cache coherence for the SQLite database
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+In-process caches (and the pooled engine after import_database replaces the
+database file) go stale as soon as another worker writes. Before handling a
+request, at most once every COHERENCE_CHECK_INTERVAL_MS, the watcher compares:
+
+* the database file identity (device, inode). A new inode means the file was
+  replaced, so the engine is reopened.
+* ``PRAGMA data_version`` on a dedicated read-only connection. It changes
+  whenever any other connection, in this process or another, commits to the
+  file.
+
+When either changed, every registered invalidator (cache clear functions) is
+called. Both checks are a stat() and a PRAGMA, a few microseconds.
+
+Results that are shared between workers or kept across requests are tagged
+with database_token() instead: the file identity plus the "file change
+counter" from the SQLite header (bytes 24-27). Every committed write
+transaction increments the counter in rollback-journal mode (the database
+does not use WAL), so the token is the same in every process for the same
+data. For databases without a file (tests), a per-process commit generation
+is used.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import app.db.base as db_base
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_invalidators: List[Callable[[], None]] = []
+
+
+def register_invalidator(callback: Callable[[], None]) -> None:
+    """Call callback whenever the database changed outside this process' view"""
+    if callback not in _invalidators:
+        _invalidators.append(callback)
+
+
+def invalidate_caches() -> None:
+    for callback in list(_invalidators):
+        try:
+            callback()
+        except Exception:
+            logger.exception("Cache invalidator %r failed", callback)
+
+
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+
+# Bumped after every commit that flushed changes; token for databases
+# without a file
+_local_generation = 0
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_dirty(session, flush_context):
+    session.info["database_token_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_generation(session):
+    global _local_generation
+    if session.info.pop("database_token_dirty", False):
+        _local_generation += 1
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_dirty(session, previous_transaction):
+    session.info.pop("database_token_dirty", None)
+
+
+def database_token(db: Session) -> str:
+    """Identifies the committed state of the database db is bound to"""
+    url = db.get_bind().url
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        try:
+            with open(os.path.abspath(url.database), "rb") as f:
+                st = os.fstat(f.fileno())
+                header = f.read(28)
+        except OSError:
+            header = b""
+        if header[:16] == _SQLITE_MAGIC and len(header) == 28:
+            change_counter = int.from_bytes(header[24:28], "big")
+            return f"{st.st_dev}:{st.st_ino}:{change_counter}"
+    return f"local:{os.getpid()}:{_local_generation}"
+
+
+def _database_path() -> Optional[str]:
+    url = db_base.engine.url
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return None
+    return os.path.abspath(url.database)
+
+
+def _file_identity(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+class CoherenceWatcher:
+    """Detects database changes made by other workers or a replaced DB file"""
+
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval = interval_seconds
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._path: Optional[str] = None
+        self._identity: Optional[Tuple[int, int]] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self.invalidations: Dict[str, int] = {"data_version": 0, "replaced": 0}
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _open(self, path: str) -> None:
+        """Read-only connection; mode=ro never creates a missing file"""
+        self._close()
+        self._path = path
+        self._identity = _file_identity(path)
+        if self._identity is None:
+            return
+        try:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            self._close()
+
+    def _reopen(self) -> None:
+        db_base.reset_engine()
+        path = _database_path()
+        if path is not None:
+            self._open(path)
+        self.invalidations["replaced"] += 1
+
+    def database_replaced(self) -> None:
+        """Reopen the engine and drop caches after this worker replaced the file"""
+        with self._lock:
+            self._reopen()
+        invalidate_caches()
+
+    def check(self, force: bool = False) -> bool:
+        """Invalidate caches if the database changed; True when it did"""
+        if self.interval < 0 and not force:
+            return False
+        now = time.monotonic()
+        if not force and now - self._last_check < self.interval:
+            return False
+        with self._lock:
+            self._last_check = now
+            path = _database_path()
+            if path is None:
+                return False
+            if path != self._path or self._conn is None:
+                # First check, engine pointed elsewhere, or the file did not exist yet
+                self._open(path)
+                return False
+
+            if _file_identity(path) != self._identity:
+                logger.info("Database file %s was replaced; reopening the engine", path)
+                self._reopen()
+                invalidate_caches()
+                return True
+
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._data_version:
+                self._data_version = version
+                self.invalidations["data_version"] += 1
+                invalidate_caches()
+                return True
+        return False
+
+
+watcher = CoherenceWatcher(settings.COHERENCE_CHECK_INTERVAL_MS / 1000)
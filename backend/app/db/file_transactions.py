@@ -0,0 +1,181 @@
+"""
+Transactional file operations tied to the database session
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Upload handlers change rows and files together. Doing the file I/O inline
+means a rollback leaves rows pointing at deleted files and leaks newly
+written ones. Instead, file operations are queued on the session and applied
+by SQLAlchemy session events:
+
+    after_commit          promote temp files into place, then hand deletes
+                          and derivative generation to the background worker
+    after_rollback /      discard the queue and remove temp files that were
+    after_transaction_end never promoted
+
+Promotion is an atomic rename done inside after_commit, so a committed row
+never points at a missing file. Deletes run on a single background thread.
+A delete is skipped if its path was promoted again after it was queued
+(same content re-uploaded), so it cannot remove a file that was just
+restored.
+"""
+
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending_file_ops"
+
+# Modified on 2026-10-19, Reason: bounded; was a promotion count per path
+# kept forever. path -> [promotions since a delete was queued, queued deletes];
+# an entry exists only while a delete of the path is queued
+_delete_guards: Dict[Path, List[int]] = {}
+_guards_lock = threading.Lock()
+
+_jobs: "queue.Queue[Callable[[], None]]" = queue.Queue()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def _pending(db: Session) -> dict:
+    return db.info.setdefault(_PENDING_KEY, {
+        "promote": [],          # (temp_path, final_path)
+        "delete": [],           # path
+        "rollback_delete": [],  # temp paths to remove if the transaction fails
+        "after_commit": [],     # callables for the background worker
+    })
+
+
+def is_pending_promotion(db: Session, final_path: Path) -> bool:
+    """True if final_path will be created when the current transaction commits"""
+    ops = db.info.get(_PENDING_KEY)
+    return bool(ops) and any(final == final_path for _, final in ops["promote"])
+
+
+def defer_promote(db: Session, temp_path: Path, final_path: Path, discard_on_rollback: bool = True) -> None:
+    """Move temp_path to final_path after commit; remove temp_path on rollback"""
+    ops = _pending(db)
+    ops["promote"].append((temp_path, final_path))
+    if discard_on_rollback:
+        ops["rollback_delete"].append(temp_path)
+
+
+def defer_delete(db: Session, path: Path) -> None:
+    """Delete path after commit; kept if the transaction rolls back"""
+    _pending(db)["delete"].append(path)
+
+
+def defer_discard(db: Session, temp_path: Path) -> None:
+    """Delete a temp file whatever the outcome of the transaction"""
+    ops = _pending(db)
+    ops["delete"].append(temp_path)
+    ops["rollback_delete"].append(temp_path)
+
+
+def defer_call(db: Session, func: Callable[[], None]) -> None:
+    """Run func on the background worker after commit"""
+    _pending(db)["after_commit"].append(func)
+
+
+def _ensure_worker() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name="file-ops", daemon=True)
+            _worker.start()
+
+
+def _run_worker() -> None:
+    while True:
+        job = _jobs.get()
+        try:
+            job()
+        except Exception:
+            logger.exception("Deferred file operation failed")
+        finally:
+            _jobs.task_done()
+
+
+def _submit(job: Callable[[], None]) -> None:
+    _ensure_worker()
+    _jobs.put(job)
+
+
+def wait_for_pending() -> None:
+    """Block until every queued file operation has run"""
+    _jobs.join()
+
+
+def _unlink(path: Path) -> None:
+    try:
+        path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning("Could not delete file %s: %s", path, e)
+
+
+def _guarded_unlink(path: Path, generation: int) -> Callable[[], None]:
+    def job() -> None:
+        with _guards_lock:
+            guard = _delete_guards[path]
+            promoted = guard[0] != generation
+            guard[1] -= 1
+            if not guard[1]:
+                del _delete_guards[path]
+        if not promoted:  # else promoted again since the delete was queued
+            _unlink(path)
+    return job
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(db: Session) -> None:
+    ops = db.info.pop(_PENDING_KEY, None)
+    if not ops:
+        return
+    for temp_path, final_path in ops["promote"]:
+        try:
+            final_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, final_path)
+        except OSError as e:
+            logger.error("Could not promote %s to %s: %s", temp_path, final_path, e)
+            continue
+        with _guards_lock:
+            guard = _delete_guards.get(final_path)
+            if guard:
+                guard[0] += 1
+    for path in ops["delete"]:
+        with _guards_lock:
+            guard = _delete_guards.setdefault(path, [0, 0])
+            guard[1] += 1
+            generation = guard[0]
+        _submit(_guarded_unlink(path, generation))
+    for func in ops["after_commit"]:
+        _submit(func)
+
+
+def _discard_pending(db: Session) -> None:
+    ops = db.info.pop(_PENDING_KEY, None)
+    if not ops:
+        return
+    for temp_path in ops["rollback_delete"]:
+        _submit(lambda path=temp_path: _unlink(path))
+
+
+@event.listens_for(Session, "after_rollback")
+def _apply_after_rollback(db: Session) -> None:
+    _discard_pending(db)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _apply_after_transaction_end(db: Session, transaction) -> None:
+    # Covers sessions closed without an explicit commit or rollback. after_commit
+    # has already consumed the queue on the commit path.
+    if transaction.parent is None:
+        _discard_pending(db)
@@ -0,0 +1,33 @@
+"""
+In-process schema migrations for database files other than the live one
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+boot.py migrates the live database before the server starts. An imported
+database arrives while the server is running and may predate later
+migrations, so it is upgraded to head here before it is swapped in.
+
+The alembic Config is built without alembic.ini: alembic/env.py runs
+logging.config.fileConfig() whenever a config file is set, which would
+reset the running server's loggers.
+"""
+
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+ALEMBIC_DIR = BACKEND_DIR / "alembic"
+
+
+def upgrade_database_file(db_path: Path) -> None:
+    """Upgrade the SQLite file at db_path to the head revision
+
+    Raises whatever alembic / SQLite raise when the file is not a SQLite
+    database or carries a revision this code base does not know.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{Path(db_path).resolve()}")
+    command.upgrade(config, "head")
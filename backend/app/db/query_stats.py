@@ -0,0 +1,115 @@
+"""
+Per-request SQL instrumentation
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+before/after_cursor_execute hooks time every statement. They are attached
+to the Engine class, so they also cover engines rebuilt by reset_engine()
+and the test engines. Each statement is:
+
+* added to the RequestQueries of the current request, if any. QueryStatsMiddleware
+  starts one per request in a context variable; run_in_threadpool and the
+  single-flight tasks copy the context, so statements run there are counted
+  too. The middleware reports the totals in a Server-Timing header and the
+  log.
+* logged to the "app.db.slow_queries" logger when it took SLOW_QUERY_MS or
+  longer.
+* counted in db_queries_total / db_query_seconds_total.
+
+A statement executed N_PLUS_ONE_THRESHOLD times or more within one request
+is reported as a likely N+1: a lazy relationship (e.g. Project.details)
+loaded once per parent row instead of with selectinload / joinedload.
+"""
+
+import logging
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import metrics
+from app.core.config import settings
+
+slow_query_logger = logging.getLogger("app.db.slow_queries")
+
+DB_QUERIES = metrics.Counter("db_queries_total", "SQL statements executed")
+DB_QUERY_SECONDS = metrics.Counter("db_query_seconds_total", "Time spent executing SQL statements")
+DB_SLOW_QUERIES = metrics.Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS")
+
+_STATEMENT_LOG_LENGTH = 300
+
+
+class RequestQueries:
+    """Statements executed while serving one request"""
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        # SQL text -> executions; lazy loads repeat the same text with other parameters
+        self.statements: Dict[str, int] = {}
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least threshold times, most repeated first"""
+        if threshold <= 0:
+            return []
+        found = [(statement, n) for statement, n in self.statements.items() if n >= threshold]
+        return sorted(found, key=lambda item: item[1], reverse=True)
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def begin() -> Tuple[RequestQueries, Token]:
+    """Start collecting the statements of the current request"""
+    queries = RequestQueries()
+    return queries, _current.set(queries)
+
+
+def end(token: Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestQueries]:
+    return _current.get()
+
+
+def shorten(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > _STATEMENT_LOG_LENGTH:
+        return statement[:_STATEMENT_LOG_LENGTH] + "..."
+    return statement
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.inc(elapsed)
+    queries = _current.get()
+    if queries is not None:
+        queries.record(statement, elapsed)
+    if 0 < settings.SLOW_QUERY_MS <= elapsed * 1000:
+        DB_SLOW_QUERIES.inc()
+        slow_query_logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, shorten(statement))
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute is not called for a failed statement
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
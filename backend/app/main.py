@@ -1,14 +1,38 @@
+"""
+FastAPI application factory
+Modified on 2026-10-19: import has no side effects; create_app() builds the
+app and the lifespan handler does directory checks, DB init and warm-up.
+"""
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import JSONResponse
+from sqlalchemy import text
+import asyncio
+import logging
 import os
+import time
 from pathlib import Path
-from app.core.config import settings
-from app.db.base import engine, SessionLocal
+from app.core.config import Settings, settings
+import app.db.base as db_base
 from app.db.init_db import init_db
+from app.api.upload_utils import ensure_upload_dir
+from app.services import image_derivatives, snapshots
+from app.db.coherence import database_token
+# Added on 2026-10-19, Reason: reject oversized bodies before multipart parsing
+from app.middleware import (
+    BodySizeLimitMiddleware,
+    UploadAdmissionMiddleware,
+    PriorityAdmissionMiddleware,
+    CoherenceMiddleware,
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+)
+from app.services.upload_reconciler import run_periodic_reconcile
 # 已修改於 2025-11-30，原因：新增所有履歷資料相關的 API 端點
 from app.api.endpoints import (
     auth,
@@ -24,84 +48,205 @@ from app.api.endpoints import (
 
 # 已新增於 2025-11-30，原因：新增匯入履歷資料相關的 API 端點
 from app.api.endpoints import import_data
+# Added on 2026-10-19, Reason: resumable chunked uploads for large attachments
+from app.api.endpoints import uploads
+# Added on 2026-10-19, Reason: attachment downloads via X-Accel-Redirect
+from app.api.endpoints import files
+# Added on 2026-10-19, Reason: whole public résumé from the shared mmap'd snapshot
+from app.api.endpoints import resume
+# Added on 2026-10-19, Reason: Prometheus metrics
+from app.api.endpoints import metrics
+
+logger = logging.getLogger(__name__)
+
 
 # Ensure database directory exists before creating tables - added on 2025-12-22
 # Reason: Prevent database creation errors when directory doesn't exist
-database_url = settings.DATABASE_URL
-if database_url.startswith("sqlite:///"):
-    database_path = database_url.replace("sqlite:///", "")
-    # Use relative path from backend directory to ensure consistency
-    # This works both in local development and container environment
-    if not os.path.isabs(database_path):
-        # Convert relative path to absolute path from current working directory
-        # This ensures database is created in the correct location regardless of where uvicorn is started
-        database_path = os.path.abspath(database_path)
-    Path(database_path).parent.mkdir(parents=True, exist_ok=True)
-
-# Initialize database
-db = SessionLocal()
-try:
-    init_db(db)
-finally:
-    db.close()
-
-# Create FastAPI app
-# 已修改於 2025-01-12，原因：增加請求體大小限制配置以支援大檔案上傳
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
-)
+# Modified on 2026-10-19, Reason: moved from import time into the lifespan handler
+def ensure_database_dir(app_settings: Settings) -> None:
+    database_url = app_settings.DATABASE_URL
+    if database_url.startswith("sqlite:///"):
+        database_path = database_url.replace("sqlite:///", "")
+        # Use relative path from backend directory to ensure consistency
+        # This works both in local development and container environment
+        if not os.path.isabs(database_path):
+            # Convert relative path to absolute path from current working directory
+            # This ensures database is created in the correct location regardless of where uvicorn is started
+            database_path = os.path.abspath(database_path)
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+
+
+def initialize_database() -> None:
+    """Create the admin user if needed and open the first pooled connection"""
+    # db_base.SessionLocal is looked up at call time; import_database replaces it
+    db = db_base.SessionLocal()
+    try:
+        init_db(db)
+        # Warm-up: the first request should not pay for connecting to SQLite
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+
+def warm_start_snapshots() -> int:
+    """Map the snapshot files that still match the database (see app.services.snapshots)"""
+    db = db_base.SessionLocal()
+    try:
+        return snapshots.warm_start(database_token(db))
+    finally:
+        db.close()
+
+
+def create_app(app_settings: Settings = settings) -> FastAPI:
+    """Build the FastAPI application
+
+    Importing this module only defines routes. Work that needs the database or
+    the filesystem runs in the lifespan handler, so the app can be imported by
+    tests and tools, and preloaded once before worker processes fork.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        started = time.perf_counter()
+        ensure_database_dir(app_settings)
+        ensure_upload_dir()
+        if app_settings.INIT_DB_ON_STARTUP:
+            # init_db may bcrypt-hash the admin password
+            await run_in_threadpool(initialize_database)
+
+        # Added on 2026-10-19, Reason: a new worker serves the payloads the
+        # previous one published instead of rebuilding them on first request
+        snapshots.configure(app_settings.SNAPSHOT_DIR)
+        if app_settings.SNAPSHOT_DIR:
+            loaded = await run_in_threadpool(warm_start_snapshots)
+            logger.info("Warm start: %d of %d snapshots still current", loaded, len(snapshots.stores))
+
+        # Added on 2026-10-19, Reason: periodic incremental reconcile of uploads/ against the DB
+        background_tasks = []
+        if app_settings.UPLOAD_RECONCILE_INTERVAL_SECONDS > 0:
+            background_tasks.append(
+                asyncio.create_task(run_periodic_reconcile(app_settings.UPLOAD_RECONCILE_INTERVAL_SECONDS))
+            )
+        logger.info("Startup completed in %.1f ms", (time.perf_counter() - started) * 1000)
+        try:
+            yield
+        finally:
+            for task in background_tasks:
+                task.cancel()
+            image_derivatives.shutdown()
+
+    # Create FastAPI app
+    # 已修改於 2025-01-12，原因：增加請求體大小限制配置以支援大檔案上傳
+    app = FastAPI(
+        title=app_settings.PROJECT_NAME,
+        version=app_settings.VERSION,
+        openapi_url=f"{app_settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan,
+    )
+
+    # 已新增於 2025-01-12，原因：處理大檔案上傳時的異常
+    @app.exception_handler(StarletteHTTPException)
+    async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+        """Handle HTTP exceptions"""
+        # Modified on 2026-10-19, Reason: keep exception headers (WWW-Authenticate, Upload-Offset)
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail},
+            headers=getattr(exc, "headers", None)
+        )
+
+    @app.exception_handler(RequestValidationError)
+    async def validation_exception_handler(request: Request, exc: RequestValidationError):
+        """Handle validation errors"""
+        return JSONResponse(
+            status_code=422,
+            content={"detail": exc.errors()}
+        )
+
+    # Added on 2026-10-19, Reason: drop local caches / reopen the engine after
+    # another worker changed or replaced the database
+    # Registered first (innermost) so rejected requests skip the check
+    if app_settings.COHERENCE_CHECK_INTERVAL_MS >= 0:
+        app.add_middleware(CoherenceMiddleware)
 
-# 已新增於 2025-01-12，原因：處理大檔案上傳時的異常
-@app.exception_handler(StarletteHTTPException)
-async def http_exception_handler(request: Request, exc: StarletteHTTPException):
-    """Handle HTTP exceptions"""
-    return JSONResponse(
-        status_code=exc.status_code,
-        content={"detail": exc.detail}
+    # Added on 2026-10-19, Reason: per-request query count / DB time in
+    # Server-Timing and the log, N+1 warnings
+    if app_settings.QUERY_STATS_ENABLED:
+        app.add_middleware(QueryStatsMiddleware, n_plus_one_threshold=app_settings.N_PLUS_ONE_THRESHOLD)
+
+    # Added on 2026-10-19, Reason: cap concurrent uploads and their in-flight bytes (429)
+    # Registered first so it runs inside the body size limiter
+    app.add_middleware(
+        UploadAdmissionMiddleware,
+        max_concurrent=app_settings.MAX_CONCURRENT_UPLOADS,
+        byte_budget=app_settings.UPLOAD_INFLIGHT_BYTE_BUDGET,
+        retry_after=app_settings.UPLOAD_RETRY_AFTER_SECONDS,
     )
 
-@app.exception_handler(RequestValidationError)
-async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    """Handle validation errors"""
-    return JSONResponse(
-        status_code=422,
-        content={"detail": exc.errors()}
+    # Added on 2026-10-19, Reason: abort oversized uploads with 413 before they are spooled
+    # Registered before CORS so the 413 responses still carry CORS headers
+    app.add_middleware(BodySizeLimitMiddleware)
+
+    # Added on 2026-10-19, Reason: per-class concurrency limits and queues; sheds
+    # uploads / exports before public reads (503 + Retry-After)
+    # Registered before CORS so the 503 responses still carry CORS headers
+    app.add_middleware(
+        PriorityAdmissionMiddleware,
+        limits=app_settings.ADMISSION_CONCURRENCY,
+        queue_depths=app_settings.ADMISSION_QUEUE_DEPTH,
+        queue_timeout=app_settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        retry_after=app_settings.ADMISSION_RETRY_AFTER_SECONDS,
     )
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.BACKEND_CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=app_settings.BACKEND_CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Added on 2026-10-19, Reason: request count / latency / size per route template
+    # Registered last (outermost) so latency includes the admission queue wait
+    if app_settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    # Include routers
+    # 已修改於 2025-11-30，原因：新增所有履歷資料相關的路由
+    api = app_settings.API_V1_STR
+    app.include_router(auth.router, prefix=f"{api}/auth", tags=["Authentication"])
+    app.include_router(personal_info.router, prefix=f"{api}/personal-info", tags=["Personal Info"])
+    app.include_router(work_experience.router, prefix=f"{api}/work-experience", tags=["Work Experience"])
+    app.include_router(projects.router, prefix=f"{api}/projects", tags=["Projects"])
+    app.include_router(education.router, prefix=f"{api}/education", tags=["Education"])
+    app.include_router(certifications.router, prefix=f"{api}/certifications", tags=["Certifications"])
+    app.include_router(languages.router, prefix=f"{api}/languages", tags=["Languages"])
+    app.include_router(publications.router, prefix=f"{api}/publications", tags=["Publications"])
+    app.include_router(github_projects.router, prefix=f"{api}/github-projects", tags=["GitHub Projects"])
+    # Added on 2026-10-19, Reason: whole public résumé from the shared mmap'd snapshot
+    app.include_router(resume.router, prefix=f"{api}/resume", tags=["Resume"])
+
+    # 已新增於 2025-11-30，原因：新增匯入履歷資料相關的路由
+    app.include_router(import_data.router, prefix=f"{api}/import", tags=["Import"])
+    # Added on 2026-10-19, Reason: resumable chunked uploads for large attachments
+    app.include_router(uploads.router, prefix=f"{api}/uploads", tags=["Uploads"])
+
+    # 新增靜態檔案服務 - added on 2025-12-22
+    # Reason: Serve uploaded files
+    # Replaced StaticFiles mount on 2026-10-19
+    # Reason: only serve referenced attachments, hand the transfer to nginx via
+    # X-Accel-Redirect, and send ETag / immutable caching / Range responses
+    # app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+    app.include_router(files.router, prefix="/uploads", tags=["Files"])
+
+    app.add_api_route("/", root, methods=["GET"])
+    app.add_api_route("/health", health_check, methods=["GET"])
+    if app_settings.METRICS_ENABLED:
+        app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
+    return app
+
 
-# Include routers
-# 已修改於 2025-11-30，原因：新增所有履歷資料相關的路由
-app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Authentication"])
-app.include_router(personal_info.router, prefix=f"{settings.API_V1_STR}/personal-info", tags=["Personal Info"])
-app.include_router(work_experience.router, prefix=f"{settings.API_V1_STR}/work-experience", tags=["Work Experience"])
-app.include_router(projects.router, prefix=f"{settings.API_V1_STR}/projects", tags=["Projects"])
-app.include_router(education.router, prefix=f"{settings.API_V1_STR}/education", tags=["Education"])
-app.include_router(certifications.router, prefix=f"{settings.API_V1_STR}/certifications", tags=["Certifications"])
-app.include_router(languages.router, prefix=f"{settings.API_V1_STR}/languages", tags=["Languages"])
-app.include_router(publications.router, prefix=f"{settings.API_V1_STR}/publications", tags=["Publications"])
-app.include_router(github_projects.router, prefix=f"{settings.API_V1_STR}/github-projects", tags=["GitHub Projects"])
-
-# 已新增於 2025-11-30，原因：新增匯入履歷資料相關的路由
-app.include_router(import_data.router, prefix=f"{settings.API_V1_STR}/import", tags=["Import"])
-
-# 新增靜態檔案服務 - added on 2025-12-22
-# Reason: Serve uploaded files
-UPLOAD_DIR = Path("uploads")  # Use relative path for Docker container
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
-
-
-@app.get("/")
 async def root():
     """Root endpoint"""
     return {
@@ -111,7 +256,10 @@ async def root():
     }
 
 
-@app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+
+# ASGI entry point for `uvicorn app.main:app`
+app = create_app()
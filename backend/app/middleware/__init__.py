@@ -0,0 +1,16 @@
+# Added on 2026-10-19, Reason: ASGI middleware package
+from app.middleware.body_limit import BodySizeLimitMiddleware
+from app.middleware.upload_gate import UploadAdmissionMiddleware
+from app.middleware.priority import PriorityAdmissionMiddleware
+from app.middleware.coherence import CoherenceMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+
+__all__ = [
+    "BodySizeLimitMiddleware",
+    "UploadAdmissionMiddleware",
+    "PriorityAdmissionMiddleware",
+    "CoherenceMiddleware",
+    "MetricsMiddleware",
+    "QueryStatsMiddleware",
+]
@@ -0,0 +1,122 @@
+"""
+Request body size limiter (pure ASGI middleware)
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Rejects oversized request bodies with 413 before Starlette's multipart parser
+spools them to disk. The declared Content-Length is checked first; bodies
+without one (chunked transfer) are counted as they stream in and aborted as
+soon as the limit for their route class is crossed.
+"""
+
+from typing import Optional
+
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.upload_utils import MAX_FILE_SIZE
+from app.api.endpoints.import_data import MAX_DB_FILE_SIZE
+from app.api.endpoints.uploads import MAX_CHUNK_SIZE
+from app.core.config import settings
+
+# Allowance for multipart boundaries, part headers and the form fields that
+# accompany the file in the upload endpoints
+MULTIPART_OVERHEAD = 1 * 1024 * 1024  # 1MB
+
+# Route classes and their body limits (bytes)
+ROUTE_CLASS_LIMITS = {
+    "attachment": MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+    "db_import": MAX_DB_FILE_SIZE + MULTIPART_OVERHEAD,
+    "upload_chunk": MAX_CHUNK_SIZE,
+    "json": 1 * 1024 * 1024,  # 1MB
+}
+
+DB_IMPORT_PATH = f"{settings.API_V1_STR}/import/database/import"
+UPLOAD_SESSIONS_PATH = f"{settings.API_V1_STR}/uploads/sessions/"
+
+
+def classify_request(scope: Scope) -> str:
+    """Return the route class used to pick a body limit for this request."""
+    if scope["path"].rstrip("/") == DB_IMPORT_PATH:
+        return "db_import"
+    if scope.get("method") == "PUT" and scope["path"].startswith(UPLOAD_SESSIONS_PATH):
+        return "upload_chunk"
+    for name, value in scope.get("headers", []):
+        if name == b"content-type":
+            if value.lower().startswith(b"multipart/form-data"):
+                return "attachment"
+            break
+    return "json"
+
+
+def content_length(scope: Scope) -> Optional[int]:
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body exceeds maximum allowed size of {limit / (1024 * 1024):.0f}MB"
+    )
+
+
+class BodySizeLimitMiddleware:
+    """Enforce per-route-class request body limits with 413 responses."""
+
+    def __init__(self, app: ASGIApp, limits: Optional[dict] = None) -> None:
+        self.app = app
+        self.limits = limits or ROUTE_CLASS_LIMITS
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits[classify_request(scope)]
+        declared = content_length(scope)
+        if declared is not None and declared > limit:
+            await self._reject(limit, scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside the handler's body parsing, so FastAPI's
+                    # exception handling turns it into a 413 response
+                    raise _too_large(limit)
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as exc:
+            if exc.status_code != status.HTTP_413_REQUEST_ENTITY_TOO_LARGE or response_started:
+                raise
+            await self._reject(limit, scope, receive, send)
+
+    async def _reject(self, limit: int, scope: Scope, receive: Receive, send: Send) -> None:
+        exc = _too_large(limit)
+        response = JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail},
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,27 @@
+"""
+Database coherence check (pure ASGI middleware)
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Runs app.db.coherence.watcher.check() before each HTTP request so caches of
+this worker are dropped, and the engine reopened, after another worker
+changed or replaced the database. The check itself is rate-limited by
+COHERENCE_CHECK_INTERVAL_MS.
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.db import coherence
+
+
+class CoherenceMiddleware:
+    """Check the database for outside changes before serving a request."""
+
+    def __init__(self, app: ASGIApp, watcher: coherence.CoherenceWatcher = None) -> None:
+        self.app = app
+        self.watcher = watcher if watcher is not None else coherence.watcher
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            self.watcher.check()
+        await self.app(scope, receive, send)
@@ -0,0 +1,95 @@
+"""
+Request metrics (pure ASGI middleware)
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Records, for every HTTP request: count by status, latency and response size
+histograms, the number of requests in flight, and the body bytes received by
+upload routes. Requests are labelled with the route template the router
+matched (e.g. /api/projects/{project_id}), never the raw path, so the label
+set stays bounded. Requests answered before routing (413 / 429 / 503 from
+the admission middlewares) and unknown paths are labelled "unrouted".
+Methods outside STANDARD_METHODS are labelled "OTHER" for the same reason:
+any client can send an unrouted request with a made-up method.
+
+Registered outermost, so latency includes the time spent queued for
+admission.
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.middleware.body_limit import classify_request
+from app.middleware.upload_gate import GATED_ROUTE_CLASSES
+
+UNROUTED = "unrouted"
+STANDARD_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+OTHER_METHOD = "OTHER"
+
+REQUESTS = metrics.Counter(
+    "http_requests_total", "HTTP requests by method, route template and status",
+    ("method", "route", "status"),
+)
+LATENCY = metrics.Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route template",
+    ("method", "route"), buckets=metrics.LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = metrics.Histogram(
+    "http_response_size_bytes", "HTTP response body size by method and route template",
+    ("method", "route"), buckets=metrics.SIZE_BUCKETS,
+)
+IN_FLIGHT = metrics.Gauge("http_requests_in_flight", "HTTP requests currently being served")
+UPLOAD_BYTES = metrics.Counter(
+    "http_upload_bytes_total", "Request body bytes received by upload routes", ("route_class",),
+)
+
+
+class MetricsMiddleware:
+    """Record request count, latency, size and in-flight metrics per route template."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        route_class = classify_request(scope)
+        if route_class in GATED_ROUTE_CLASSES:
+            uploaded = UPLOAD_BYTES.labels(route_class)
+
+            async def receive_wrapper() -> Message:
+                message = await receive()
+                if message["type"] == "http.request":
+                    uploaded.inc(len(message.get("body", b"")))
+                return message
+        else:
+            receive_wrapper = receive
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNROUTED
+            method = scope["method"] if scope["method"] in STANDARD_METHODS else OTHER_METHOD
+            REQUESTS.labels(method, template, status_code).inc()
+            LATENCY.labels(method, template).observe(time.perf_counter() - started)
+            RESPONSE_SIZE.labels(method, template).observe(size)
@@ -0,0 +1,178 @@
+"""
+Priority admission control and load shedding (pure ASGI middleware)
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+uvicorn's --limit-concurrency treats every request alike and rejects whatever
+arrives last, so a DB import or a few large uploads could push out public
+résumé views. This middleware sorts requests into classes, highest priority
+first:
+
+    public_read  GET / HEAD / OPTIONS
+    admin_write  other writes
+    bulk         attachment uploads, upload chunks, DB import
+    export       database export
+
+Each class has its own concurrency limit and a FIFO queue of bounded depth.
+A request whose class is full waits in the queue, for at most
+ADMISSION_QUEUE_TIMEOUT_SECONDS. When the queue is also full, or the wait
+times out, the request gets 503 with Retry-After. Lower-priority work is shed
+first: while any higher-priority class has requests queued, new requests of
+a lower class are rejected at once, even if their own class has free slots.
+Counters are per process; the app runs one worker.
+"""
+
+import asyncio
+import weakref
+from collections import deque
+from typing import Dict, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.middleware.body_limit import classify_request
+from app.middleware.upload_gate import GATED_ROUTE_CLASSES
+
+# Highest priority first
+PRIORITY_CLASSES = ("public_read", "admin_write", "bulk", "export")
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Never queued or shed (load balancer / container health checks, scrapes)
+EXEMPT_PATHS = {"/health", "/metrics"}
+
+# The instance serving requests, for the metrics endpoint
+_current: Optional[weakref.ref] = None
+
+
+def classify_priority(scope: Scope) -> str:
+    """Admission class of a request (see PRIORITY_CLASSES)"""
+    path = scope.get("path", "")
+    if path.startswith(f"{settings.API_V1_STR}/import/database/export"):
+        return "export"
+    if scope.get("method") in READ_METHODS:
+        return "public_read"
+    if classify_request(scope) in GATED_ROUTE_CLASSES:
+        return "bulk"
+    return "admin_write"
+
+
+class _ClassGate:
+    """Concurrency slots and a FIFO wait queue for one admission class"""
+
+    def __init__(self, limit: int, queue_depth: int) -> None:
+        self.limit = limit
+        self.queue_depth = queue_depth
+        self.active = 0
+        self.waiters: deque = deque()
+        self.admitted = 0
+        self.shed = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self.waiters)
+
+    def try_acquire(self) -> bool:
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return True
+        return False
+
+    async def wait(self, timeout: float) -> bool:
+        """Queue for a slot; True once one is handed over, False on timeout"""
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return False
+        except BaseException:
+            # Cancelled (client went away): give back a slot handed over meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+        return True
+
+    def release(self) -> None:
+        # Hand the slot straight to the next waiter so it cannot be overtaken
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class PriorityAdmissionMiddleware:
+    """Per-class concurrency limits and queues; sheds low-priority work first."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: Optional[Dict[str, int]] = None,
+        queue_depths: Optional[Dict[str, int]] = None,
+        queue_timeout: float = None,
+        retry_after: int = None,
+    ) -> None:
+        self.app = app
+        limits = limits if limits is not None else settings.ADMISSION_CONCURRENCY
+        queue_depths = queue_depths if queue_depths is not None else settings.ADMISSION_QUEUE_DEPTH
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+        self.retry_after = retry_after if retry_after is not None else settings.ADMISSION_RETRY_AFTER_SECONDS
+        self.gates = {
+            name: _ClassGate(limits[name], queue_depths.get(name, 0)) for name in PRIORITY_CLASSES
+        }
+        global _current
+        _current = weakref.ref(self)
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            name: {"active": gate.active, "queued": gate.queued, "admitted": gate.admitted, "shed": gate.shed}
+            for name, gate in self.gates.items()
+        }
+
+    @staticmethod
+    def current() -> Optional["PriorityAdmissionMiddleware"]:
+        """The most recently built instance (the one in the app's middleware stack)"""
+        return _current() if _current is not None else None
+
+    def _higher_priority_queued(self, name: str) -> bool:
+        for other in PRIORITY_CLASSES:
+            if other == name:
+                return False
+            if self.gates[other].waiters:
+                return True
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("path") in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        name = classify_priority(scope)
+        gate = self.gates[name]
+        # A backed-up higher class means the worker is saturated: shed this
+        # one even if its own class has free slots
+        if self._higher_priority_queued(name) or not (
+            gate.try_acquire()
+            or (gate.queued < gate.queue_depth and await gate.wait(self.queue_timeout))
+        ):
+            gate.shed += 1
+            await self._reject(scope, receive, send)
+            return
+
+        gate.admitted += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, please retry later"},
+            headers={"Retry-After": str(self.retry_after)},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,83 @@
+"""
+Per-request SQL statistics (pure ASGI middleware)
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Collects the statements executed while serving each request
+(app.db.query_stats) and reports them:
+
+* as a Server-Timing header, shown by the browser's network panel, e.g.
+  ``Server-Timing: db;dur=3.2;desc="4 queries"``
+* in the log: one line per request that ran queries, and a warning with the
+  statement when it was repeated N_PLUS_ONE_THRESHOLD times or more (likely
+  N+1)
+* as the db_queries_per_request histogram and db_n_plus_one_total counter,
+  labelled with the route template.
+"""
+
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.db import query_stats
+
+logger = logging.getLogger(__name__)
+
+QUERIES_PER_REQUEST = metrics.Histogram(
+    "db_queries_per_request", "SQL statements executed per request by route template",
+    ("route",), buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+N_PLUS_ONE = metrics.Counter(
+    "db_n_plus_one_total", "Requests that repeated one SQL statement N_PLUS_ONE_THRESHOLD times or more",
+    ("route",),
+)
+
+
+class QueryStatsMiddleware:
+    """Count and time the SQL statements of each request."""
+
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 5) -> None:
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries, token = query_stats.begin()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and queries.count:
+                noun = "query" if queries.count == 1 else "queries"
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} {noun}"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.end(token)
+            self._report(scope, queries)
+
+    def _report(self, scope: Scope, queries: query_stats.RequestQueries) -> None:
+        route = getattr(scope.get("route"), "path", None) or "unrouted"
+        QUERIES_PER_REQUEST.labels(route).observe(queries.count)
+        if not queries.count:
+            return
+        logger.info(
+            "%s %s: %d queries in %.1f ms", scope["method"], route, queries.count, queries.duration * 1000
+        )
+        repeated = queries.repeated(self.n_plus_one_threshold)
+        if repeated:
+            N_PLUS_ONE.labels(route).inc()
+            for statement, count in repeated:
+                logger.warning(
+                    "Likely N+1 in %s %s: statement executed %d times: %s",
+                    scope["method"], route, count, query_stats.shorten(statement),
+                )
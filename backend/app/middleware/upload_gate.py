@@ -0,0 +1,71 @@
+"""
+Upload admission gate (pure ASGI middleware)
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Caps how many uploads run at once and how many bytes they may have in flight
+in total, so a handful of concurrent 100MB uploads cannot push the 512MB
+container into OOM. Requests over either limit get an immediate 429 with
+Retry-After instead of queueing.
+
+Each upload reserves its declared Content-Length, or the route-class body
+limit when the length is unknown (chunked transfer), and releases it when the
+response finishes. The counters are per process; the app runs one worker.
+"""
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.middleware.body_limit import ROUTE_CLASS_LIMITS, classify_request, content_length
+
+# Route classes (see body_limit.classify_request) that go through the gate
+GATED_ROUTE_CLASSES = {"attachment", "db_import", "upload_chunk"}
+
+
+class UploadAdmissionMiddleware:
+    """Admit at most max_concurrent uploads within a shared byte budget."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrent: int = None,
+        byte_budget: int = None,
+        retry_after: int = None,
+    ) -> None:
+        self.app = app
+        self.max_concurrent = max_concurrent if max_concurrent is not None else settings.MAX_CONCURRENT_UPLOADS
+        self.byte_budget = byte_budget if byte_budget is not None else settings.UPLOAD_INFLIGHT_BYTE_BUDGET
+        self.retry_after = retry_after if retry_after is not None else settings.UPLOAD_RETRY_AFTER_SECONDS
+        self.active = 0
+        self.reserved_bytes = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+        route_class = classify_request(scope)
+        if route_class not in GATED_ROUTE_CLASSES:
+            await self.app(scope, receive, send)
+            return
+
+        declared = content_length(scope)
+        reservation = declared if declared is not None else ROUTE_CLASS_LIMITS[route_class]
+        # No await between the check and the reservation, so this is atomic
+        # on the event loop
+        if self.active >= self.max_concurrent or self.reserved_bytes + reservation > self.byte_budget:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many uploads in progress, please retry later"},
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.active += 1
+        self.reserved_bytes += reservation
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.active -= 1
+            self.reserved_bytes -= reservation
@@ -6,6 +6,8 @@ from app.models.project import Project, ProjectDetail, ProjectAttachment
 from app.models.education import Education
 from app.models.certification import Certification, Language
 from app.models.publication import Publication, GithubProject
+# Added on 2026-10-19: content-addressed upload storage
+from app.models.stored_file import StoredFile
 
 __all__ = [
     "User",
@@ -19,4 +21,5 @@ __all__ = [
     "Language",
     "Publication",
     "GithubProject",
+    "StoredFile",  # Added on 2026-10-19
 ]
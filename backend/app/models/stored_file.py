@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class StoredFile(Base):
+    """Content-addressed upload blob - 依內容雜湊儲存的上傳檔案
+
+    One row per distinct file content under uploads/. ref_count tracks how many
+    WorkExperience, Project and ProjectAttachment rows point at the blob; the
+    file is removed from disk when it drops to zero.
+    Added on 2026-10-19
+    """
+    __tablename__ = "stored_files"
+
+    sha256 = Column(String(64), primary_key=True)
+    storage_key = Column(String(255), nullable=False)  # ab/cd/<sha256>.<ext>, relative to uploads/
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
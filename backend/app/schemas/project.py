@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import date, datetime
+from app.schemas.upload import AttachmentVariantsMixin
 
 
 # ===== ProjectAttachment Schemas =====
@@ -37,6 +38,12 @@ class ProjectAttachmentInDB(ProjectAttachmentBase):
         from_attributes = True
 
 
+# Added on 2026-10-19: bulk delete / reorder of a detail's attachments
+class ProjectAttachmentIds(BaseModel):
+    """List of project attachment ids (bulk delete, or the new display order)"""
+    ids: List[int]
+
+
 # ===== ProjectDetail Schemas =====
 
 class ProjectDetailBase(BaseModel):
@@ -56,6 +63,14 @@ class ProjectDetailUpdate(ProjectDetailBase):
     attachments: Optional[List[ProjectAttachmentCreate]] = None
 
 
+# Added on 2026-10-19: one entry of the ordered list sent to PUT /projects/{id}/details
+class ProjectDetailSyncItem(BaseModel):
+    """Project detail in a full-list sync; id is None for a new detail"""
+    id: Optional[int] = None
+    description_zh: Optional[str] = None  # HTML format supported
+    description_en: Optional[str] = None  # HTML format supported
+
+
 class ProjectDetailInDB(ProjectDetailBase):
     """Project detail database schema"""
     id: int
@@ -103,7 +118,7 @@ class ProjectUpdate(ProjectBase):
     details: Optional[List[ProjectDetailCreate]] = None
 
 
-class ProjectInDB(ProjectBase):
+class ProjectInDB(ProjectBase, AttachmentVariantsMixin):
     """Project database schema"""
     id: int
     work_experience_id: Optional[int] = None
@@ -116,7 +131,7 @@ class ProjectInDB(ProjectBase):
 
 
 # 已新增於 2025-11-30，原因：為 API 端點添加回應 schema
-class ProjectResponse(ProjectBase):
+class ProjectResponse(ProjectBase, AttachmentVariantsMixin):
     """Project response schema"""
     id: int
     work_experience_id: Optional[int] = None
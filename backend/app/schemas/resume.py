@@ -0,0 +1,24 @@
+"""
+Public résumé aggregate schema
+Author: Polo (林鴻全)
+Date: 2026-10-19
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.schemas.personal_info import PersonalInfoInDB
+from app.schemas.work_experience import WorkExperienceWithProjects
+from app.schemas.education import EducationResponse
+from app.schemas.certification import CertificationResponse, LanguageResponse
+from app.schemas.publication import PublicationResponse, GithubProjectResponse
+
+
+class ResumeSnapshot(BaseModel):
+    """Everything the public résumé page shows, in one document"""
+    personal_info: Optional[PersonalInfoInDB] = None
+    work_experience: List[WorkExperienceWithProjects] = Field(default_factory=list)
+    education: List[EducationResponse] = Field(default_factory=list)
+    certifications: List[CertificationResponse] = Field(default_factory=list)
+    languages: List[LanguageResponse] = Field(default_factory=list)
+    publications: List[PublicationResponse] = Field(default_factory=list)
+    github_projects: List[GithubProjectResponse] = Field(default_factory=list)
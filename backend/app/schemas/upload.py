@@ -0,0 +1,59 @@
+from pydantic import BaseModel, Field, computed_field
+from typing import Dict, Literal, Optional
+
+from app.services.image_derivatives import variant_urls
+
+
+# ===== Attachment derivative fields =====
+# Added on 2026-10-19: thumbnail / WebP variants next to attachment_url
+
+class AttachmentVariantsMixin(BaseModel):
+    """Adds derivative URLs computed from attachment_url to response schemas"""
+    attachment_url: Optional[str] = None
+
+    @computed_field
+    @property
+    def attachment_variants(self) -> Optional[Dict[str, str]]:
+        """WebP renditions by variant name (thumb, medium, large); None for non-images"""
+        return variant_urls(self.attachment_url)
+
+    @computed_field
+    @property
+    def attachment_preview_url(self) -> Optional[str]:
+        """Smallest adequate URL for an inline preview"""
+        variants = self.attachment_variants
+        return variants["thumb"] if variants else self.attachment_url
+
+
+# ===== Resumable upload session schemas =====
+# Added on 2026-10-19: chunked, resumable attachment uploads
+
+class UploadSessionCreate(BaseModel):
+    """Start a resumable upload of a single file"""
+    filename: str
+    size: int = Field(..., gt=0)
+    content_type: Optional[str] = None
+
+
+class UploadSessionStatus(BaseModel):
+    """Current state of an upload session; offset is the next byte expected"""
+    upload_id: str
+    filename: str
+    size: int
+    offset: int
+
+
+class UploadSessionFinalize(BaseModel):
+    """Attach the completed upload to a work experience or project"""
+    target: Literal["work_experience", "project"]
+    target_id: int
+
+
+class UploadFinalizeResponse(BaseModel):
+    """Attachment fields written to the target record"""
+    target: str
+    target_id: int
+    attachment_name: str
+    attachment_size: int
+    attachment_type: Optional[str] = None
+    attachment_url: str
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import date, datetime
+from app.schemas.upload import AttachmentVariantsMixin
 
 
 class WorkExperienceBase(BaseModel):
@@ -38,7 +39,7 @@ class WorkExperienceUpdate(WorkExperienceBase):
 
 # Modified on 2025-11-30: Separated WorkExperienceInDB without projects field first
 # Reason: Avoid circular import, will use update_forward_refs after all schemas are loaded
-class WorkExperienceInDB(WorkExperienceBase):
+class WorkExperienceInDB(WorkExperienceBase, AttachmentVariantsMixin):
     """Work experience database schema"""
     id: int
     created_at: datetime
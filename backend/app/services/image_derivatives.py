@@ -0,0 +1,189 @@
+"""
+Image derivative service
+Author: Polo (林鴻全)
+Date: 2026-10-19
+Purpose: 為 JPG/PNG 附件產生縮圖與 WebP 版本，於背景 process pool 執行，不佔用請求
+
+Derivatives are cached on disk by content hash:
+
+    uploads/derived/<sha[:2]>/<sha256>/<variant>.webp
+
+so identical uploads share them and URLs can be computed without touching
+disk. Every variant is re-encoded from pixels only, which strips EXIF (GPS,
+camera serials) after applying the EXIF orientation.
+
+Renders are only scheduled when an image is stored, never by a download.
+A hash is rendered at most once at a time, and a render that failed leaves
+a .failed marker in its derived directory so it is not retried.
+
+This module is imported by the spawned worker processes, so it must not
+import the app (settings, database) at module level.
+"""
+
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+DERIVED_DIR_NAME = "derived"
+
+# Variant name -> longest edge in pixels, smallest first
+DERIVATIVE_VARIANTS = {
+    "thumb": 320,
+    "medium": 1024,
+    "large": 2048,
+}
+WEBP_QUALITY = 80
+# Refuse to decode images larger than this (decompression bomb guard)
+# Modified on 2026-10-19, Reason: was 50M; a 16M-pixel RGBA buffer is 64MB,
+# which the worker can hold next to the API process in the 512MB container
+MAX_IMAGE_PIXELS = 16_000_000
+FAILED_MARKER = ".failed"
+
+# One worker keeps the pool's footprint small on the 512MB container
+DERIVATIVE_WORKERS = 1
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Hashes queued or rendering in this process
+_pending: Set[str] = set()
+_pending_lock = threading.Lock()
+
+
+def derived_key(sha256: str, variant: str) -> str:
+    """Storage key of a derivative, relative to uploads/"""
+    return f"{DERIVED_DIR_NAME}/{sha256[:2]}/{sha256}/{variant}.webp"
+
+
+def derived_dir(upload_dir: Path, sha256: str) -> Path:
+    return upload_dir / DERIVED_DIR_NAME / sha256[:2] / sha256
+
+
+def is_image_key(storage_key: Optional[str]) -> bool:
+    return bool(storage_key) and os.path.splitext(storage_key)[1].lower() in IMAGE_EXTENSIONS
+
+
+def variant_urls(attachment_url: Optional[str]) -> Optional[Dict[str, str]]:
+    """Derivative URLs for an attachment, or None if it is not a stored image
+
+    Only content-addressed attachments (/uploads/ab/cd/<sha256>.<ext>) have
+    derivatives; the URLs are computed from the hash without any disk access.
+    """
+    if not attachment_url or not is_image_key(attachment_url):
+        return None
+    sha256 = Path(attachment_url).stem
+    if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+        return None
+    return {variant: f"/uploads/{derived_key(sha256, variant)}" for variant in DERIVATIVE_VARIANTS}
+
+
+def render_derivatives(source_path: str, output_dir: str) -> list:
+    """Write every derivative of source_path into output_dir (runs in a worker process)"""
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    # Modified on 2026-10-19, Reason: at most one full-resolution buffer
+    # alive; previously every variant copied the full-size converted image
+    largest_first = sorted(DERIVATIVE_VARIANTS.items(), key=lambda item: item[1], reverse=True)
+    largest = largest_first[0][1]
+    written = []
+    with Image.open(source_path) as original:
+        width, height = original.size
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ValueError(f"Image has {width * height} pixels, limit is {MAX_IMAGE_PIXELS}")
+        image = original
+        if image.format == "JPEG":
+            # Decode at 1/2 .. 1/8 scale when the image is that much larger
+            # (the same reducing gap thumbnail() uses)
+            image.draft(None, (2 * largest, 2 * largest))
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        mode = "RGBA" if has_alpha else "RGB"
+        if image.mode != mode:
+            image = image.convert(mode)  # keeps info["exif"] for exif_transpose
+        image.thumbnail((largest, largest), Image.LANCZOS)
+        image = ImageOps.exif_transpose(image)
+        # Each smaller variant is scaled down from the previous one
+        for variant, max_edge in largest_first:
+            image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            target = output / f"{variant}.webp"
+            temp = output / f".{variant}.webp.tmp"
+            # No exif= argument: the rendition carries pixel data only
+            image.save(temp, "WEBP", quality=WEBP_QUALITY, method=4)
+            os.replace(temp, target)
+            written.append(str(target))
+    return written
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a threaded uvicorn worker is unsafe
+        _executor = ProcessPoolExecutor(max_workers=DERIVATIVE_WORKERS, mp_context=get_context("spawn"))
+    return _executor
+
+
+def _render_done(sha256: str, output_dir: Path, future: Future) -> None:
+    global _executor
+    with _pending_lock:
+        _pending.discard(sha256)
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc is None:
+        return
+    logger.warning("Image derivative generation failed for %s: %s", sha256, exc)
+    if isinstance(exc, BrokenProcessPool):
+        # The worker died (e.g. out of memory); the next render needs a new pool
+        _executor = None
+    try:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        (output_dir / FAILED_MARKER).touch()
+    except OSError as e:
+        logger.warning("Could not mark derivative failure for %s: %s", sha256, e)
+
+
+# Modified on 2026-10-19, Reason: one render per hash at a time, failures
+# are not retried; previously any download of a missing variant queued one
+def schedule_derivatives(source_path: Path, upload_dir: Path, sha256: str) -> Optional[Future]:
+    """Queue derivative generation for a stored image; returns immediately
+
+    Does nothing when the derivatives exist, a render of the same hash is
+    pending, or an earlier render failed.
+    """
+    if not is_image_key(source_path.name):
+        return None
+    output_dir = derived_dir(upload_dir, sha256)
+    if (output_dir / f"{next(iter(DERIVATIVE_VARIANTS))}.webp").exists() or (output_dir / FAILED_MARKER).exists():
+        return None
+    with _pending_lock:
+        if sha256 in _pending:
+            return None
+        _pending.add(sha256)
+    try:
+        future = _get_executor().submit(render_derivatives, str(source_path), str(output_dir))
+    except Exception:
+        with _pending_lock:
+            _pending.discard(sha256)
+        raise
+    future.add_done_callback(lambda done: _render_done(sha256, output_dir, done))
+    return future
+
+
+def delete_derivatives(upload_dir: Path, sha256: str) -> None:
+    shutil.rmtree(derived_dir(upload_dir, sha256), ignore_errors=True)
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,47 @@
+"""
+Public résumé snapshot
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+GET /api/resume returns the whole public résumé as one JSON document. It is
+built here once per database change and published through
+app.services.snapshots as "resume", so all workers serve the same mmap'd
+file.
+"""
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.certification import Certification, Language
+from app.models.education import Education
+from app.models.personal_info import PersonalInfo
+from app.models.project import Project, ProjectDetail
+from app.models.publication import GithubProject, Publication
+from app.models.work_experience import WorkExperience
+from app.schemas.resume import ResumeSnapshot
+from app.services import snapshots
+
+store = snapshots.store_for("resume")
+
+
+def build_resume_json(db: Session) -> bytes:
+    """Serialize the public résumé (same fields as the individual GET endpoints)"""
+    experiences = (
+        db.query(WorkExperience)
+        .options(
+            joinedload(WorkExperience.projects)
+            .joinedload(Project.details)
+            .selectinload(ProjectDetail.attachments)
+        )
+        .order_by(WorkExperience.display_order)
+        .all()
+    )
+    resume = ResumeSnapshot.model_validate({
+        "personal_info": db.query(PersonalInfo).first(),
+        "work_experience": experiences,
+        "education": db.query(Education).order_by(Education.display_order).all(),
+        "certifications": db.query(Certification).order_by(Certification.display_order).all(),
+        "languages": db.query(Language).order_by(Language.display_order).all(),
+        "publications": db.query(Publication).order_by(Publication.display_order).all(),
+        "github_projects": db.query(GithubProject).order_by(GithubProject.display_order).all(),
+    }, from_attributes=True)
+    return resume.model_dump_json().encode()
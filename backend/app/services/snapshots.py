@@ -0,0 +1,226 @@
+"""
+Persistent payload snapshots shared by all workers through mmap'd files
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Public payloads (the whole résumé, the CRUD lists) are serialized once per
+database change. Each one is written to ``SNAPSHOT_DIR/<name>.snap`` together
+with a gzip variant. Every worker maps that file read-only and sends a
+memoryview of the mapping as the response body. The bytes live once in the
+page cache, however many workers serve them, and no worker's heap holds a
+copy. The files outlive the workers. A new worker (after a recycle or a
+restart) maps the files that still match the database in its lifespan
+startup (warm_start), so its first visitors do not wait for a rebuild.
+
+File layout: a fixed header, the JSON body, then the gzip'd body::
+
+    magic     8s   b"RXSNAP02"
+    version   u64  incremented by each rebuild
+    length    u64  body length in bytes
+    gzip_len  u64  gzip variant length in bytes
+    token     64s  database state the body was built from
+    sha256    64s  hex digest of the body, also used as the ETag
+
+A new snapshot is written to a temporary file in the same directory and
+renamed over the old one with os.replace(), so a reader maps either the old
+or the new file, never a partial one. Mappings of replaced files stay valid
+until their last response is sent; they are released when garbage collected.
+
+The token is app.db.coherence.database_token(). It is the same for all
+processes, so a worker rebuilds only when no other worker has already
+published a snapshot for the current database state.
+"""
+
+import contextlib
+import gzip
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RXSNAP02"
+_HEADER = struct.Struct("<8sQQQ64s64s")
+HEADER_SIZE = _HEADER.size
+GZIP_LEVEL = 6
+
+
+class Snapshot:
+    """One published snapshot; body and gzip are read-only views into the mapped file"""
+
+    __slots__ = ("version", "token", "digest", "body", "gzip", "identity")
+
+    def __init__(self, version: int, token: str, digest: str, body: memoryview, gzip: memoryview,
+                 identity: Optional[Tuple[int, int]] = None) -> None:
+        self.version = version
+        self.token = token
+        self.digest = digest
+        self.body = body
+        self.gzip = gzip
+        self.identity = identity
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest[:32]}"'
+
+
+def map_snapshot(path: Path) -> Optional[Snapshot]:
+    """Map a snapshot file read-only; None if it is missing or invalid"""
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_size < HEADER_SIZE:
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    magic, version, length, gzip_length, token, digest = _HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC or HEADER_SIZE + length + gzip_length != len(mapped):
+        return None
+    view = memoryview(mapped)
+    body = view[HEADER_SIZE:HEADER_SIZE + length]
+    digest = digest.rstrip(b"\0").decode(errors="replace")
+    if hashlib.sha256(body).hexdigest() != digest:
+        logger.warning("Snapshot %s is corrupt; rebuilding", path)
+        return None
+    return Snapshot(version, token.rstrip(b"\0").decode(errors="replace"), digest,
+                    body, view[HEADER_SIZE + length:], (st.st_dev, st.st_ino))
+
+
+class SnapshotStore:
+    """Keeps the current snapshot mapped and republishes it when the data changes"""
+
+    def __init__(self, path: Optional[Path]) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._current: Optional[Snapshot] = None
+        # Served from memory / mapped from a file another worker wrote / built here
+        self.hits = 0
+        self.maps = 0
+        self.builds = 0
+
+    def _file_identity(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_dev, st.st_ino
+
+    def _latest(self) -> Optional[Snapshot]:
+        """The snapshot currently on disk, mapped again only if the file was swapped"""
+        if self.path is None:
+            return None
+        identity = self._file_identity()
+        if identity is None:
+            return None
+        if self._current is not None and self._current.identity == identity:
+            return self._current
+        return map_snapshot(self.path)
+
+    def cached(self, token: str) -> Optional[Snapshot]:
+        """The current snapshot if it was built for token (no I/O)"""
+        current = self._current
+        if current is not None and current.token == token:
+            self.hits += 1
+            return current
+        return None
+
+    def load(self, token: str) -> bool:
+        """Map the file on disk if it was built for token (warm start)"""
+        with self._lock:
+            latest = self._latest()
+            if latest is not None and latest.token == token:
+                self._current = latest
+                self.maps += 1
+                return True
+        return False
+
+    def get(self, token: str, build: Callable[[], bytes]) -> Snapshot:
+        """Snapshot for the database state token, building it if nobody has yet"""
+        current = self._current
+        if current is not None and current.token == token:
+            self.hits += 1
+            return current
+        with self._lock:
+            current = self._current
+            if current is not None and current.token == token:
+                self.hits += 1
+                return current
+            latest = self._latest()
+            if latest is not None and latest.token == token:
+                # Published by another worker
+                self._current = latest
+                self.maps += 1
+                return latest
+            body = build()
+            self.builds += 1
+            previous = [s.version for s in (latest, current) if s is not None]
+            version = max(previous, default=0) + 1
+            self._current = self._publish(version, token, body)
+            return self._current
+
+    def _publish(self, version: int, token: str, body: bytes) -> Snapshot:
+        digest = hashlib.sha256(body).hexdigest()
+        # mtime=0: identical bodies give identical gzip bytes in every worker
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if self.path is not None:
+            tmp_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}")
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, "wb") as f:
+                    f.write(_HEADER.pack(MAGIC, version, len(body), len(compressed),
+                                         token.encode(), digest.encode()))
+                    f.write(body)
+                    f.write(compressed)
+                os.replace(tmp_path, self.path)
+                snapshot = map_snapshot(self.path)
+                if snapshot is not None:
+                    return snapshot
+            except OSError as exc:
+                logger.warning("Could not write snapshot %s: %s", self.path, exc)
+            finally:
+                with contextlib.suppress(OSError):
+                    tmp_path.unlink(missing_ok=True)
+        # No usable file: serve this worker's own copy
+        return Snapshot(version, token, digest, memoryview(body), memoryview(compressed))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._current = None
+
+
+# Stores by name; their files live in the directory given to configure()
+stores: Dict[str, SnapshotStore] = {}
+_directory: Optional[Path] = None
+
+
+def _path_for(name: str) -> Optional[Path]:
+    return _directory / f"{name}.snap" if _directory is not None else None
+
+
+def store_for(name: str) -> SnapshotStore:
+    """The store for payload name, created on first use"""
+    store = stores.get(name)
+    if store is None:
+        store = stores[name] = SnapshotStore(_path_for(name))
+    return store
+
+
+def configure(directory: Optional[str]) -> None:
+    """Point all stores at directory; empty / None keeps snapshots in memory only"""
+    global _directory
+    _directory = Path(directory) if directory else None
+    for name, store in stores.items():
+        store.path = _path_for(name)
+        store.clear()
+
+
+def warm_start(token: str) -> int:
+    """Map every snapshot file built for token; returns how many were loaded"""
+    return sum(1 for store in stores.values() if store.load(token))
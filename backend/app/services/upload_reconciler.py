@@ -0,0 +1,305 @@
+"""
+Upload reconciler service
+Author: Polo (林鴻全)
+Date: 2026-10-19
+Purpose: 比對 uploads/ 目錄與資料庫引用，清除失效引用並隔離孤兒檔案
+
+One pass does:
+
+1. List uploads/ once into {key: mtime} (hidden entries and derived/ skipped).
+2. Load every attachment reference with one query per model
+   (WorkExperience, Project, ProjectAttachment).
+3. Diff the two sets:
+   - stale rows (file missing): attachment fields cleared; ProjectAttachment
+     rows, which cannot exist without a file, are deleted
+   - orphans (file not referenced by any row): moved to uploads/.quarantine/
+   - StoredFile.ref_count re-synced with the actual reference count
+
+Incremental runs only consider files modified since the previous run's
+cutoff as orphan candidates; the stale-row diff is in-memory and always full.
+Files younger than the grace period are never quarantined, because an upload
+handler may have written them without committing its row yet.
+
+Safety: a missing or unmounted uploads/ volume looks exactly like every file
+having been deleted. A run changes nothing (it reports what it would do, as
+a dry run) when uploads/ is missing, when it is empty while the database
+still has references, or when more than MAX_STALE_FRACTION of the references
+(and more than MAX_STALE_MINIMUM of them) would be cleared. An admin can
+override the last two with force=True after checking the volume.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.project import Project, ProjectAttachment
+from app.models.stored_file import StoredFile
+from app.models.work_experience import WorkExperience
+import app.api.upload_utils as upload_utils
+from app.api.upload_utils import sha256_from_reference
+from app.services.image_derivatives import DERIVED_DIR_NAME, delete_derivatives
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_DIR_NAME = ".quarantine"
+ORPHAN_GRACE_SECONDS = 60 * 60  # 1 hour
+QUARANTINE_RETENTION_SECONDS = 7 * 24 * 60 * 60  # 7 days
+# A non-forced run clears at most this fraction of the references, or
+# MAX_STALE_MINIMUM of them, whichever is larger
+MAX_STALE_FRACTION = 0.2
+MAX_STALE_MINIMUM = 5
+
+CLEARED_ATTACHMENT = {
+    "attachment_name": None,
+    "attachment_path": None,
+    "attachment_size": None,
+    "attachment_type": None,
+    "attachment_url": None,
+}
+
+# Cutoff of the previous run; orphan candidates of the next incremental run
+# are files modified at or after it
+_last_cutoff: Optional[float] = None
+
+
+def scan_upload_dir(upload_dir: Path) -> Dict[str, float]:
+    """Return {key relative to upload_dir: mtime} for every servable upload"""
+    files: Dict[str, float] = {}
+    if not upload_dir.exists():
+        return files
+    stack = [(upload_dir, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if not prefix and entry.name == DERIVED_DIR_NAME:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((Path(entry.path), f"{prefix}{entry.name}/"))
+                elif entry.is_file(follow_symlinks=False):
+                    files[f"{prefix}{entry.name}"] = entry.stat().st_mtime
+    return files
+
+
+def reference_key(url: Optional[str], path: Optional[str] = None) -> Optional[str]:
+    """Key under uploads/ that an attachment URL (preferred) or path points at"""
+    if url and url.startswith("/uploads/"):
+        return url[len("/uploads/"):]
+    if url and "://" in url:
+        return None  # external link, not stored here
+    if path:
+        candidate = Path(path)
+        try:
+            return candidate.resolve().relative_to(upload_utils.UPLOAD_DIR.resolve()).as_posix()
+        except ValueError:
+            pass
+        parts = candidate.parts
+        if "uploads" in parts:
+            return "/".join(parts[parts.index("uploads") + 1:])
+        return candidate.name
+    return None
+
+
+def _load_references(db: Session) -> dict:
+    """{(model, id): key} for every row that points at an upload, one query per model"""
+    references = {}
+    for model in (WorkExperience, Project):
+        rows = db.query(model.id, model.attachment_url, model.attachment_path).filter(
+            (model.attachment_url.isnot(None)) | (model.attachment_path.isnot(None))
+        ).all()
+        for row_id, url, path in rows:
+            key = reference_key(url, path)
+            if key:
+                references[(model, row_id)] = key
+    for row_id, url in db.query(ProjectAttachment.id, ProjectAttachment.file_url).all():
+        key = reference_key(url)
+        if key:
+            references[(ProjectAttachment, row_id)] = key
+    return references
+
+
+def _quarantine(upload_dir: Path, key: str, batch: str) -> None:
+    target = upload_dir / QUARANTINE_DIR_NAME / batch / key
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(upload_dir / key, target)
+
+
+def _purge_quarantine(upload_dir: Path, now: float) -> int:
+    quarantine = upload_dir / QUARANTINE_DIR_NAME
+    if not quarantine.exists():
+        return 0
+    purged = 0
+    for entry in os.scandir(quarantine):
+        if entry.is_dir() and entry.stat().st_mtime < now - QUARANTINE_RETENTION_SECONDS:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            purged += 1
+    return purged
+
+
+def _refusal(upload_dir: Path, files: Dict[str, float], references: dict, stale_count: int,
+             force: bool) -> Optional[str]:
+    """Why this run must not change anything, or None"""
+    if not upload_dir.is_dir():
+        return f"upload directory {upload_dir} is missing"
+    if force or not references:
+        return None
+    if not files:
+        return f"upload directory {upload_dir} is empty but {len(references)} references exist"
+    limit = max(MAX_STALE_MINIMUM, int(len(references) * MAX_STALE_FRACTION))
+    if stale_count > limit:
+        return f"{stale_count} of {len(references)} references are stale (limit {limit})"
+    return None
+
+
+def reconcile_uploads(db: Session, full: bool = False, dry_run: bool = False, force: bool = False) -> dict:
+    """Diff uploads/ against the database and repair both sides
+
+    Returns counts of what was (or, with dry_run, would be) changed. Runs
+    that look like a missing volume rather than missing files are turned
+    into dry runs; the report then has "refused" set to the reason.
+    """
+    global _last_cutoff
+    upload_dir = upload_utils.UPLOAD_DIR
+    now = time.time()
+    cutoff = now - ORPHAN_GRACE_SECONDS
+    since = None if full else _last_cutoff
+
+    files = scan_upload_dir(upload_dir)
+    references = _load_references(db)
+    referenced_keys = set(references.values())
+
+    # Stale rows: the referenced file is gone
+    stale = {}
+    for (model, row_id), key in references.items():
+        if key not in files:
+            stale.setdefault(model, []).append(row_id)
+
+    # Orphans: files no row references
+    orphans = [
+        key for key, mtime in files.items()
+        if key not in referenced_keys and mtime < cutoff and (since is None or mtime >= since)
+    ]
+
+    # StoredFile ref counts recomputed from live references
+    live_counts = Counter(
+        sha for sha in (sha256_from_reference(k) for k in references.values() if k in files) if sha
+    )
+    ref_count_fixes = 0
+    removed_blobs = []
+    for stored in db.query(StoredFile).all():
+        actual = live_counts.get(stored.sha256, 0)
+        if actual == 0:
+            removed_blobs.append(stored)
+        elif stored.ref_count != actual:
+            ref_count_fixes += 1
+            if not dry_run:
+                stored.ref_count = actual
+
+    stale_count = sum(len(ids) for ids in stale.values())
+    refused = _refusal(upload_dir, files, references, stale_count, force)
+    if refused:
+        logger.error("Upload reconcile changed nothing: %s", refused)
+        dry_run = True
+
+    report = {
+        "files_scanned": len(files),
+        "references": len(references),
+        "stale_cleared": stale_count,
+        "orphans_quarantined": len(orphans),
+        "ref_counts_fixed": ref_count_fixes,
+        "stored_files_removed": len(removed_blobs),
+        "full": since is None,
+        "dry_run": dry_run,
+        "refused": refused,
+    }
+    if dry_run:
+        return report
+
+    try:
+        for model, ids in stale.items():
+            if model is ProjectAttachment:
+                db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+            else:
+                db.query(model).filter(model.id.in_(ids)).update(CLEARED_ATTACHMENT, synchronize_session=False)
+        for stored in removed_blobs:
+            db.delete(stored)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    batch = datetime.now().strftime("%Y%m%d_%H%M%S")
+    for key in orphans:
+        try:
+            _quarantine(upload_dir, key, batch)
+        except OSError as e:
+            logger.warning("Could not quarantine orphan upload %s: %s", key, e)
+    for stored in removed_blobs:
+        delete_derivatives(upload_dir, stored.sha256)
+    report["quarantine_purged"] = _purge_quarantine(upload_dir, now)
+
+    _last_cutoff = cutoff
+    if report["stale_cleared"] or orphans or ref_count_fixes or removed_blobs:
+        logger.info("Upload reconcile: %s", report)
+    return report
+
+
+def backfill_stored_files(db: Session) -> int:
+    """Create the missing StoredFile rows for content-addressed references
+
+    A database imported from another installation can reference blobs under
+    uploads/ without having their StoredFile rows; reconcile_uploads would
+    never count those references and delete_upload_file would fall back to
+    deleting a shared blob directly. Only blobs present on disk get a row.
+    Returns the number of rows created; the caller commits.
+    """
+    upload_dir = upload_utils.UPLOAD_DIR
+    counts = Counter()
+    keys = {}
+    for key in _load_references(db).values():
+        sha = sha256_from_reference(key)
+        if sha:
+            counts[sha] += 1
+            keys.setdefault(sha, key)
+    if not counts:
+        return 0
+    known = {sha for (sha,) in db.query(StoredFile.sha256).filter(StoredFile.sha256.in_(counts))}
+    created = 0
+    for sha, count in counts.items():
+        path = upload_dir / keys[sha]
+        if sha in known or not path.is_file():
+            continue
+        db.add(StoredFile(sha256=sha, storage_key=keys[sha], size=path.stat().st_size, ref_count=count))
+        created += 1
+    return created
+
+
+def _reconcile_with_new_session() -> dict:
+    # Looked up at call time: import_database replaces SessionLocal
+    import app.db.base as db_base
+    db = db_base.SessionLocal()
+    try:
+        return reconcile_uploads(db)
+    finally:
+        db.close()
+
+
+async def run_periodic_reconcile(interval_seconds: int) -> None:
+    """Run an incremental reconcile every interval_seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(_reconcile_with_new_session)
+        except Exception:
+            logger.exception("Scheduled upload reconcile failed")
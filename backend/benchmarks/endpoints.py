@@ -0,0 +1,344 @@
+"""
+Benchmark: per-endpoint latency at several data scales
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Seeds a temporary SQLite database with a synthetic résumé at 1x, 10x and
+100x the size of the real one (BASE), then calls the API routes in-process
+through the ASGI app (httpx ASGITransport: no sockets, no server). It covers
+every create_crud_router route, work experience, projects, personal info,
+the résumé snapshot, auth login / verify and the database export. Per route
+it records:
+
+* cold_ms: the first call after seeding (caches and snapshots empty)
+* mean_ms / median_ms / p95_ms over the following iterations
+* queries: SQL statements of the last call (Server-Timing header)
+* status and response bytes
+
+Reads run before writes at each scale, so every read is measured against
+the seeded data. Writes are timed as POST / PUT / DELETE of the same item,
+which leaves the data as seeded. Login verifies a bcrypt hash, so it runs
+at most LOGIN_ITERATIONS times.
+
+The results file is JSON with sorted keys and no timestamps, so two runs (e.g.
+before and after a commit) can be compared with diff, or with --compare,
+which prints the median change per route.
+
+The database export route serves the fixed file data/resume.db (read only);
+it is timed against that file, not against the seeded data.
+
+Usage (from backend/):
+    ADMIN_USERNAME=x ADMIN_PASSWORD=y python benchmarks/endpoints.py \\
+        [--iterations 50] [--scales 1,10,100] [--output results.json] [--compare old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# The benchmark must never touch the real database: point the app at a
+# scratch file before app.core.config reads the environment
+_workdir = tempfile.mkdtemp(prefix="resumexlab-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/bench.db"
+
+import httpx
+
+import app.db.base as db_base
+from app.api.endpoints import auth as auth_endpoint
+from app.core import auth_cache
+from app.core.config import settings
+from app.core.login_throttle import LoginThrottle
+from app.core.security import get_password_hash
+from app.main import create_app
+from app.models.certification import Certification, Language
+from app.models.education import Education
+from app.models.personal_info import PersonalInfo
+from app.models.project import Project, ProjectAttachment, ProjectDetail
+from app.models.publication import GithubProject, Publication
+from app.models.user import User
+from app.models.work_experience import WorkExperience
+
+API = settings.API_V1_STR
+USERNAME = "bench"
+PASSWORD = "bench-password"
+LOGIN_ITERATIONS = 5
+
+# Row counts of the real résumé (1x). The real data has no attachments yet;
+# one per detail exercises the attachment loading path.
+BASE = {
+    "work_experience": 4,
+    "projects_per_experience": 3,
+    "standalone_projects": 2,
+    "details_per_project": 1,
+    "attachments_per_detail": 1,
+    "education": 2,
+    "certifications": 2,
+    "languages": 2,
+    "publications": 3,
+    "github_projects": 8,
+}
+
+# create_crud_router resources: path -> (create payload, update payload)
+CRUD_RESOURCES = {
+    "education": ({"school_en": "Bench University"}, {"degree_en": "MSc"}),
+    "certifications": ({"name_en": "Bench Cert"}, {"issuer": "Bench Org"}),
+    "languages": ({"language_en": "Bench"}, {"proficiency_en": "Fluent"}),
+    "publications": ({"title": "Bench Paper"}, {"year": 2026}),
+    "github-projects": ({"name_en": "bench-repo"}, {"url": "https://example.com/bench"}),
+    "work-experience": ({"company_en": "Bench Inc.", "start_date": "2020-01-01"}, {"position_en": "Engineer"}),
+    "projects": ({"title_en": "Bench Project"}, {"description_en": "Updated"}),
+}
+
+# Path parameter names of the item routes, as in the route templates
+ITEM_PARAMS = {"work-experience": "{experience_id}", "projects": "{project_id}"}
+
+_SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) quer')
+
+
+# ----- data -----
+
+def seed(scale: int) -> dict:
+    """Recreate the tables and fill them with scale times the BASE rows"""
+    db_base.Base.metadata.drop_all(bind=db_base.engine)
+    db_base.Base.metadata.create_all(bind=db_base.engine)
+    db = db_base.SessionLocal()
+    try:
+        db.add(User(username=USERNAME, password_hash=get_password_hash(PASSWORD), email="bench@example.com"))
+        db.add(PersonalInfo(name_en="Bench Person", email="bench@example.com", summary_en="Summary " * 40))
+
+        def project(title: str, order: int) -> Project:
+            item = Project(title_en=title, description_en="Project description " * 10, display_order=order)
+            for d in range(BASE["details_per_project"]):
+                detail = ProjectDetail(description_en="<p>Detail</p>" * 10, display_order=d)
+                for a in range(BASE["attachments_per_detail"]):
+                    detail.attachments.append(ProjectAttachment(
+                        file_name=f"file{a}.pdf", file_url=f"/uploads/file{a}.pdf", file_type="pdf", display_order=a,
+                    ))
+                item.details.append(detail)
+            return item
+
+        for i in range(BASE["work_experience"] * scale):
+            experience = WorkExperience(
+                company_en=f"Company {i}", position_en="Engineer", start_date=date(2015, 1, 1),
+                description_en="Experience description " * 10, display_order=i,
+            )
+            for j in range(BASE["projects_per_experience"]):
+                experience.projects.append(project(f"Project {i}.{j}", j))
+            db.add(experience)
+        for i in range(BASE["standalone_projects"] * scale):
+            db.add(project(f"Side project {i}", i))
+        for i in range(BASE["education"] * scale):
+            db.add(Education(school_en=f"School {i}", degree_en="BSc", start_date=date(2010, 9, 1), display_order=i))
+        for i in range(BASE["certifications"] * scale):
+            db.add(Certification(name_en=f"Certification {i}", issuer="Issuer", display_order=i))
+        for i in range(BASE["languages"] * scale):
+            db.add(Language(language_en=f"Language {i}", proficiency_en="Fluent", display_order=i))
+        for i in range(BASE["publications"] * scale):
+            db.add(Publication(title=f"Publication {i}", authors="A. Author", year=2020, display_order=i))
+        for i in range(BASE["github_projects"] * scale):
+            db.add(GithubProject(name_en=f"repo-{i}", url=f"https://github.com/bench/repo-{i}", display_order=i))
+        db.commit()
+
+        tables = [WorkExperience, Project, ProjectDetail, ProjectAttachment, Education,
+                  Certification, Language, Publication, GithubProject]
+        return {model.__tablename__: db.query(model).count() for model in tables}
+    finally:
+        db.close()
+
+
+def first_ids() -> dict:
+    db = db_base.SessionLocal()
+    try:
+        models = {
+            "education": Education, "certifications": Certification, "languages": Language,
+            "publications": Publication, "github-projects": GithubProject,
+            "work-experience": WorkExperience, "projects": Project,
+        }
+        return {name: db.query(model.id).order_by(model.id).first()[0] for name, model in models.items()}
+    finally:
+        db.close()
+
+
+# ----- timing -----
+
+class Recorder:
+    """Timings of one scale, by route ("METHOD /path/template")"""
+
+    def __init__(self) -> None:
+        self.samples = {}
+        self.last = {}
+
+    def add(self, route: str, elapsed: float, response: httpx.Response) -> None:
+        self.samples.setdefault(route, []).append(elapsed)
+        self.last[route] = response
+
+    def results(self) -> dict:
+        results = {}
+        for route, samples in self.samples.items():
+            response = self.last[route]
+            match = _SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+            cold, warm = samples[0], samples[1:] or samples
+            ordered = sorted(warm)
+            results[route] = {
+                "status": response.status_code,
+                "bytes": len(response.content),
+                "queries": int(match.group(1)) if match else 0,
+                "cold_ms": round(cold * 1000, 3),
+                "mean_ms": round(statistics.mean(warm) * 1000, 3),
+                "median_ms": round(statistics.median(warm) * 1000, 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+                "samples": len(samples),
+            }
+        return results
+
+
+async def _timed(client: httpx.AsyncClient, recorder: Recorder, route: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    recorder.add(route, time.perf_counter() - started, response)
+    return response
+
+
+async def run_scale(client: httpx.AsyncClient, iterations: int) -> dict:
+    recorder = Recorder()
+    ids = first_ids()
+
+    response = await _timed(client, recorder, "POST /api/auth/login", "POST", f"{API}/auth/login",
+                            data={"username": USERNAME, "password": PASSWORD})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # Reads, first call of each route cold
+    reads = [("GET /api/resume/", f"{API}/resume/"), ("GET /api/personal-info/", f"{API}/personal-info/")]
+    for name, item_id in ids.items():
+        reads.append((f"GET /api/{name}/", f"{API}/{name}/"))
+        placeholder = ITEM_PARAMS.get(name, "{item_id}")
+        reads.append((f"GET /api/{name}/{placeholder}", f"{API}/{name}/{item_id}"))
+    reads.append(("GET /api/projects/{project_id}/details", f"{API}/projects/{ids['projects']}/details"))
+    for _ in range(iterations + 1):
+        for route, url in reads:
+            await _timed(client, recorder, route, "GET", url)
+        await _timed(client, recorder, "GET /api/auth/verify", "GET", f"{API}/auth/verify", headers=headers)
+        await _timed(client, recorder, "GET /api/import/database/export/", "GET",
+                     f"{API}/import/database/export/", headers=headers)
+
+    # Writes: create, update and delete one item, so the data stays as seeded
+    for _ in range(iterations + 1):
+        for name, (create, update) in CRUD_RESOURCES.items():
+            placeholder = ITEM_PARAMS.get(name, "{item_id}")
+            response = await _timed(client, recorder, f"POST /api/{name}/", "POST", f"{API}/{name}/",
+                                    json=create, headers=headers)
+            if response.status_code >= 400:
+                continue
+            item_id = response.json()["id"]
+            await _timed(client, recorder, f"PUT /api/{name}/{placeholder}", "PUT", f"{API}/{name}/{item_id}",
+                         json=update, headers=headers)
+            await _timed(client, recorder, f"DELETE /api/{name}/{placeholder}", "DELETE", f"{API}/{name}/{item_id}",
+                         headers=headers)
+        await _timed(client, recorder, "PUT /api/personal-info/", "PUT", f"{API}/personal-info/",
+                     json={"summary_en": "Updated summary"}, headers=headers)
+        details = (await client.get(f"{API}/projects/{ids['projects']}/details")).json()
+        await _timed(client, recorder, "PUT /api/projects/{project_id}/details", "PUT",
+                     f"{API}/projects/{ids['projects']}/details",
+                     json=[{"id": d["id"], "description_en": d["description_en"]} for d in details], headers=headers)
+
+    for _ in range(min(iterations, LOGIN_ITERATIONS)):
+        await _timed(client, recorder, "POST /api/auth/login", "POST", f"{API}/auth/login",
+                     data={"username": USERNAME, "password": PASSWORD})
+
+    return recorder.results()
+
+
+async def run(scales, iterations: int) -> dict:
+    app = create_app(settings.model_copy(update={
+        "INIT_DB_ON_STARTUP": False,
+        "UPLOAD_RECONCILE_INTERVAL_SECONDS": 0,
+        "SNAPSHOT_DIR": f"{_workdir}/snapshots",
+    }))
+    # Repeated logins from one client would be throttled
+    auth_endpoint.ip_throttle = LoginThrottle(burst=10 ** 6, per_minute=10 ** 6)
+    auth_endpoint.username_throttle = LoginThrottle(burst=10 ** 6, per_minute=10 ** 6)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scale in scales:
+                rows = await asyncio.to_thread(seed, scale)
+                auth_cache.clear()
+                started = time.perf_counter()
+                routes = await run_scale(client, iterations)
+                results[f"{scale}x"] = {"rows": rows, "routes": routes}
+                print(f"{scale:>4}x: {len(routes)} routes in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return results
+
+
+# ----- output -----
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old: dict, new: dict) -> None:
+    """Print the median latency change per route between two results files"""
+    print(f"{'scale':>6}  {'route':<48} {'old ms':>9} {'new ms':>9} {'change':>8}")
+    for scale, data in new["scales"].items():
+        old_routes = old.get("scales", {}).get(scale, {}).get("routes", {})
+        for route, stats in sorted(data["routes"].items()):
+            before = old_routes.get(route)
+            if before is None or not before["median_ms"]:
+                continue
+            change = (stats["median_ms"] - before["median_ms"]) / before["median_ms"] * 100
+            print(f"{scale:>6}  {route:<48} {before['median_ms']:9.3f} {stats['median_ms']:9.3f} {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls per route after the cold one")
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated multiples of the real résumé")
+    parser.add_argument("--output", default="benchmark-results.json", help="results file (JSON)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    results = {
+        "meta": {
+            "commit": _commit(),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "iterations": args.iterations,
+            "base": BASE,
+        },
+    }
+    try:
+        results["scales"] = asyncio.run(run(scales, args.iterations))
+    finally:
+        shutil.rmtree(_workdir, ignore_errors=True)
+    Path(args.output).write_text(json.dumps(results, indent=2, sort_keys=True, ensure_ascii=False) + "\n")
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), results)
+
+
+if __name__ == "__main__":
+    main()
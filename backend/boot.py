@@ -0,0 +1,152 @@
+"""Container boot: bring the database schema to head, fast when it already is.
+
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+The head revision is computed once at image build time
+(``python3 boot.py --write-head``) and stored in alembic/HEAD_REVISION. On
+every start this script reads ``alembic_version`` from the SQLite file with
+the stdlib sqlite3 module and, if it equals the recorded head, exits without
+importing alembic or the app. Otherwise it repairs a revision that no longer
+has a migration file (as alembic_guard.py does) and runs
+``alembic upgrade head`` in this process.
+
+Each stage is logged with its duration.
+
+用法:
+    python3 boot.py --write-head          # at build time
+    python3 boot.py [db_path]             # at container start
+"""
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+ALEMBIC_INI = BACKEND_DIR / "alembic.ini"
+HEAD_FILE = BACKEND_DIR / "alembic" / "HEAD_REVISION"
+DEFAULT_DB_PATH = BACKEND_DIR / "data" / "resume.db"
+
+
+class StageTimer:
+    """Prints the duration of each boot stage and the total"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+
+    def stage(self, name: str, since: float, detail: str = "") -> float:
+        now = time.perf_counter()
+        suffix = f" ({detail})" if detail else ""
+        print(f"[boot] {name}: {(now - since) * 1000:.1f} ms{suffix}", flush=True)
+        return now
+
+    def total(self) -> None:
+        print(f"[boot] total: {(time.perf_counter() - self.started) * 1000:.1f} ms", flush=True)
+
+
+def read_db_revision(db_path: Path) -> str | None:
+    """Current alembic_version of the database, or None if it has none"""
+    if not db_path.is_file():
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT version_num FROM alembic_version LIMIT 1").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None  # 表不存在或 DB 損壞，交給 alembic upgrade 處理
+    return row[0] if row else None
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return config
+
+
+def compute_head_revision() -> str:
+    """Single head revision of the migration scripts"""
+    from alembic.script import ScriptDirectory
+
+    heads = ScriptDirectory.from_config(_alembic_config()).get_heads()
+    if len(heads) != 1:
+        raise RuntimeError(f"Expected exactly one alembic head, found {heads}")
+    return heads[0]
+
+
+def read_head_revision() -> str:
+    """Head revision recorded at build time, computed if the file is missing"""
+    if HEAD_FILE.is_file():
+        head = HEAD_FILE.read_text().strip()
+        if head:
+            return head
+    return compute_head_revision()
+
+
+def repair_unknown_revision(db_path: Path, current: str, head: str) -> None:
+    """Point alembic_version at head if current has no migration file (squashed)"""
+    from alembic.script import ScriptDirectory
+
+    known = {rev.revision for rev in ScriptDirectory.from_config(_alembic_config()).walk_revisions()}
+    if current in known:
+        return
+    print(f"[boot] WARNING: DB records revision '{current}' but no matching migration file found; "
+          f"updating alembic_version to '{head}'", flush=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("UPDATE alembic_version SET version_num = ?", (head,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def upgrade_to_head(db_path: Path) -> None:
+    from alembic import command
+
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    config = _alembic_config()
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{db_path.resolve()}")
+    command.upgrade(config, "head")
+
+
+def boot(db_path: Path) -> bool:
+    """Bring db_path to the head revision. Returns True if a migration ran"""
+    timer = StageTimer()
+    t = timer.started
+
+    current = read_db_revision(db_path)
+    t = timer.stage("read alembic_version", t, current or "none")
+
+    head = read_head_revision()
+    t = timer.stage("read head revision", t, head)
+
+    if current == head:
+        timer.stage("schema up to date, migration skipped", t)
+        timer.total()
+        return False
+
+    if current:
+        repair_unknown_revision(db_path, current, head)
+        t = timer.stage("revision guard", t)
+
+    upgrade_to_head(db_path)
+    timer.stage("alembic upgrade head", t)
+    timer.total()
+    return True
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "--write-head":
+        head = compute_head_revision()
+        HEAD_FILE.write_text(head + "\n")
+        print(f"[boot] head revision {head} written to {HEAD_FILE}")
+        return
+    db_path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DB_PATH
+    boot(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,25 +7,18 @@ set -e
 
 echo "=== Starting Backend Entrypoint ==="
 
-# Wait a moment for filesystem to be ready
-sleep 1
+# --- Schema check / migration ---
+# 修改日期: 2026-10-19
+# 說明: 原本每次啟動都 sleep 1、執行 alembic_guard.py 並以獨立 process 執行
+#        alembic upgrade head。改由 boot.py 讀取一次 alembic_version，與建置時
+#        預先計算的 head revision 比對；一致則跳過遷移，否則修復 revision 並在
+#        同一 process 內執行 upgrade。各階段耗時會輸出到 log。
+# sleep 1
+# python3 /app/alembic_guard.py /app/data/resume.db /app/alembic/versions
+# alembic upgrade head
+python3 /app/boot.py /app/data/resume.db
+# --- End schema check ---
 
-# --- Alembic revision guard ---
-# 修改日期: 2026-04-02
-# 說明: 檢查 DB 的 alembic_version 是否有對應的 migration 檔案。
-#        若 revision 已被 squash 刪除，自動更新 alembic_version 為 head revision，
-#        避免容器因 "Can't locate revision" 錯誤進入重啟迴圈。
-python3 /app/alembic_guard.py /app/data/resume.db /app/alembic/versions
-# --- End revision guard ---
-
-echo "=== Running Alembic Migrations ==="
-
-# Run alembic upgrade to head
-# The migration file uses CREATE TABLE IF NOT EXISTS for idempotent migrations
-# This allows safe re-running even if tables already exist
-alembic upgrade head
-
-echo "=== Migration Complete ==="
 echo "=== Starting Application ==="
 
 # Execute the main command (uvicorn)
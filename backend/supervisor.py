@@ -0,0 +1,277 @@
+"""Memory-aware uvicorn worker supervisor.
+
+Author: Polo (林鴻全)
+Date: 2026-10-19
+
+Replaces ``uvicorn --limit-max-requests 100``, which restarted the only
+worker every 100 requests whatever its memory use, dropping warm caches and
+in-flight connections.
+
+The supervisor binds the listening socket once, imports the app once
+(app.main has no import-time side effects) and forks the worker from that
+preloaded state. Every WORKER_RSS_CHECK_SECONDS it samples the worker's RSS.
+When RSS exceeds WORKER_MAX_RSS_MB, it recycles the worker gracefully:
+1. Start a replacement on the same socket.
+2. Wait until the replacement has finished its lifespan startup.
+3. Send SIGTERM to the old worker. It stops accepting and drains in-flight
+   requests, for up to WORKER_GRACEFUL_TIMEOUT_SECONDS.
+A worker that exits on its own is replaced immediately.
+
+Recycle counts and reasons are logged and written as JSON to
+SUPERVISOR_STATS_FILE for the metrics endpoint.
+
+用法:
+    python3 supervisor.py [--host 0.0.0.0] [--port 8000] [uvicorn options]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import uvicorn
+
+BACKEND_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.core.config import settings  # noqa: E402
+
+logger = logging.getLogger("supervisor")
+
+READY_TIMEOUT_SECONDS = 60
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_rss(pid: int) -> Optional[int]:
+    """Resident set size of pid in bytes (Linux /proc), None if unavailable"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class _ReadyServer(uvicorn.Server):
+    """uvicorn.Server that signals the supervisor once startup has completed"""
+
+    def __init__(self, config: uvicorn.Config, ready) -> None:
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            self.ready.set()
+
+
+def _run_worker(config: uvicorn.Config, sockets, ready) -> None:
+    # Installed by the supervisor before forking; the worker uses uvicorn's own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    _ReadyServer(config, ready).run(sockets=sockets)
+
+
+class Worker:
+    """One worker process and its readiness flag"""
+
+    def __init__(self, process, ready) -> None:
+        self.process = process
+        self.ready = ready
+        self.started_at = time.time()
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+
+class Supervisor:
+    """Runs one worker and recycles it when its RSS crosses max_rss_bytes"""
+
+    def __init__(
+        self,
+        spawn: Callable[[], Worker],
+        max_rss_bytes: int,
+        check_interval: float,
+        graceful_timeout: float,
+        stats_file: Optional[Path] = None,
+        rss_reader: Callable[[int], Optional[int]] = read_rss,
+    ) -> None:
+        self.spawn = spawn
+        self.max_rss_bytes = max_rss_bytes
+        self.check_interval = check_interval
+        self.graceful_timeout = graceful_timeout
+        self.stats_file = stats_file
+        self.rss_reader = rss_reader
+        self.worker: Optional[Worker] = None
+        self.should_exit = threading.Event()
+        self.recycles: Dict[str, int] = {}
+        self.recycle_failures = 0
+        self.last_recycle: Optional[dict] = None
+        self.last_rss: Optional[int] = None
+
+    # ----- recycling -----
+
+    def check(self) -> Optional[str]:
+        """Reason the current worker must be replaced, or None"""
+        if not self.worker.is_alive():
+            return "exited"
+        self.last_rss = self.rss_reader(self.worker.pid)
+        if self.last_rss is not None and self.max_rss_bytes > 0 and self.last_rss > self.max_rss_bytes:
+            return "rss"
+        return None
+
+    def start_worker(self) -> Optional[Worker]:
+        worker = self.spawn()
+        if worker.ready.wait(READY_TIMEOUT_SECONDS) and worker.is_alive():
+            return worker
+        logger.error("Worker %s did not become ready", worker.pid)
+        self.retire(worker)
+        return None
+
+    def retire(self, worker: Worker) -> None:
+        """SIGTERM (uvicorn drains in-flight requests), SIGKILL after graceful_timeout"""
+        if worker.is_alive():
+            os.kill(worker.pid, signal.SIGTERM)
+        worker.process.join(self.graceful_timeout)
+        if worker.is_alive():
+            logger.warning("Worker %s did not stop in %ss, killing it", worker.pid, self.graceful_timeout)
+            worker.process.kill()
+            worker.process.join()
+
+    def recycle(self, reason: str) -> None:
+        old = self.worker
+        replacement = self.start_worker()
+        if replacement is None:
+            self.recycle_failures += 1
+            if old.is_alive():
+                # Keep serving with the old worker; try again on a later check
+                self.write_stats()
+                return
+            replacement = self._start_until_ready()
+            if replacement is None:
+                return
+        self.worker = replacement
+        self.retire(old)
+        self.recycles[reason] = self.recycles.get(reason, 0) + 1
+        self.last_recycle = {
+            "reason": reason,
+            "old_pid": old.pid,
+            "new_pid": replacement.pid,
+            "rss_bytes": self.last_rss if reason == "rss" else None,
+            "at": time.time(),
+        }
+        logger.info("Recycled worker %s -> %s (reason: %s)", old.pid, replacement.pid, reason)
+        self.write_stats()
+
+    def _start_until_ready(self) -> Optional[Worker]:
+        while not self.should_exit.is_set():
+            worker = self.start_worker()
+            if worker is not None:
+                return worker
+            self.should_exit.wait(self.check_interval)
+        return None
+
+    # ----- stats -----
+
+    def stats(self) -> dict:
+        return {
+            "worker_pid": self.worker.pid if self.worker else None,
+            "worker_started_at": self.worker.started_at if self.worker else None,
+            "worker_rss_bytes": self.last_rss,
+            "max_rss_bytes": self.max_rss_bytes,
+            "recycles_total": dict(self.recycles),
+            "recycle_failures_total": self.recycle_failures,
+            "last_recycle": self.last_recycle,
+        }
+
+    def write_stats(self) -> None:
+        if not self.stats_file:
+            return
+        tmp = self.stats_file.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(self.stats()))
+            os.replace(tmp, self.stats_file)
+        except OSError as exc:
+            logger.warning("Could not write supervisor stats: %s", exc)
+
+    # ----- main loop -----
+
+    def run(self) -> None:
+        self.worker = self._start_until_ready()
+        self.write_stats()
+        while self.worker is not None and not self.should_exit.wait(self.check_interval):
+            reason = self.check()
+            if reason:
+                self.recycle(reason)
+            else:
+                self.write_stats()
+        if self.worker is not None:
+            self.retire(self.worker)
+
+    def handle_exit(self, signum, frame) -> None:
+        self.should_exit.set()
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--timeout-keep-alive", type=int, default=60)
+    parser.add_argument("--limit-concurrency", type=int, default=None)
+    parser.add_argument("--backlog", type=int, default=2048)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     [supervisor] %(message)s")
+    args = _parse_args(argv)
+    config = uvicorn.Config(
+        args.app,
+        host=args.host,
+        port=args.port,
+        timeout_keep_alive=args.timeout_keep_alive,
+        limit_concurrency=args.limit_concurrency,
+        backlog=args.backlog,
+        timeout_graceful_shutdown=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS,
+    )
+    # Preload once; forked workers start from the imported app
+    config.load()
+    sock = config.bind_socket()
+    context = multiprocessing.get_context("fork")
+
+    def spawn() -> Worker:
+        ready = context.Event()
+        process = context.Process(target=_run_worker, args=(config, [sock], ready), daemon=False)
+        process.start()
+        return Worker(process, ready)
+
+    supervisor = Supervisor(
+        spawn,
+        max_rss_bytes=settings.WORKER_MAX_RSS_MB * 1024 * 1024,
+        check_interval=settings.WORKER_RSS_CHECK_SECONDS,
+        # Leave uvicorn time to drain before SIGKILL
+        graceful_timeout=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS + 5,
+        stats_file=Path(settings.SUPERVISOR_STATS_FILE) if settings.SUPERVISOR_STATS_FILE else None,
+    )
+    signal.signal(signal.SIGTERM, supervisor.handle_exit)
+    signal.signal(signal.SIGINT, supervisor.handle_exit)
+    logger.info("Listening on %s:%s, recycling the worker above %s MB RSS",
+                args.host, args.port, settings.WORKER_MAX_RSS_MB)
+    try:
+        supervisor.run()
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,20 +8,34 @@ Uses StaticPool so all sessions share one in-memory DB connection.
 import pytest
 import sys
 import os
+from contextlib import contextmanager
 from datetime import timedelta
 
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 # Ensure the backend directory is on sys.path so `app.*` imports work
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from app.main import app
+from app.core.config import settings
+from app.main import create_app
+import app.db.base as db_base
 from app.db.base import Base, get_db
 from app.models.user import User
 from app.core.security import get_password_hash, create_access_token
+from app.core import auth_cache
+
+# App under test: the lifespan must not create the admin user in the real
+# database or start the periodic uploads reconciler, requests must not
+# watch the real database file for changes, and snapshots stay in memory
+app = create_app(settings.model_copy(update={
+    "INIT_DB_ON_STARTUP": False,
+    "UPLOAD_RECONCILE_INTERVAL_SECONDS": 0,
+    "COHERENCE_CHECK_INTERVAL_MS": -1,
+    "SNAPSHOT_DIR": "",
+}))
 
 # Use in-memory SQLite with StaticPool so all sessions share one connection.
 # Without StaticPool, each session opens a separate `:memory:` DB (empty).
@@ -55,12 +69,16 @@ def db_session():
         db.rollback()
         db.close()
         Base.metadata.drop_all(bind=engine)
+        # Cached principals refer to users of the dropped database
+        auth_cache.clear()
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def client(db_session, monkeypatch):
     """FastAPI TestClient with overridden DB dependency."""
     app.dependency_overrides[get_db] = override_get_db
+    # Shared single-flight loads open their own session from app.db.base
+    monkeypatch.setattr(db_base, "SessionLocal", TestingSessionLocal)
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -88,3 +106,35 @@ def auth_headers(db_session):
         expires_delta=timedelta(minutes=30)
     )
     return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Context manager that fails the test when the block runs more SQL
+    statements than its budget:
+
+        with query_budget(2):
+            client.get("/api/work-experience/")
+
+    Counts every statement on the test engine, so a lazy load per row or a
+    commit per row shows up as a budget overrun. Yields the list of executed
+    statements.
+    """
+    @contextmanager
+    def budget(max_queries):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "after_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "after_cursor_execute", record)
+        assert len(statements) <= max_queries, (
+            f"{len(statements)} queries, budget {max_queries}:\n" + "\n".join(statements)
+        )
+
+    return budget
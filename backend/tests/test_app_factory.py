@@ -0,0 +1,82 @@
+"""
+Tests for the application factory: importing app.main has no side effects,
+stays within an import-time budget, and startup work runs in the lifespan.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Wall-clock budget for `import app.main` in a fresh interpreter. Most of it
+# is importing fastapi / pydantic / sqlalchemy; DB or bcrypt work at import
+# time would blow it.
+IMPORT_TIME_BUDGET_SECONDS = 3.0
+
+_IMPORT_PROBE = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import app.main
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+
+def test_import_is_side_effect_free_and_within_budget(tmp_path):
+    env = dict(os.environ, DATABASE_URL="sqlite:///./data/resume.db")
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE, str(BACKEND_DIR)],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    seconds = json.loads(result.stdout.strip().splitlines()[-1])["seconds"]
+
+    # Neither the database directory nor uploads/ is created on import
+    assert list(tmp_path.iterdir()) == []
+    assert seconds < IMPORT_TIME_BUDGET_SECONDS, f"import app.main took {seconds:.2f}s"
+
+
+def test_lifespan_initializes_database_and_directories(tmp_path, monkeypatch):
+    import app.db.base as db_base
+    import app.api.upload_utils as upload_utils
+    from app.core.config import settings
+    from app.db.base import Base
+    import app.main as main_module
+    from app.models.user import User
+
+    db_file = tmp_path / "data" / "resume.db"
+    engine = create_engine(f"sqlite:///{db_file}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(db_base, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path / "uploads")
+
+    app = main_module.create_app(settings.model_copy(update={
+        "DATABASE_URL": f"sqlite:///{db_file}",
+        "UPLOAD_RECONCILE_INTERVAL_SECONDS": 0,
+    }))
+    assert not db_file.parent.exists()
+
+    # Tables come from alembic in production; create them once the lifespan
+    # has made the database directory
+    original_init_db = main_module.init_db
+
+    def init_db_with_tables(db):
+        Base.metadata.create_all(bind=engine)
+        original_init_db(db)
+
+    monkeypatch.setattr(main_module, "init_db", init_db_with_tables)
+
+    with TestClient(app) as client:
+        assert client.get("/health").json() == {"status": "healthy"}
+        assert (tmp_path / "uploads").is_dir()
+        db = db_base.SessionLocal()
+        try:
+            assert db.query(User).filter(User.username == settings.ADMIN_USERNAME).count() == 1
+        finally:
+            db.close()
+    engine.dispose()
@@ -0,0 +1,91 @@
+"""
+Tests for the /uploads attachment download endpoint.
+Only referenced files are served, with strong ETags, immutable caching,
+Range support, and X-Accel-Redirect when running behind nginx.
+"""
+import hashlib
+import io
+
+import pytest
+
+CONTENT = b"0123456789" * 100
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    import app.api.upload_utils as upload_utils
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def attachment_url(client, auth_headers, upload_dir):
+    response = client.post(
+        "/api/projects/upload",
+        data={"title_en": "P"},
+        files={"file": ("notes.txt", io.BytesIO(CONTENT), "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["attachment_url"]
+
+
+def test_download_full_file_with_cache_headers(client, attachment_url):
+    response = client.get(attachment_url)
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"] == f'"{SHA256}"'
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_if_none_match_returns_304(client, attachment_url):
+    response = client.get(attachment_url, headers={"If-None-Match": f'"{SHA256}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_range_request_returns_partial_content(client, attachment_url):
+    response = client.get(attachment_url, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    suffix = client.get(attachment_url, headers={"Range": "bytes=-5"})
+    assert suffix.status_code == 206
+    assert suffix.content == CONTENT[-5:]
+
+
+def test_unsatisfiable_range_returns_416(client, attachment_url):
+    response = client.get(attachment_url, headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_x_accel_redirect_when_configured(client, attachment_url, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "UPLOADS_ACCEL_REDIRECT_PREFIX", "/_protected_uploads/")
+
+    response = client.get(attachment_url)
+    assert response.status_code == 200
+    assert response.content == b""
+    key = attachment_url.removeprefix("/uploads/")
+    assert response.headers["x-accel-redirect"] == f"/_protected_uploads/{key}"
+    assert response.headers["etag"] == f'"{SHA256}"'
+
+
+def test_unreferenced_and_hidden_files_not_served(client, upload_dir, attachment_url):
+    (upload_dir / "orphan.pdf").write_bytes(b"orphan")
+    (upload_dir / ".sessions").mkdir()
+    (upload_dir / ".sessions" / "meta.json").write_text("{}")
+
+    assert client.get("/uploads/orphan.pdf").status_code == 404
+    assert client.get("/uploads/.sessions/meta.json").status_code == 404
+    assert client.get("/uploads/../data/resume.db").status_code == 404
+
+
+def test_released_attachment_no_longer_served(client, auth_headers, attachment_url):
+    project_id = client.get("/api/projects/").json()[0]["id"]
+    assert client.delete(f"/api/projects/{project_id}", headers=auth_headers).status_code == 200
+    assert client.get(attachment_url).status_code == 404
@@ -0,0 +1,68 @@
+"""
+Tests for the authenticated-principal cache used by get_current_user.
+A repeated token skips the JWT decode and the user query; any change to a
+User row or a database import invalidates the cache.
+"""
+from unittest.mock import patch
+
+from app.core import auth_cache
+from app.models.user import User
+
+VERIFY_URL = "/api/auth/verify"
+
+
+def _count_decodes():
+    import app.api.endpoints.auth as auth_module
+    return patch.object(auth_module, "decode_access_token", wraps=auth_module.decode_access_token)
+
+
+def test_repeated_token_skips_decode(client, auth_headers):
+    with _count_decodes() as decode:
+        for _ in range(5):
+            response = client.get(VERIFY_URL, headers=auth_headers)
+            assert response.status_code == 200
+            assert response.json()["username"] == "testuser"
+    assert decode.call_count == 1
+    assert auth_cache.size() == 1
+
+
+def test_user_change_invalidates(client, auth_headers, db_session):
+    assert client.get(VERIFY_URL, headers=auth_headers).json()["email"] == "test@test.com"
+
+    user = db_session.query(User).filter(User.username == "testuser").first()
+    user.email = "changed@test.com"
+    db_session.commit()
+    assert auth_cache.size() == 0
+    assert client.get(VERIFY_URL, headers=auth_headers).json()["email"] == "changed@test.com"
+
+    db_session.delete(user)
+    db_session.commit()
+    assert client.get(VERIFY_URL, headers=auth_headers).status_code == 401
+
+
+def test_invalid_token_not_cached(client, db_session):
+    response = client.get(VERIFY_URL, headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 401
+    assert auth_cache.size() == 0
+
+
+def test_lru_bound_and_ttl(client, auth_headers, monkeypatch):
+    from datetime import timedelta
+    from app.core.security import create_access_token
+
+    monkeypatch.setattr(auth_cache.settings, "AUTH_CACHE_MAX_ENTRIES", 2)
+    for minutes in (10, 11, 12):
+        token = create_access_token({"sub": "testuser"}, timedelta(minutes=minutes))
+        assert client.get(VERIFY_URL, headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert auth_cache.size() == 2
+
+    monkeypatch.setattr(auth_cache.time, "monotonic", lambda: float("inf"))
+    assert auth_cache.get(token) is None
+
+
+def test_stale_lookup_is_not_stored(db_session, auth_headers):
+    user = db_session.query(User).first()
+    seen = auth_cache.generation()
+    auth_cache.clear()
+    auth_cache.put("token", {}, user, seen)
+    assert auth_cache.size() == 0
@@ -0,0 +1,74 @@
+"""
+Tests for BodySizeLimitMiddleware
+Confirms oversized request bodies are rejected with 413 before the endpoint
+(and its auth dependency or multipart parser) ever sees them.
+"""
+import io
+
+from app.middleware.body_limit import ROUTE_CLASS_LIMITS, classify_request
+
+
+def _scope(path: str, content_type: bytes = b"application/json") -> dict:
+    return {"type": "http", "path": path, "headers": [(b"content-type", content_type)]}
+
+
+def test_classify_request_route_classes():
+    """Requests are classified as db_import, attachment or json."""
+    assert classify_request(_scope("/api/import/database/import/", b"multipart/form-data; boundary=x")) == "db_import"
+    assert classify_request(_scope("/api/projects/upload", b"multipart/form-data; boundary=x")) == "attachment"
+    assert classify_request(_scope("/api/education/")) == "json"
+
+
+def test_declared_content_length_over_limit_rejected_without_auth(client):
+    """An oversized Content-Length is rejected with 413 before authentication runs."""
+    response = client.post(
+        "/api/work-experience/upload",
+        content=b"",
+        headers={
+            "Content-Type": "multipart/form-data; boundary=x",
+            "Content-Length": str(ROUTE_CLASS_LIMITS["attachment"] + 1),
+        },
+    )
+    assert response.status_code == 413, response.text
+
+
+def test_json_body_over_limit_rejected(client, auth_headers):
+    """JSON bodies are capped far below the attachment limit."""
+    oversized = "x" * (ROUTE_CLASS_LIMITS["json"] + 1)
+    response = client.post(
+        "/api/education/",
+        json={"school_en": oversized, "display_order": 1},
+        headers=auth_headers,
+    )
+    assert response.status_code == 413, response.text
+
+
+def test_streamed_body_over_limit_rejected(client, auth_headers, monkeypatch):
+    """A chunked body without Content-Length is aborted once it crosses the limit."""
+    monkeypatch.setitem(ROUTE_CLASS_LIMITS, "attachment", 64 * 1024)
+
+    def body():
+        for _ in range(16):
+            yield b"x" * 8192
+
+    response = client.post(
+        "/api/projects/upload",
+        content=body(),
+        headers={**auth_headers, "Content-Type": "multipart/form-data; boundary=x"},
+    )
+    assert response.status_code == 413, response.text
+
+
+def test_small_upload_passes(client, auth_headers, tmp_path, monkeypatch):
+    """Uploads within the limit reach the endpoint normally."""
+    import app.api.upload_utils as upload_utils
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path)
+
+    response = client.post(
+        "/api/projects/upload",
+        data={"title_en": "Small"},
+        files={"file": ("notes.txt", io.BytesIO(b"hello"), "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["attachment_size"] == 5
@@ -0,0 +1,70 @@
+"""
+Tests for boot.py: the migration step is skipped when the database is
+already at the head revision recorded at build time.
+"""
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import boot  # noqa: E402
+
+
+def _make_db(path: Path, revision: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+    conn.execute("INSERT INTO alembic_version VALUES (?)", (revision,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def head_file(tmp_path, monkeypatch):
+    path = tmp_path / "HEAD_REVISION"
+    path.write_text(boot.compute_head_revision() + "\n")
+    monkeypatch.setattr(boot, "HEAD_FILE", path)
+    return path
+
+
+def test_head_is_single_revision():
+    head = boot.compute_head_revision()
+    assert any(p.name.startswith(head) for p in (BACKEND_DIR / "alembic" / "versions").glob("*.py"))
+
+
+def test_up_to_date_database_skips_migration(tmp_path, head_file, monkeypatch, capsys):
+    db_path = tmp_path / "resume.db"
+    _make_db(db_path, head_file.read_text().strip())
+    monkeypatch.setattr(boot, "upgrade_to_head", lambda db_path: pytest.fail("migration should be skipped"))
+
+    assert boot.boot(db_path) is False
+    out = capsys.readouterr().out
+    assert "migration skipped" in out
+    assert "[boot] total:" in out
+
+
+def test_squashed_revision_is_repaired_before_upgrade(tmp_path, head_file, monkeypatch):
+    db_path = tmp_path / "resume.db"
+    _make_db(db_path, "deadbeef0000")
+    upgraded = []
+    monkeypatch.setattr(boot, "upgrade_to_head", lambda db_path: upgraded.append(db_path))
+
+    assert boot.boot(db_path) is True
+    assert boot.read_db_revision(db_path) == head_file.read_text().strip()
+    assert upgraded == [db_path]
+
+
+def test_fresh_database_is_migrated(tmp_path):
+    """Runs in a subprocess: alembic's env.py reconfigures logging."""
+    db_path = tmp_path / "data" / "resume.db"
+    result = subprocess.run(
+        [sys.executable, str(BACKEND_DIR / "boot.py"), str(db_path)],
+        cwd=tmp_path, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "alembic upgrade head" in result.stdout
+    assert boot.read_db_revision(db_path) == boot.compute_head_revision()
@@ -0,0 +1,98 @@
+"""
+Tests for import_database: imported files are migrated to the current schema
+before they replace the live database, and rejected when they cannot be.
+"""
+import hashlib
+import io
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.db.base import Base
+from app.db import coherence
+
+DB_IMPORT_URL = "/api/import/database/import/"
+
+
+@pytest.fixture
+def backend_dir(tmp_path, monkeypatch):
+    """Point import_database at tmp_path/data/resume.db (see test_file_upload_dos)"""
+    import app.api.upload_utils as upload_utils
+    import app.api.endpoints.import_data as import_module
+    import app.db.base as db_base
+
+    monkeypatch.setattr(import_module, "__file__", str(tmp_path / "app" / "api" / "endpoints" / "import_data.py"))
+    (tmp_path / "app" / "api" / "endpoints").mkdir(parents=True)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "uploads").mkdir()
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path / "uploads")
+    # Keep the test engine: the swapped file is inspected directly
+    monkeypatch.setattr(coherence.watcher, "database_replaced", lambda: None)
+    monkeypatch.setattr(db_base, "engine", db_base.engine)
+    monkeypatch.setattr(db_base, "SessionLocal", db_base.SessionLocal)
+    return tmp_path
+
+
+def _legacy_database(path, attachment_key):
+    """A database from before stored_files (and before alembic) existed"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE stored_files")
+    conn.execute(
+        "INSERT INTO projects (title_en, attachment_url, display_order) VALUES ('P', ?, 0)",
+        (f"/uploads/{attachment_key}",),
+    )
+    conn.commit()
+    conn.close()
+    return path.read_bytes()
+
+
+def _tables(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    finally:
+        conn.close()
+
+
+def test_legacy_database_is_migrated_and_backfilled(client, auth_headers, backend_dir):
+    content = b"%PDF-1.4 shared blob"
+    sha = hashlib.sha256(content).hexdigest()
+    key = f"{sha[:2]}/{sha[2:4]}/{sha}.pdf"
+    (backend_dir / "uploads" / sha[:2] / sha[2:4]).mkdir(parents=True)
+    (backend_dir / "uploads" / key).write_bytes(content)
+    legacy = _legacy_database(backend_dir / "legacy.db", key)
+
+    response = client.post(
+        DB_IMPORT_URL,
+        files={"file": ("legacy.db", io.BytesIO(legacy), "application/octet-stream")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+
+    db_path = backend_dir / "data" / "resume.db"
+    assert {"stored_files", "alembic_version"} <= _tables(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT sha256, storage_key, size, ref_count FROM stored_files").fetchall()
+    finally:
+        conn.close()
+    assert rows == [(sha, key, len(content), 1)]
+    assert not list((backend_dir / "data").glob(".resume.db.import-*"))
+
+
+def test_unmigratable_database_is_rejected(client, auth_headers, backend_dir):
+    db_path = backend_dir / "data" / "resume.db"
+    db_path.write_bytes(b"current database")
+
+    response = client.post(
+        DB_IMPORT_URL,
+        files={"file": ("broken.db", io.BytesIO(b"not a sqlite database" * 100), "application/octet-stream")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+    assert db_path.read_bytes() == b"current database"
+    assert not list((backend_dir / "data").glob(".resume.db.import-*"))
@@ -0,0 +1,138 @@
+"""
+Tests for cross-worker cache coherence (app.db.coherence): a commit by
+another connection or process, or a replaced database file, invalidates the
+registered caches; a replaced file also reopens the engine.
+"""
+import os
+import sqlite3
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import app.db.base as db_base
+from app.core import auth_cache
+from app.db import coherence
+from app.middleware.coherence import CoherenceMiddleware
+
+
+def _make_db(path, value):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS t (v TEXT)")
+    conn.execute("DELETE FROM t")
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    path = tmp_path / "resume.db"
+    _make_db(path, "original")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(db_base, "engine", engine)
+    monkeypatch.setattr(db_base, "SessionLocal", sessionmaker(bind=engine))
+    yield path
+    db_base.engine.dispose()
+
+
+@pytest.fixture
+def invalidations(monkeypatch):
+    calls = []
+    monkeypatch.setattr(coherence, "_invalidators", [lambda: calls.append(1)])
+    return calls
+
+
+def test_commit_by_other_connection_invalidates(db_file, invalidations):
+    watcher = coherence.CoherenceWatcher(0)
+    assert watcher.check() is False  # first check records the state
+    assert watcher.check() is False
+
+    # Another worker writes
+    _make_db(db_file, "changed")
+    assert watcher.check() is True
+    assert invalidations == [1]
+    assert watcher.check() is False
+    assert watcher.invalidations["data_version"] == 1
+
+
+def test_replaced_file_reopens_engine(db_file, tmp_path, invalidations):
+    watcher = coherence.CoherenceWatcher(0)
+    watcher.check()
+    with db_base.SessionLocal() as db:
+        assert db.execute(text("SELECT v FROM t")).scalar() == "original"
+    old_engine = db_base.engine
+
+    replacement = tmp_path / "import.db"
+    _make_db(replacement, "imported")
+    os.replace(replacement, db_file)
+
+    assert watcher.check() is True
+    assert db_base.engine is not old_engine
+    assert watcher.invalidations["replaced"] == 1
+    with db_base.SessionLocal() as db:
+        assert db.execute(text("SELECT v FROM t")).scalar() == "imported"
+
+
+def test_check_is_rate_limited(db_file, invalidations):
+    watcher = coherence.CoherenceWatcher(3600)
+    watcher.check(force=True)
+    _make_db(db_file, "changed")
+    assert watcher.check() is False
+    assert watcher.check(force=True) is True
+
+
+def test_missing_file_is_not_created(tmp_path, monkeypatch, invalidations):
+    path = tmp_path / "missing.db"
+    monkeypatch.setattr(db_base, "engine", create_engine(f"sqlite:///{path}"))
+    watcher = coherence.CoherenceWatcher(0)
+    assert watcher.check() is False
+    assert not path.exists()
+
+
+def test_middleware_checks_before_request(db_file, invalidations):
+    import asyncio
+
+    watcher = coherence.CoherenceWatcher(0)
+
+    async def endpoint(request):
+        return JSONResponse({"invalidations": len(invalidations)})
+
+    app = CoherenceMiddleware(Starlette(routes=[Route("/", endpoint)]), watcher=watcher)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = (await client.get("/")).json()
+            _make_db(db_file, "changed")
+            second = (await client.get("/")).json()
+            return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == {"invalidations": 0}
+    assert second == {"invalidations": 1}
+
+
+def test_auth_cache_is_registered():
+    assert auth_cache.clear in coherence._invalidators
+
+
+def test_database_token_follows_commits(tmp_path):
+    path = tmp_path / "resume.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (v TEXT)")
+    conn.commit()
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as db:
+        before = coherence.database_token(db)
+        assert coherence.database_token(db) == before
+        # A commit from any process changes the token
+        conn.execute("INSERT INTO t VALUES ('x')")
+        conn.commit()
+        assert coherence.database_token(db) != before
+    conn.close()
+    engine.dispose()
@@ -6,8 +6,11 @@ before reading them into memory.
 MAX_DB_FILE_SIZE = 100MB (set in import_data.py)
 """
 import io
+import json
 import os
 import sqlite3
+import subprocess
+import sys
 import tempfile
 import shutil
 from pathlib import Path
@@ -115,3 +118,108 @@ def test_small_db_file_passes_size_check(client, tmp_path, monkeypatch):
         # Always restore the global engine to prevent test pollution
         db_base.engine = original_engine
         db_base.SessionLocal = original_session_local
+
+
+# ── Streaming attachment writer (upload_utils.save_upload_file) ─────────────
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Peak RSS growth allowed while saving a 100MB attachment. The upload is
+# copied in 1MB chunks, so anything near the file size means it was buffered.
+UPLOAD_RSS_BUDGET_KB = 32 * 1024
+
+_RSS_PROBE = """
+import asyncio, hashlib, json, os, resource, sys
+sys.path.insert(0, sys.argv[1])
+from fastapi import UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.base import Base
+from app.api.upload_utils import save_upload_file
+
+engine = create_engine("sqlite:///probe.db")
+Base.metadata.create_all(bind=engine)
+db = sessionmaker(bind=engine)()
+
+SIZE = 100 * 1024 * 1024
+block = os.urandom(1024 * 1024)
+expected = hashlib.sha256()
+with open("source.pdf", "wb") as f:
+    for _ in range(SIZE // len(block)):
+        f.write(block)
+        expected.update(block)
+del block
+
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+with open("source.pdf", "rb") as src:
+    meta = asyncio.run(save_upload_file(UploadFile(file=src, filename="big.pdf"), db))
+db.commit()
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+actual = hashlib.sha256()
+with open(meta["attachment_path"], "rb") as f:
+    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+        actual.update(chunk)
+print(json.dumps({
+    "growth_kb": after - before,
+    "size": meta["attachment_size"],
+    "digest_ok": actual.hexdigest() == expected.hexdigest(),
+}))
+"""
+
+
+def test_save_upload_file_streams_with_bounded_rss(tmp_path):
+    """
+    Saving a 100MB attachment must not hold the file in memory.
+    Runs in a subprocess so ru_maxrss is not skewed by other tests.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _RSS_PROBE, str(BACKEND_DIR)],
+        cwd=tmp_path, capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert stats["size"] == 100 * 1024 * 1024
+    assert stats["digest_ok"], "Stored file does not match the uploaded bytes"
+    assert stats["growth_kb"] < UPLOAD_RSS_BUDGET_KB, (
+        f"Peak RSS grew by {stats['growth_kb'] // 1024}MB while saving a 100MB upload"
+    )
+
+
+def test_save_upload_file_rejects_oversize_while_streaming(tmp_path, monkeypatch):
+    """
+    The size limit is enforced on received bytes, not the client-reported size.
+    The partially written file must be removed.
+    """
+    import asyncio
+    import app.api.upload_utils as upload_utils
+    from fastapi import HTTPException, UploadFile
+
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(upload_utils, "MAX_FILE_SIZE", 1024)
+    monkeypatch.setattr(upload_utils, "UPLOAD_CHUNK_SIZE", 256)
+
+    upload = UploadFile(file=io.BytesIO(b"x" * 2048), filename="big.txt")
+    try:
+        asyncio.run(upload_utils.stream_upload_file(upload, tmp_path / "big.txt", max_size=1024))
+        raise AssertionError("Expected HTTPException for oversized upload")
+    except HTTPException as exc:
+        assert exc.status_code == 413
+    assert not (tmp_path / "big.txt").exists()
+
+
+def test_stream_upload_file_returns_size_and_sha256(tmp_path):
+    """stream_upload_file computes the byte count and SHA-256 in one pass."""
+    import asyncio
+    import hashlib
+    from fastapi import UploadFile
+    from app.api.upload_utils import stream_upload_file
+
+    content = b"resume attachment" * 1000
+    upload = UploadFile(file=io.BytesIO(content), filename="a.txt")
+    size, digest = asyncio.run(stream_upload_file(upload, tmp_path / "a.txt"))
+
+    assert size == len(content)
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert (tmp_path / "a.txt").read_bytes() == content
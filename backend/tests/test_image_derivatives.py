@@ -0,0 +1,184 @@
+"""
+Tests for the image derivative pipeline (thumbnails / WebP renditions).
+"""
+import io
+from concurrent.futures import Future
+
+import pytest
+from PIL import Image
+
+from app.db import file_transactions
+from app.services import image_derivatives
+
+
+class InlineExecutor:
+    """Runs submitted work immediately instead of in a process pool."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    import app.api.upload_utils as upload_utils
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def inline_pipeline(monkeypatch):
+    monkeypatch.setattr(image_derivatives, "_get_executor", lambda: InlineExecutor())
+
+
+def _jpeg_with_exif(width=3000, height=1500) -> bytes:
+    image = Image.new("RGB", (width, height), (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x0110] = "Secret Camera"  # Model
+    exif[0x0112] = 6  # Orientation: rotate 90° CW for display
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def test_render_derivatives_bounds_size_applies_orientation_and_strips_exif(tmp_path):
+    source = tmp_path / "photo.jpg"
+    source.write_bytes(_jpeg_with_exif())
+
+    written = image_derivatives.render_derivatives(str(source), str(tmp_path / "out"))
+    assert len(written) == len(image_derivatives.DERIVATIVE_VARIANTS)
+
+    for variant, max_edge in image_derivatives.DERIVATIVE_VARIANTS.items():
+        with Image.open(tmp_path / "out" / f"{variant}.webp") as rendition:
+            assert rendition.format == "WEBP"
+            assert max(rendition.size) <= max_edge
+            # Orientation 6 was applied, so the landscape source is now portrait
+            assert rendition.size[1] > rendition.size[0]
+            assert not rendition.getexif()
+
+
+def test_image_upload_exposes_variants(client, auth_headers, upload_dir, inline_pipeline):
+    response = client.post(
+        "/api/projects/upload",
+        data={"title_en": "Photo"},
+        files={"file": ("photo.jpg", io.BytesIO(_jpeg_with_exif(800, 600)), "image/jpeg")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert set(body["attachment_variants"]) == set(image_derivatives.DERIVATIVE_VARIANTS)
+    assert body["attachment_preview_url"] == body["attachment_variants"]["thumb"]
+
+    file_transactions.wait_for_pending()
+    thumb = client.get(body["attachment_preview_url"])
+    assert thumb.status_code == 200
+    assert thumb.headers["content-type"] == "image/webp"
+    assert "immutable" in thumb.headers["cache-control"]
+
+
+def test_pending_derivative_redirects_to_original(client, auth_headers, upload_dir, monkeypatch):
+    monkeypatch.setattr(image_derivatives, "schedule_derivatives", lambda *args: None)
+    body = client.post(
+        "/api/projects/upload",
+        data={"title_en": "Photo"},
+        files={"file": ("photo.png", io.BytesIO(_png()), "image/png")},
+        headers=auth_headers,
+    ).json()
+
+    response = client.get(body["attachment_variants"]["medium"], follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == body["attachment_url"]
+
+
+def test_non_image_has_no_variants(client, auth_headers, upload_dir):
+    body = client.post(
+        "/api/projects/upload",
+        data={"title_en": "Doc"},
+        files={"file": ("cv.pdf", io.BytesIO(b"%PDF-1.4"), "application/pdf")},
+        headers=auth_headers,
+    ).json()
+    assert body["attachment_variants"] is None
+    assert body["attachment_preview_url"] == body["attachment_url"]
+
+
+def _png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (64, 64), (0, 0, 255, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_downloads_never_schedule_renders(client, auth_headers, upload_dir, monkeypatch):
+    calls = []
+    monkeypatch.setattr(image_derivatives, "schedule_derivatives", lambda *args: calls.append(args))
+    body = client.post(
+        "/api/projects/upload",
+        data={"title_en": "Photo"},
+        files={"file": ("photo.png", io.BytesIO(_png()), "image/png")},
+        headers=auth_headers,
+    ).json()
+    file_transactions.wait_for_pending()
+    assert len(calls) == 1
+
+    for _ in range(20):
+        response = client.get(body["attachment_variants"]["thumb"], follow_redirects=False)
+        assert response.status_code == 307
+    assert len(calls) == 1
+
+
+class PendingExecutor:
+    """Accepts work and leaves it pending until the test finishes it."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+def test_one_render_per_hash_at_a_time(tmp_path, monkeypatch):
+    executor = PendingExecutor()
+    monkeypatch.setattr(image_derivatives, "_get_executor", lambda: executor)
+    source = tmp_path / "a.png"
+    source.write_bytes(_png())
+    sha = "ab" * 32
+
+    assert image_derivatives.schedule_derivatives(source, tmp_path, sha) is not None
+    for _ in range(20):
+        assert image_derivatives.schedule_derivatives(source, tmp_path, sha) is None
+    assert len(executor.futures) == 1
+
+    executor.futures[0].set_result([])
+    assert sha not in image_derivatives._pending
+
+
+def test_failed_render_is_not_retried(tmp_path, inline_pipeline):
+    source = tmp_path / "broken.jpg"
+    source.write_bytes(b"not an image")
+    sha = "cd" * 32
+
+    future = image_derivatives.schedule_derivatives(source, tmp_path, sha)
+    assert future.exception() is not None
+    assert (image_derivatives.derived_dir(tmp_path, sha) / image_derivatives.FAILED_MARKER).exists()
+    assert sha not in image_derivatives._pending
+    assert image_derivatives.schedule_derivatives(source, tmp_path, sha) is None
+
+    # Deleting the derivatives (last reference released) clears the marker
+    image_derivatives.delete_derivatives(tmp_path, sha)
+    assert not image_derivatives.derived_dir(tmp_path, sha).exists()
+
+
+def test_render_refuses_images_over_the_pixel_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", Image.MAX_IMAGE_PIXELS)
+    # Between the cap and twice the cap, where Pillow itself only warns
+    monkeypatch.setattr(image_derivatives, "MAX_IMAGE_PIXELS", 4000)
+    source = tmp_path / "photo.jpg"
+    source.write_bytes(_jpeg_with_exif(100, 50))
+    with pytest.raises(ValueError):
+        image_derivatives.render_derivatives(str(source), str(tmp_path / "out"))
+    assert not list((tmp_path / "out").glob("*.webp"))
@@ -0,0 +1,119 @@
+"""
+Tests for login admission control: bcrypt runs on the password pool (not the
+event loop), pending verifications are capped, and attempts are throttled
+per client IP and per username.
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+import app.api.endpoints.auth as auth_module
+import app.core.security as security
+from app.core.config import settings
+from app.core.login_throttle import LoginThrottle
+
+LOGIN_URL = "/api/auth/login"
+
+
+@pytest.fixture(autouse=True)
+def fresh_throttles(monkeypatch):
+    monkeypatch.setattr(auth_module, "ip_throttle", LoginThrottle(burst=100, per_minute=60))
+    monkeypatch.setattr(auth_module, "username_throttle", LoginThrottle(burst=100, per_minute=60))
+    # TestClient connects as "testclient", httpx.ASGITransport as 127.0.0.1
+    monkeypatch.setattr(settings, "LOGIN_TRUSTED_PROXIES", ["testclient", "127.0.0.1"])
+
+
+def _login(client, password="testpassword", username="testuser", ip="10.0.0.1"):
+    return client.post(
+        LOGIN_URL,
+        data={"username": username, "password": password},
+        headers={"X-Real-IP": ip},
+    )
+
+
+def test_login_success_and_failure(client, auth_headers):
+    assert "access_token" in _login(client).json()
+    assert _login(client, password="wrong").status_code == 401
+
+
+def test_username_bucket_rejects_fast(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(auth_module, "username_throttle", LoginThrottle(burst=2, per_minute=1))
+    assert _login(client, password="wrong", ip="10.0.0.1").status_code == 401
+    assert _login(client, password="wrong", ip="10.0.0.2").status_code == 401
+
+    # Another IP does not help; the username bucket is empty
+    response = _login(client, ip="10.0.0.3")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_ip_bucket_rejects_fast(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(auth_module, "ip_throttle", LoginThrottle(burst=1, per_minute=1))
+    assert _login(client, username="nobody").status_code == 401
+    assert _login(client).status_code == 429
+    assert _login(client, ip="10.0.0.9").status_code == 200
+
+
+def test_forged_ip_header_ignored_from_untrusted_peer(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_TRUSTED_PROXIES", ["127.0.0.1"])
+    monkeypatch.setattr(auth_module, "ip_throttle", LoginThrottle(burst=2, per_minute=1))
+    # A new X-Real-IP per attempt does not get a new bucket
+    assert _login(client, password="wrong", ip="10.0.0.1").status_code == 401
+    assert _login(client, password="wrong", ip="10.0.0.2").status_code == 401
+    assert _login(client, password="wrong", ip="10.0.0.3").status_code == 429
+
+
+def test_trusted_proxy_networks(monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_TRUSTED_PROXIES", ["172.28.0.0/16", "::1"])
+    assert auth_module._is_trusted_proxy("172.28.0.10")
+    assert auth_module._is_trusted_proxy("::1")
+    assert not auth_module._is_trusted_proxy("203.0.113.5")
+    assert not auth_module._is_trusted_proxy("testclient")
+
+
+def test_token_bucket_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.login_throttle.time.monotonic", lambda: now[0])
+    bucket = LoginThrottle(burst=1, per_minute=6)
+    assert bucket.try_acquire("k") == 0
+    assert bucket.try_acquire("k") == pytest.approx(10)
+    now[0] += 10
+    assert bucket.try_acquire("k") == 0
+
+
+def test_pending_verification_cap_returns_503(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(security, "_verify_slots", threading.BoundedSemaphore(1))
+    security._verify_slots.acquire()
+    response = _login(client)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_login_does_not_block_event_loop(client, auth_headers, monkeypatch):
+    """A slow hash runs on the pool; other requests are served meanwhile."""
+    def slow_verify(plain, hashed):
+        time.sleep(0.5)
+        return True
+
+    monkeypatch.setattr(security, "verify_password", slow_verify)
+    app = client.app
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            login = asyncio.create_task(ac.post(
+                LOGIN_URL, data={"username": "testuser", "password": "x"}, headers={"X-Real-IP": "1.2.3.4"}
+            ))
+            await asyncio.sleep(0.05)
+            start = time.perf_counter()
+            health = await ac.get("/health")
+            health_latency = time.perf_counter() - start
+            return await login, health, health_latency
+
+    login, health, latency = asyncio.run(scenario())
+    assert login.status_code == 200
+    assert health.status_code == 200
+    assert latency < 0.25
@@ -0,0 +1,147 @@
+"""
+Tests for the Prometheus metrics registry (app.core.metrics), the request
+metrics middleware and the /metrics endpoint.
+"""
+import asyncio
+
+from app.core import metrics
+from app.core.config import settings
+from app.middleware.metrics import UPLOAD_BYTES, MetricsMiddleware
+
+
+def _lines(name: str):
+    return [line for line in metrics.render().splitlines() if line.startswith(name)]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_histogram_seconds", "Test histogram", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert _lines("test_histogram_seconds") == [
+        'test_histogram_seconds_bucket{le="0.1"} 2',
+        'test_histogram_seconds_bucket{le="1"} 3',
+        'test_histogram_seconds_bucket{le="+Inf"} 4',
+        "test_histogram_seconds_sum 3.65",
+        "test_histogram_seconds_count 4",
+    ]
+
+
+def test_labelled_counter_and_escaping():
+    counter = metrics.Counter("test_labelled_total", "Test counter", ("path",))
+    counter.labels('a"b\\c').inc()
+    counter.labels('a"b\\c').inc(2)
+    counter.labels("plain").inc()
+
+    assert _lines("test_labelled_total") == [
+        'test_labelled_total{path="a\\"b\\\\c"} 3',
+        'test_labelled_total{path="plain"} 1',
+    ]
+    assert "# TYPE test_labelled_total counter" in metrics.render()
+
+
+def test_duplicate_registration_is_rejected():
+    metrics.Gauge("test_duplicate", "Test gauge")
+    try:
+        metrics.Gauge("test_duplicate", "Test gauge")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("duplicate metric registered")
+
+
+def test_collector_errors_and_empty_samples_are_skipped():
+    def broken():
+        raise RuntimeError("boom")
+
+    metrics.register_collector("test_broken", "gauge", "Broken collector", broken)
+    metrics.register_collector("test_empty", "gauge", "Empty collector", lambda: [])
+    metrics.register_collector("test_value", "gauge", "Value collector", lambda: [({"k": "v"}, 7)])
+
+    text = metrics.render()
+    assert "test_broken" not in text
+    assert "test_empty" not in text
+    assert 'test_value{k="v"} 7' in text
+
+
+def test_metrics_endpoint_reports_route_templates(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_IPS", ["testclient"])
+    client.get("/api/education/")
+    client.get("/api/education/12345")
+    client.get("/no-such-path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/api/education/",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="/api/education/{item_id}",status="404"}' in text
+    assert 'http_requests_total{method="GET",route="unrouted",status="404"}' in text
+    # Raw paths never become label values
+    assert "12345" not in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/education/",le="+Inf"}' in text
+    assert 'cache_requests_total{cache="auth",result="hit"}' in text
+    assert 'single_flight_calls_total{flight="education",outcome="executed"}' in text
+    assert 'admission_admitted_total{class="public_read"}' in text
+    assert "db_sessions_total" in text
+
+
+def test_unknown_methods_share_one_label(client):
+    for method in ("FOO", "BAR", "PROPFIND"):
+        client.request(method, "/no-such-path")
+
+    text = metrics.render()
+    assert 'http_requests_total{method="OTHER",route="unrouted",status="404"}' in text
+    for method in ("FOO", "BAR", "PROPFIND"):
+        assert f'method="{method}"' not in text
+
+
+def test_metrics_endpoint_refuses_other_peers(client, monkeypatch):
+    # The published backend port: the peer is not in the allowlist
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_IPS", ["127.0.0.1", "::1"])
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"X-Real-IP": "127.0.0.1"}).status_code == 403
+
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_IPS", ["10.0.0.0/8"])
+    assert client.get("/metrics").status_code == 403
+
+
+def test_metrics_endpoint_accepts_bearer_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_IPS", [])
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Basic scrape-secret"}).status_code == 403
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
+
+
+def test_upload_body_bytes_are_counted():
+    async def app(scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def scenario():
+        messages = [
+            {"type": "http.request", "body": b"x" * 300, "more_body": True},
+            {"type": "http.request", "body": b"y" * 200, "more_body": False},
+        ]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            pass
+
+        scope = {
+            "type": "http", "method": "POST", "path": "/api/projects/1/attachments",
+            "headers": [(b"content-type", b"multipart/form-data; boundary=x")],
+        }
+        await MetricsMiddleware(app)(scope, receive, send)
+
+    before = UPLOAD_BYTES.labels("attachment").value
+    asyncio.run(scenario())
+    assert UPLOAD_BYTES.labels("attachment").value - before == 500
@@ -0,0 +1,131 @@
+"""
+Tests for PriorityAdmissionMiddleware: per-class concurrency limits and
+queues, 503 + Retry-After when full, and lower classes shed first.
+"""
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.middleware.priority import PriorityAdmissionMiddleware, classify_priority
+
+MULTIPART = {"Content-Type": "multipart/form-data; boundary=x"}
+
+
+def _app(release: asyncio.Event, limits, queue_depths, queue_timeout=5.0):
+    async def slow(request):
+        await request.body()
+        if request.query_params.get("hold"):
+            await release.wait()
+        return JSONResponse({"ok": True})
+
+    app = Starlette(routes=[
+        Route("/api/projects/upload", slow, methods=["POST"]),
+        Route("/api/projects/", slow, methods=["GET", "POST"]),
+        Route("/health", slow, methods=["GET"]),
+    ])
+    full_limits = {"public_read": 10, "admin_write": 10, "bulk": 10, "export": 10, **limits}
+    return PriorityAdmissionMiddleware(
+        app, limits=full_limits, queue_depths=queue_depths, queue_timeout=queue_timeout, retry_after=3
+    )
+
+
+async def _until(predicate):
+    while not predicate():
+        await asyncio.sleep(0)
+
+
+def _client(gate):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=gate), base_url="http://test")
+
+
+def test_classification():
+    def scope(method, path, content_type=None):
+        headers = [(b"content-type", content_type.encode())] if content_type else []
+        return {"type": "http", "method": method, "path": path, "headers": headers}
+
+    assert classify_priority(scope("GET", "/api/projects/")) == "public_read"
+    assert classify_priority(scope("PUT", "/api/projects/1")) == "admin_write"
+    assert classify_priority(scope("POST", "/api/projects/upload", "multipart/form-data; boundary=x")) == "bulk"
+    assert classify_priority(scope("GET", "/api/import/database/export/")) == "export"
+
+
+def test_full_bulk_class_does_not_block_public_reads():
+    async def scenario():
+        release = asyncio.Event()
+        gate = _app(release, {"bulk": 1}, {})
+        async with _client(gate) as client:
+            upload = asyncio.create_task(
+                client.post("/api/projects/upload?hold=1", content=b"x", headers=MULTIPART)
+            )
+            await _until(lambda: gate.gates["bulk"].active == 1)
+            second = await client.post("/api/projects/upload", content=b"x", headers=MULTIPART)
+            read = await client.get("/api/projects/")
+            release.set()
+            return await upload, second, read, gate.stats()
+
+    upload, second, read, stats = asyncio.run(scenario())
+    assert upload.status_code == 200
+    assert second.status_code == 503
+    assert second.headers["Retry-After"] == "3"
+    assert read.status_code == 200
+    assert stats["bulk"]["shed"] == 1
+
+
+def test_queued_request_runs_when_slot_frees():
+    async def scenario():
+        release = asyncio.Event()
+        gate = _app(release, {"admin_write": 1}, {"admin_write": 1})
+        async with _client(gate) as client:
+            first = asyncio.create_task(client.post("/api/projects/?hold=1", json={}))
+            await _until(lambda: gate.gates["admin_write"].active == 1)
+            queued = asyncio.create_task(client.post("/api/projects/", json={}))
+            await _until(lambda: gate.gates["admin_write"].queued == 1)
+            overflow = await client.post("/api/projects/", json={})
+            release.set()
+            return await first, await queued, overflow
+
+    first, queued, overflow = asyncio.run(scenario())
+    assert first.status_code == 200
+    assert queued.status_code == 200
+    assert overflow.status_code == 503
+
+
+def test_queue_timeout_returns_503():
+    async def scenario():
+        release = asyncio.Event()
+        gate = _app(release, {"admin_write": 1}, {"admin_write": 1}, queue_timeout=0.05)
+        async with _client(gate) as client:
+            first = asyncio.create_task(client.post("/api/projects/?hold=1", json={}))
+            await _until(lambda: gate.gates["admin_write"].active == 1)
+            timed_out = await client.post("/api/projects/", json={})
+            release.set()
+            await first
+            return timed_out, gate.gates["admin_write"]
+
+    timed_out, admin_gate = asyncio.run(scenario())
+    assert timed_out.status_code == 503
+    assert admin_gate.active == 0 and admin_gate.queued == 0
+
+
+def test_lower_priority_shed_while_public_reads_queue():
+    async def scenario():
+        release = asyncio.Event()
+        gate = _app(release, {"public_read": 1}, {"public_read": 4, "admin_write": 4})
+        async with _client(gate) as client:
+            running = asyncio.create_task(client.get("/api/projects/?hold=1"))
+            await _until(lambda: gate.gates["public_read"].active == 1)
+            waiting = asyncio.create_task(client.get("/api/projects/"))
+            await _until(lambda: gate.gates["public_read"].queued == 1)
+            # admin_write has free slots, but public reads are backed up
+            write = await client.post("/api/projects/", json={})
+            health = await client.get("/health")
+            release.set()
+            return await running, await waiting, write, health
+
+    running, waiting, write, health = asyncio.run(scenario())
+    assert running.status_code == 200 and waiting.status_code == 200
+    assert write.status_code == 503
+    assert health.status_code == 200
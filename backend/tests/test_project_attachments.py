@@ -0,0 +1,135 @@
+"""
+Tests for the multi-file ProjectAttachment API.
+Several files are uploaded in one multipart request, stored content-addressed
+and inserted in one transaction; attachments can be bulk deleted and reordered.
+"""
+import io
+
+import pytest
+
+from app.db import file_transactions
+from app.models.project import Project, ProjectDetail, ProjectAttachment
+from app.models.stored_file import StoredFile
+from app.models.work_experience import WorkExperience
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    import app.api.upload_utils as upload_utils
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def detail(db_session):
+    project = Project(title_en="Demo")
+    project.details.append(ProjectDetail(description_en="Detail"))
+    db_session.add(project)
+    db_session.commit()
+    return project.details[0]
+
+
+def _url(detail):
+    return f"/api/projects/{detail.project_id}/details/{detail.id}/attachments"
+
+
+def _upload(client, auth_headers, detail, names):
+    files = [("files", (name, io.BytesIO(f"content of {name}".encode()), "application/octet-stream"))
+             for name in names]
+    return client.post(_url(detail), files=files, headers=auth_headers)
+
+
+def test_upload_multiple_files_in_one_request(client, auth_headers, upload_dir, detail, db_session):
+    response = _upload(client, auth_headers, detail, ["a.pdf", "b.png", "c.docx"])
+    assert response.status_code == 201, response.text
+
+    body = response.json()
+    assert [a["file_name"] for a in body] == ["a.pdf", "b.png", "c.docx"]
+    assert [a["file_type"] for a in body] == ["pdf", "png", "word"]
+    assert [a["display_order"] for a in body] == [0, 1, 2]
+    for attachment in body:
+        assert (upload_dir / attachment["file_url"][len("/uploads/"):]).exists()
+    assert db_session.query(StoredFile).count() == 3
+    # No temp files left behind
+    assert not list(upload_dir.glob(".upload-*"))
+
+    # A second batch is appended after the existing attachments
+    more = _upload(client, auth_headers, detail, ["d.txt"])
+    assert more.json()[0]["display_order"] == 3
+
+
+def test_invalid_part_rejects_whole_request(client, auth_headers, upload_dir, detail, db_session):
+    response = _upload(client, auth_headers, detail, ["a.pdf", "evil.exe"])
+    assert response.status_code == 400
+    assert db_session.query(ProjectAttachment).count() == 0
+    assert not any(p.is_file() for p in upload_dir.rglob("*"))
+
+
+def test_unknown_detail_returns_404(client, auth_headers, upload_dir, detail):
+    files = [("files", ("a.pdf", io.BytesIO(b"x"), "application/pdf"))]
+    response = client.post(
+        f"/api/projects/{detail.project_id}/details/9999/attachments",
+        files=files, headers=auth_headers,
+    )
+    assert response.status_code == 404
+
+
+def test_bulk_delete_releases_files(client, auth_headers, upload_dir, detail, db_session):
+    body = _upload(client, auth_headers, detail, ["a.pdf", "b.pdf", "c.pdf"]).json()
+    doomed = [body[0]["id"], body[2]["id"]]
+
+    response = client.request("DELETE", _url(detail), json={"ids": doomed}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    file_transactions.wait_for_pending()
+
+    remaining = client.get(_url(detail)).json()
+    assert [a["id"] for a in remaining] == [body[1]["id"]]
+    assert not (upload_dir / body[0]["file_url"][len("/uploads/"):]).exists()
+    assert (upload_dir / body[1]["file_url"][len("/uploads/"):]).exists()
+    assert db_session.query(StoredFile).count() == 1
+
+
+def test_bulk_delete_unknown_id_changes_nothing(client, auth_headers, upload_dir, detail):
+    body = _upload(client, auth_headers, detail, ["a.pdf"]).json()
+    response = client.request(
+        "DELETE", _url(detail), json={"ids": [body[0]["id"], 9999]}, headers=auth_headers
+    )
+    assert response.status_code == 404
+    assert len(client.get(_url(detail)).json()) == 1
+
+
+def test_reorder(client, auth_headers, upload_dir, detail):
+    body = _upload(client, auth_headers, detail, ["a.pdf", "b.pdf", "c.pdf"]).json()
+    new_order = [body[2]["id"], body[0]["id"], body[1]["id"]]
+
+    response = client.put(_url(detail) + "/order", json={"ids": new_order}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert [a["id"] for a in response.json()] == new_order
+    assert [a["display_order"] for a in response.json()] == [0, 1, 2]
+
+    # Must name every attachment exactly once
+    partial = client.put(_url(detail) + "/order", json={"ids": new_order[:2]}, headers=auth_headers)
+    assert partial.status_code == 400
+
+
+def test_deleting_project_releases_detail_attachments(client, auth_headers, upload_dir, detail, db_session):
+    _upload(client, auth_headers, detail, ["a.pdf"])
+    response = client.delete(f"/api/projects/{detail.project_id}", headers=auth_headers)
+    assert response.status_code == 200
+    file_transactions.wait_for_pending()
+    assert db_session.query(StoredFile).count() == 0
+    assert not any(p.is_file() for p in upload_dir.rglob("*"))
+
+
+def test_deleting_experience_releases_detail_attachments(client, auth_headers, upload_dir, detail, db_session):
+    experience = WorkExperience(company_en="Demo")
+    experience.projects.append(db_session.get(Project, detail.project_id))
+    db_session.add(experience)
+    db_session.commit()
+    _upload(client, auth_headers, detail, ["a.pdf", "b.png"])
+
+    response = client.delete(f"/api/work-experience/{experience.id}", headers=auth_headers)
+    assert response.status_code == 204
+    file_transactions.wait_for_pending()
+    assert db_session.query(StoredFile).count() == 0
+    assert not any(p.is_file() for p in upload_dir.rglob("*"))
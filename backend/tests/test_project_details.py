@@ -0,0 +1,85 @@
+"""
+Tests for PUT /api/projects/{id}/details: the editor sends the full ordered
+detail list and the server applies the inserts / updates / deletes at once.
+"""
+import io
+
+import pytest
+
+from app.db import file_transactions
+from app.models.project import Project, ProjectDetail, ProjectAttachment
+from app.models.stored_file import StoredFile
+
+
+@pytest.fixture
+def project(db_session):
+    project = Project(title_en="Demo")
+    project.details.extend([
+        ProjectDetail(description_en="first", display_order=0),
+        ProjectDetail(description_en="second", display_order=1),
+        ProjectDetail(description_en="third", display_order=2),
+    ])
+    db_session.add(project)
+    db_session.commit()
+    return project
+
+
+def test_get_details_in_order(client, project):
+    response = client.get(f"/api/projects/{project.id}/details")
+    assert response.status_code == 200
+    assert [d["description_en"] for d in response.json()] == ["first", "second", "third"]
+
+
+def test_sync_inserts_updates_deletes_and_reorders(client, auth_headers, project, db_session):
+    first, second, third = (d.id for d in project.details)
+    payload = [
+        {"id": third, "description_en": "third (edited)"},
+        {"description_en": "new", "description_zh": "新"},
+        {"id": first, "description_en": "first"},
+    ]
+    response = client.put(f"/api/projects/{project.id}/details", json=payload, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    body = response.json()
+    assert [d["description_en"] for d in body] == ["third (edited)", "new", "first"]
+    assert [d["display_order"] for d in body] == [0, 1, 2]
+    assert body[0]["id"] == third and body[2]["id"] == first
+    assert body[1]["description_zh"] == "新"
+    assert db_session.query(ProjectDetail).filter(ProjectDetail.id == second).first() is None
+
+
+def test_sync_unknown_id_changes_nothing(client, auth_headers, project, db_session):
+    response = client.put(
+        f"/api/projects/{project.id}/details",
+        json=[{"id": 9999, "description_en": "x"}],
+        headers=auth_headers,
+    )
+    assert response.status_code == 404
+    assert db_session.query(ProjectDetail).count() == 3
+
+
+def test_sync_requires_auth(client, project):
+    response = client.put(f"/api/projects/{project.id}/details", json=[])
+    assert response.status_code == 401
+
+
+def test_sync_releases_attachments_of_removed_details(client, auth_headers, project, db_session, tmp_path, monkeypatch):
+    import app.api.upload_utils as upload_utils
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path)
+
+    detail = project.details[0]
+    upload = client.post(
+        f"/api/projects/{project.id}/details/{detail.id}/attachments",
+        files=[("files", ("a.pdf", io.BytesIO(b"%PDF attachment"), "application/pdf"))],
+        headers=auth_headers,
+    )
+    assert upload.status_code == 201, upload.text
+
+    response = client.put(f"/api/projects/{project.id}/details", json=[], headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == []
+    file_transactions.wait_for_pending()
+
+    assert db_session.query(ProjectAttachment).count() == 0
+    assert db_session.query(StoredFile).count() == 0
+    assert not any(p.is_file() for p in tmp_path.rglob("*"))
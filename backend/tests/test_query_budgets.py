@@ -0,0 +1,106 @@
+"""
+SQL query budgets of the public endpoints (query_budget fixture in conftest).
+
+Every budget holds however many rows there are, so a lazy load per row or a
+commit per row fails here instead of slowing the site down later. The data
+has several experiences, each with several projects, details and
+attachments, so a per-row query would exceed the budget.
+"""
+from datetime import date
+
+import pytest
+
+from app.models.certification import Certification, Language
+from app.models.education import Education
+from app.models.personal_info import PersonalInfo
+from app.models.project import Project, ProjectAttachment, ProjectDetail
+from app.models.publication import GithubProject, Publication
+from app.models.work_experience import WorkExperience
+
+
+@pytest.fixture
+def resume_data(db_session):
+    db_session.add(PersonalInfo(name_en="Test"))
+    for i in range(3):
+        experience = WorkExperience(company_en=f"Company {i}", start_date=date(2020, 1, 1), display_order=i)
+        for j in range(3):
+            project = Project(title_en=f"Project {i}.{j}", display_order=j)
+            for k in range(2):
+                detail = ProjectDetail(description_en=f"Detail {k}", display_order=k)
+                detail.attachments.append(
+                    ProjectAttachment(file_name="a.pdf", file_url="/uploads/a.pdf", file_type="pdf")
+                )
+                project.details.append(detail)
+            experience.projects.append(project)
+        db_session.add(experience)
+        db_session.add(Education(school_en=f"School {i}", display_order=i))
+        db_session.add(Certification(name_en=f"Cert {i}", display_order=i))
+        db_session.add(Language(language_en=f"Language {i}", display_order=i))
+        db_session.add(Publication(title=f"Paper {i}", display_order=i))
+        db_session.add(GithubProject(name_en=f"Repo {i}", display_order=i))
+    db_session.commit()
+    return db_session
+
+
+def test_work_experience_list_budget(client, resume_data, query_budget):
+    with query_budget(2):
+        response = client.get("/api/work-experience/")
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body) == 3
+    assert all(len(p["details"]) == 2 for e in body for p in e["projects"])
+    assert body[0]["projects"][0]["details"][0]["attachments"][0]["file_name"] == "a.pdf"
+
+
+def test_work_experience_item_budget(client, resume_data, query_budget):
+    experience_id = resume_data.query(WorkExperience).first().id
+    with query_budget(2):
+        response = client.get(f"/api/work-experience/{experience_id}")
+    assert response.status_code == 200
+    assert len(response.json()["projects"]) == 3
+
+
+def test_resume_budget(client, resume_data, query_budget):
+    with query_budget(9):
+        response = client.get("/api/resume/")
+    assert response.status_code == 200
+    assert len(response.json()["work_experience"]) == 3
+    # Served from the snapshot until the data changes
+    with query_budget(0):
+        assert client.get("/api/resume/").status_code == 200
+
+
+@pytest.mark.parametrize("path", [
+    "/api/education/",
+    "/api/certifications/",
+    "/api/languages/",
+    "/api/publications/",
+    "/api/github-projects/",
+    "/api/projects/",
+])
+def test_list_budget(client, resume_data, query_budget, path):
+    with query_budget(1):
+        response = client.get(path)
+    assert response.status_code == 200
+    assert len(response.json()) >= 3
+
+
+def test_project_details_budget(client, resume_data, query_budget):
+    project_id = resume_data.query(Project).first().id
+    with query_budget(3):
+        response = client.get(f"/api/projects/{project_id}/details")
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+def test_project_details_sync_budget(client, auth_headers, resume_data, query_budget):
+    # Bulk INSERT / UPDATE / DELETE: five new details are still one INSERT
+    project = resume_data.query(Project).first()
+    first, second = (d.id for d in project.details)
+    payload = [{"id": second, "description_en": "edited"}] + [
+        {"description_en": f"new {n}"} for n in range(5)
+    ]
+    with query_budget(10):
+        response = client.put(f"/api/projects/{project.id}/details", json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 6
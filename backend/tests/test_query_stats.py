@@ -0,0 +1,84 @@
+"""
+Tests for per-request SQL statistics: app.db.query_stats hooks and
+QueryStatsMiddleware (Server-Timing header, slow-query log, N+1 warning).
+"""
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import query_stats
+from app.middleware.query_stats import N_PLUS_ONE, QueryStatsMiddleware
+from app.models.project import Project
+
+
+def _run(app, threshold=5):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/test", "headers": []}
+    asyncio.run(QueryStatsMiddleware(app, n_plus_one_threshold=threshold)(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+def _querying_app(db, statements):
+    async def app(scope, receive, send):
+        for statement in statements:
+            db.execute(text(statement))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    return app
+
+
+def test_statements_are_counted_per_request(db_session):
+    headers = _run(_querying_app(db_session, ["SELECT 1", "SELECT 2", "SELECT 3"]))
+    server_timing = headers[b"server-timing"].decode()
+    assert server_timing.startswith("db;dur=")
+    assert server_timing.endswith('desc="3 queries"')
+    assert query_stats.current() is None
+
+
+def test_no_header_without_queries(db_session):
+    assert b"server-timing" not in _run(_querying_app(db_session, []))
+
+
+def test_repeated_statement_is_flagged_as_n_plus_one(db_session, caplog):
+    before = N_PLUS_ONE.labels("unrouted").value
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_stats"):
+        _run(_querying_app(db_session, ["SELECT 1"] + ["SELECT 42"] * 6))
+    assert N_PLUS_ONE.labels("unrouted").value - before == 1
+    assert "statement executed 6 times: SELECT 42" in caplog.text
+    assert "SELECT 1:" not in caplog.text
+
+
+def test_slow_queries_are_logged(db_session, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.000001)
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_queries"):
+        db_session.execute(text("SELECT 7"))
+    assert "Slow query" in caplog.text
+    assert "SELECT 7" in caplog.text
+
+
+def test_failed_statement_does_not_leak_timers(db_session):
+    conn = db_session.connection()
+    try:
+        conn.execute(text("SELECT * FROM no_such_table"))
+    except Exception:
+        pass
+    assert not conn.info.get("query_start_time")
+
+
+def test_server_timing_on_api_response(client, db_session):
+    db_session.add(Project(title_en="Demo"))
+    db_session.commit()
+
+    response = client.get("/api/projects/")
+    assert response.status_code == 200
+    assert 'desc="1 query"' in response.headers["server-timing"]
@@ -0,0 +1,130 @@
+"""
+Tests for the resumable chunked upload API (/api/uploads/sessions).
+"""
+import hashlib
+
+import pytest
+
+SESSIONS_URL = "/api/uploads/sessions"
+CONTENT = bytes(range(256)) * 400  # 100KB
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    import app.api.upload_utils as upload_utils
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+def _create_session(client, auth_headers, size=len(CONTENT), filename="big.pdf"):
+    response = client.post(SESSIONS_URL, json={
+        "filename": filename, "size": size, "content_type": "application/pdf"
+    }, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    return response.json()["upload_id"]
+
+
+def _put_chunk(client, auth_headers, upload_id, offset, data):
+    return client.put(
+        f"{SESSIONS_URL}/{upload_id}", params={"offset": offset}, content=data,
+        headers={**auth_headers, "Content-Type": "application/octet-stream"},
+    )
+
+
+def test_create_session_requires_auth(client):
+    response = client.post(SESSIONS_URL, json={"filename": "a.pdf", "size": 10})
+    assert response.status_code == 401
+
+
+def test_create_session_rejects_disallowed_type(client, auth_headers, upload_dir):
+    response = client.post(SESSIONS_URL, json={"filename": "a.exe", "size": 10}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_chunked_upload_resume_and_finalize_to_project(client, auth_headers, upload_dir):
+    """Chunks are appended at the server offset and finalize attaches the file."""
+    project = client.post("/api/projects/", json={"title_en": "P"}, headers=auth_headers).json()
+    upload_id = _create_session(client, auth_headers)
+
+    first = _put_chunk(client, auth_headers, upload_id, 0, CONTENT[:40000])
+    assert first.status_code == 200, first.text
+    assert first.json()["offset"] == 40000
+
+    # A retried chunk with a stale offset is refused and reports where to resume
+    stale = _put_chunk(client, auth_headers, upload_id, 0, CONTENT[:40000])
+    assert stale.status_code == 409
+    assert stale.headers["Upload-Offset"] == "40000"
+
+    status = client.get(f"{SESSIONS_URL}/{upload_id}", headers=auth_headers).json()
+    assert status["offset"] == 40000
+
+    # Finalizing before all bytes arrive is refused
+    early = client.post(f"{SESSIONS_URL}/{upload_id}/finalize", json={
+        "target": "project", "target_id": project["id"]
+    }, headers=auth_headers)
+    assert early.status_code == 409
+
+    rest = _put_chunk(client, auth_headers, upload_id, 40000, CONTENT[40000:])
+    assert rest.json()["offset"] == len(CONTENT)
+
+    done = client.post(f"{SESSIONS_URL}/{upload_id}/finalize", json={
+        "target": "project", "target_id": project["id"]
+    }, headers=auth_headers)
+    assert done.status_code == 200, done.text
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    assert done.json()["attachment_url"].endswith(f"/{sha256}.pdf")
+    assert done.json()["attachment_size"] == len(CONTENT)
+
+    stored = upload_dir / done.json()["attachment_url"].removeprefix("/uploads/")
+    assert stored.read_bytes() == CONTENT
+    assert not (upload_dir / ".sessions" / upload_id).exists()
+
+    updated = client.get(f"/api/projects/{project['id']}").json()
+    assert updated["attachment_url"] == done.json()["attachment_url"]
+    assert updated["attachment_name"] == "big.pdf"
+
+
+def test_finalize_to_work_experience(client, auth_headers, upload_dir):
+    experience = client.post("/api/work-experience/", json={"company_en": "Acme"}, headers=auth_headers).json()
+    upload_id = _create_session(client, auth_headers, size=5, filename="notes.txt")
+    assert _put_chunk(client, auth_headers, upload_id, 0, b"hello").status_code == 200
+
+    done = client.post(f"{SESSIONS_URL}/{upload_id}/finalize", json={
+        "target": "work_experience", "target_id": experience["id"]
+    }, headers=auth_headers)
+    assert done.status_code == 200, done.text
+    assert client.get(f"/api/work-experience/{experience['id']}").json()["attachment_size"] == 5
+
+
+def test_chunk_beyond_declared_size_rejected(client, auth_headers, upload_dir):
+    upload_id = _create_session(client, auth_headers, size=10, filename="a.txt")
+    response = _put_chunk(client, auth_headers, upload_id, 0, b"x" * 11)
+    assert response.status_code == 413
+    # The rejected chunk is discarded so the client can retry from offset 0
+    assert client.get(f"{SESSIONS_URL}/{upload_id}", headers=auth_headers).json()["offset"] == 0
+
+
+def test_abort_session(client, auth_headers, upload_dir):
+    upload_id = _create_session(client, auth_headers)
+    assert client.delete(f"{SESSIONS_URL}/{upload_id}", headers=auth_headers).status_code == 204
+    assert client.get(f"{SESSIONS_URL}/{upload_id}", headers=auth_headers).status_code == 404
+
+
+def test_only_idle_sessions_expire(client, auth_headers, upload_dir):
+    import os
+    import time
+    from app.api.endpoints.uploads import SESSION_TTL_SECONDS
+
+    old = time.time() - SESSION_TTL_SECONDS - 60
+    active = _create_session(client, auth_headers)
+    idle = _create_session(client, auth_headers)
+    for upload_id in (active, idle):
+        session_dir = upload_dir / ".sessions" / upload_id
+        for path in (session_dir, session_dir / "data.part", session_dir / "meta.json"):
+            os.utime(path, (old, old))
+    # Created a day ago, but still receiving chunks
+    assert _put_chunk(client, auth_headers, active, 0, CONTENT[:1000]).status_code == 200
+
+    _create_session(client, auth_headers)  # purges expired sessions
+    assert client.get(f"{SESSIONS_URL}/{active}", headers=auth_headers).json()["offset"] == 1000
+    assert client.get(f"{SESSIONS_URL}/{idle}", headers=auth_headers).status_code == 404
@@ -0,0 +1,80 @@
+"""
+Tests for GET /api/resume: the whole public résumé served from its shared
+snapshot, rebuilt when the database changes.
+"""
+import gzip
+
+import pytest
+
+from app.models.education import Education
+from app.models.personal_info import PersonalInfo
+from app.models.project import Project, ProjectDetail
+from app.models.work_experience import WorkExperience
+from app.services import resume_snapshot, snapshots
+
+
+@pytest.fixture
+def snapshot_file(client, tmp_path):
+    # After the client's lifespan, which configures in-memory snapshots
+    snapshots.configure(str(tmp_path / "snapshots"))
+    yield tmp_path / "snapshots" / "resume.snap"
+    snapshots.configure(None)
+
+
+@pytest.fixture
+def resume_data(db_session):
+    db_session.add(PersonalInfo(name_en="Polo", email="polo@example.com"))
+    experience = WorkExperience(company_en="Acme", display_order=0)
+    experience.projects.append(Project(
+        title_en="Portal",
+        details=[ProjectDetail(description_en="Built it", display_order=0)],
+    ))
+    db_session.add(experience)
+    db_session.add(Education(school_en="NTU", display_order=0))
+    db_session.commit()
+
+
+def test_get_resume_returns_all_sections(client, snapshot_file, resume_data):
+    response = client.get("/api/resume/")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["personal_info"]["name_en"] == "Polo"
+    assert body["work_experience"][0]["company_en"] == "Acme"
+    assert body["work_experience"][0]["projects"][0]["details"][0]["description_en"] == "Built it"
+    assert body["education"][0]["school_en"] == "NTU"
+    assert body["certifications"] == []
+    assert response.headers["x-snapshot-version"] == "1"
+    assert snapshot_file.is_file()
+
+
+def test_if_none_match_returns_304(client, snapshot_file, resume_data):
+    etag = client.get("/api/resume/").headers["etag"]
+    response = client.get("/api/resume/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_write_publishes_new_version(client, auth_headers, snapshot_file, resume_data):
+    first = client.get("/api/resume/")
+    builds = resume_snapshot.store.builds
+    assert client.get("/api/resume/").headers["x-snapshot-version"] == "1"
+    assert resume_snapshot.store.builds == builds
+
+    created = client.post("/api/education/", json={"school_en": "MIT", "display_order": 1}, headers=auth_headers)
+    assert created.status_code == 200
+
+    second = client.get("/api/resume/")
+    assert second.headers["x-snapshot-version"] == "2"
+    assert second.headers["etag"] != first.headers["etag"]
+    assert [e["school_en"] for e in second.json()["education"]] == ["NTU", "MIT"]
+
+
+def test_gzip_variant_when_accepted(client, snapshot_file, resume_data):
+    plain = client.get("/api/resume/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    with client.stream("GET", "/api/resume/", headers={"Accept-Encoding": "gzip"}) as streamed:
+        assert streamed.headers["content-encoding"] == "gzip"
+        assert streamed.headers["vary"] == "Accept-Encoding"
+        assert gzip.decompress(b"".join(streamed.iter_raw())) == plain.content
+        assert streamed.headers["etag"] != plain.headers["etag"]
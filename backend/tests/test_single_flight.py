@@ -0,0 +1,164 @@
+"""
+Tests for single-flight request collapsing (app.core.single_flight) and its
+use by the CRUD router factory.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.single_flight import SingleFlight, flights
+from app.db.base import get_db
+from app.models.education import Education
+
+
+def _counting(value, delay=0.01):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+
+    return fn, calls
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test-share")
+    fn, calls = _counting("result")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", fn, token=1) for _ in range(10)))
+
+    assert asyncio.run(run()) == ["result"] * 10
+    assert len(calls) == 1
+    assert flight.stats()["collapsed"] == 9
+    assert flight.stats()["in_flight"] == 0
+    assert flights["test-share"] is flight
+
+
+def test_new_token_starts_a_new_execution():
+    flight = SingleFlight("test-token")
+    fn, calls = _counting("result")
+
+    async def run():
+        return await asyncio.gather(flight.do("k", fn, token=1), flight.do("k", fn, token=2))
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert flight.collapsed == 0
+
+
+def test_exception_reaches_every_waiter_and_is_not_kept():
+    flight = SingleFlight("test-error", stale_seconds=60)
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", fail, token=1) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(calls) == 1
+    assert flight.errors == 1
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight("test-cancel")
+    fn, calls = _counting("result", delay=0.05)
+
+    async def run():
+        first = asyncio.create_task(flight.do("k", fn, token=1))
+        second = asyncio.create_task(flight.do("k", fn, token=1))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "result"
+    assert len(calls) == 1
+
+
+def test_stale_while_revalidate():
+    flight = SingleFlight("test-swr", stale_seconds=60)
+
+    async def run():
+        assert await flight.do("k", _counting("v1")[0], token=1) == "v1"
+        # Same token: kept result, no call
+        fn, calls = _counting("unused")
+        assert await flight.do("k", fn, token=1) == "v1"
+        assert calls == []
+        # Newer token: stale result at once, one refresh in the background
+        fn, calls = _counting("v2")
+        assert await flight.do("k", fn, token=2) == "v1"
+        assert await flight.do("k", fn, token=2) == "v1"
+        await asyncio.sleep(0.05)
+        assert len(calls) == 1
+        assert await flight.do("k", fn, token=2) == "v2"
+
+    asyncio.run(run())
+    assert flight.fresh_hits == 2
+    assert flight.stale_served == 2
+
+
+def test_stale_result_too_old_is_not_served():
+    flight = SingleFlight("test-swr-old", stale_seconds=0.01)
+
+    async def run():
+        await flight.do("k", _counting("v1")[0], token=1)
+        await asyncio.sleep(0.02)
+        return await flight.do("k", _counting("v2")[0], token=2)
+
+    assert asyncio.run(run()) == "v2"
+    assert flight.stale_served == 0
+
+
+@pytest.mark.parametrize("path", ["/api/education/", "/api/education/1"])
+def test_crud_reads_go_through_the_flight(client, db_session, path):
+    db_session.add(Education(school_en="NTU", display_order=0))
+    db_session.commit()
+    flight = flights["education"]
+    before = flight.executions
+
+    response = client.get(path)
+    assert response.status_code == 200
+    assert "NTU" in response.text
+    assert flight.executions == before + 1
+
+
+def test_crud_read_after_write_is_fresh(client, auth_headers, db_session):
+    assert client.get("/api/education/").json() == []
+    created = client.post("/api/education/", json={"school_en": "MIT"}, headers=auth_headers)
+    assert created.status_code == 200
+    assert [e["school_en"] for e in client.get("/api/education/").json()] == ["MIT"]
+    assert client.get("/api/education/999").status_code == 404
+
+
+@pytest.mark.parametrize("path", ["/api/education/", "/api/education/1", "/api/resume/"])
+def test_shared_load_does_not_use_the_request_session(client, db_session, path):
+    # The shared load may outlive the request (cancelled waiter, background
+    # refresh), so it must run on a session of its own
+    class RequestSession(Session):
+        def query(self, *args, **kwargs):
+            raise AssertionError("shared load used the request session")
+
+    def request_session():
+        db = RequestSession(bind=db_session.get_bind())
+        try:
+            yield db
+        finally:
+            db.close()
+
+    db_session.add(Education(school_en="NTU", display_order=0))
+    db_session.commit()
+    client.app.dependency_overrides[get_db] = request_session
+
+    response = client.get(path)
+    assert response.status_code == 200
+    assert "NTU" in response.text
@@ -0,0 +1,126 @@
+"""
+Tests for persistent payload snapshots (app.services.snapshots): mmap'd
+files shared by all workers, swapped atomically, with a gzip variant, and
+mapped again by a new worker at startup while they match the database.
+"""
+import gzip
+import mmap
+
+import pytest
+
+from app.api.snapshot_response import accepts_gzip
+from app.services import snapshots
+from app.services.snapshots import HEADER_SIZE, SnapshotStore, map_snapshot
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    return tmp_path / "snapshots" / "resume.snap"
+
+
+def test_body_is_served_from_the_mapped_file(snapshot_file):
+    snapshot = SnapshotStore(snapshot_file).get("t1", lambda: b'{"a": 1}')
+    assert isinstance(snapshot.body.obj, mmap.mmap)
+    assert bytes(snapshot.body) == b'{"a": 1}'
+    assert gzip.decompress(snapshot.gzip) == b'{"a": 1}'
+
+
+def test_second_worker_maps_published_snapshot_without_building(snapshot_file):
+    worker_a = SnapshotStore(snapshot_file)
+    worker_b = SnapshotStore(snapshot_file)
+    a = worker_a.get("t1", lambda: b'{"v": 1}')
+
+    def fail():
+        raise AssertionError("should not rebuild")
+
+    b = worker_b.get("t1", fail)
+    assert (b.version, b.etag, bytes(b.body)) == (a.version, a.etag, b'{"v": 1}')
+    assert worker_b.builds == 0
+
+
+def test_swap_keeps_old_mapping_valid(snapshot_file):
+    worker_a = SnapshotStore(snapshot_file)
+    worker_b = SnapshotStore(snapshot_file)
+    old = worker_a.get("t1", lambda: b'{"v": 1}')
+
+    new = worker_b.get("t2", lambda: b'{"v": 2}')
+    assert new.version == old.version + 1
+    # A response still sending the old view is unaffected by the swap
+    assert bytes(old.body) == b'{"v": 1}'
+    # The other worker picks the new file up for the new state
+    assert bytes(worker_a.get("t2", lambda: b"unused").body) == b'{"v": 2}'
+    assert worker_a.builds == 1
+
+
+def test_corrupt_file_is_rebuilt(snapshot_file):
+    SnapshotStore(snapshot_file).get("t1", lambda: b'{"v": 1}')
+    data = bytearray(snapshot_file.read_bytes())
+    data[HEADER_SIZE + 2] ^= 0xFF
+    snapshot_file.write_bytes(bytes(data))
+    assert map_snapshot(snapshot_file) is None
+
+    store = SnapshotStore(snapshot_file)
+    assert bytes(store.get("t1", lambda: b'{"v": 1}').body) == b'{"v": 1}'
+    assert store.builds == 1
+
+
+def test_unwritable_path_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a directory")
+    store = SnapshotStore(blocker / "resume.snap")
+    snapshot = store.get("t1", lambda: b'{"v": 1}')
+    assert bytes(snapshot.body) == b'{"v": 1}'
+    assert store.get("t1", lambda: b"unused") is snapshot
+
+
+def test_gzip_variant_is_deterministic(tmp_path):
+    a = SnapshotStore(tmp_path / "a.snap").get("t1", lambda: b'{"v": 1}' * 100)
+    b = SnapshotStore(None).get("t1", lambda: b'{"v": 1}' * 100)
+    assert bytes(a.gzip) == bytes(b.gzip)
+    assert len(a.gzip) < len(a.body)
+
+
+def test_warm_start_maps_only_current_files(tmp_path):
+    published = SnapshotStore(tmp_path / "resume.snap")
+    published.get("t1", lambda: b'{"v": 1}')
+    SnapshotStore(tmp_path / "education.snap").get("t0", lambda: b"[]")
+
+    # A new worker: fresh stores pointed at the same directory
+    stores = {"resume": SnapshotStore(None), "education": SnapshotStore(None)}
+    original = dict(snapshots.stores)
+    snapshots.stores.clear()
+    snapshots.stores.update(stores)
+    try:
+        snapshots.configure(str(tmp_path))
+        assert snapshots.warm_start("t1") == 1
+        assert bytes(stores["resume"].cached("t1").body) == b'{"v": 1}'
+        assert stores["education"].cached("t1") is None
+        assert stores["resume"].builds == 0
+    finally:
+        snapshots.configure(None)
+        snapshots.stores.clear()
+        snapshots.stores.update(original)
+
+
+def test_store_for_is_shared_and_configured(tmp_path):
+    store = snapshots.store_for("test-shared")
+    assert snapshots.store_for("test-shared") is store
+    try:
+        snapshots.configure(str(tmp_path))
+        assert store.path == tmp_path / "test-shared.snap"
+    finally:
+        snapshots.configure(None)
+    assert store.path is None
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", True),
+    ("br;q=1.0, gzip;q=0.8", True),
+    ("gzip;q=0", False),
+    ("*;q=0.5", True),
+    ("*, gzip;q=0", False),
+    ("identity", False),
+    ("", False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
@@ -0,0 +1,124 @@
+"""
+Tests for the memory-aware worker supervisor (supervisor.py), using fake
+worker processes: the replacement is started and ready before the old
+worker is retired, and recycle counts / reasons are exported.
+"""
+import json
+import sys
+import threading
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import supervisor  # noqa: E402
+
+
+class FakeProcess:
+    _next_pid = 1000
+
+    def __init__(self, events):
+        FakeProcess._next_pid += 1
+        self.pid = FakeProcess._next_pid
+        self.alive = True
+        self.events = events
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        pass
+
+    def kill(self):
+        self.alive = False
+
+
+class FakeWorkers:
+    """spawn() for the Supervisor, recording the order of starts and stops"""
+
+    def __init__(self, ready=True):
+        self.events = []
+        self.ready = ready
+        self.workers = []
+
+    def spawn(self):
+        process = FakeProcess(self.events)
+        ready = threading.Event()
+        if self.ready:
+            ready.set()
+        self.events.append(("start", process.pid))
+        worker = supervisor.Worker(process, ready)
+        self.workers.append(worker)
+        return worker
+
+
+def _supervisor(fakes, rss, tmp_path, monkeypatch):
+    def fake_kill(pid, sig):
+        fakes.events.append(("stop", pid))
+        for worker in fakes.workers:
+            if worker.pid == pid:
+                worker.process.alive = False
+
+    monkeypatch.setattr(supervisor.os, "kill", fake_kill)
+    monkeypatch.setattr(supervisor, "READY_TIMEOUT_SECONDS", 0)
+    return supervisor.Supervisor(
+        fakes.spawn,
+        max_rss_bytes=100,
+        check_interval=0,
+        graceful_timeout=0,
+        stats_file=tmp_path / "stats.json",
+        rss_reader=lambda pid: rss[pid] if pid in rss else 50,
+    )
+
+
+def test_below_threshold_keeps_worker(tmp_path, monkeypatch):
+    fakes = FakeWorkers()
+    sup = _supervisor(fakes, {}, tmp_path, monkeypatch)
+    sup.worker = sup.start_worker()
+    assert sup.check() is None
+
+
+def test_rss_recycle_prespawns_replacement(tmp_path, monkeypatch):
+    fakes = FakeWorkers()
+    sup = _supervisor(fakes, {}, tmp_path, monkeypatch)
+    sup.worker = old = sup.start_worker()
+
+    rss = {old.pid: 500}
+    sup.rss_reader = lambda pid: rss.get(pid, 50)
+    assert sup.check() == "rss"
+    sup.recycle("rss")
+
+    new = sup.worker
+    assert new is not old
+    # Replacement started before the old worker was told to stop
+    assert fakes.events == [("start", old.pid), ("start", new.pid), ("stop", old.pid)]
+
+    stats = json.loads((tmp_path / "stats.json").read_text())
+    assert stats["recycles_total"] == {"rss": 1}
+    assert stats["last_recycle"]["reason"] == "rss"
+    assert stats["last_recycle"]["rss_bytes"] == 500
+    assert stats["worker_pid"] == new.pid
+
+
+def test_exited_worker_is_replaced(tmp_path, monkeypatch):
+    fakes = FakeWorkers()
+    sup = _supervisor(fakes, {}, tmp_path, monkeypatch)
+    sup.worker = old = sup.start_worker()
+    old.process.alive = False
+
+    assert sup.check() == "exited"
+    sup.recycle("exited")
+    assert sup.worker is not old and sup.worker.is_alive()
+    assert sup.recycles == {"exited": 1}
+
+
+def test_failed_replacement_keeps_old_worker(tmp_path, monkeypatch):
+    fakes = FakeWorkers()
+    sup = _supervisor(fakes, {}, tmp_path, monkeypatch)
+    sup.worker = old = sup.start_worker()
+
+    fakes.ready = False
+    sup.recycle("rss")
+    assert sup.worker is old and old.is_alive()
+    assert sup.recycle_failures == 1
+    assert sup.recycles == {}
@@ -0,0 +1,82 @@
+"""
+Tests for UploadAdmissionMiddleware (concurrent upload cap + in-flight byte budget).
+"""
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.middleware.upload_gate import UploadAdmissionMiddleware
+
+MULTIPART = {"Content-Type": "multipart/form-data; boundary=x"}
+
+
+def _gated_app(release: asyncio.Event, **limits):
+    async def upload(request):
+        await request.body()
+        await release.wait()
+        return JSONResponse({"ok": True})
+
+    app = Starlette(routes=[
+        Route("/api/projects/upload", upload, methods=["POST"]),
+        Route("/api/education/", upload, methods=["POST"]),
+    ])
+    return UploadAdmissionMiddleware(app, retry_after=7, **limits)
+
+
+async def _run(gate, release, first_body, second_body):
+    """Start one upload, send a second while it is in flight, then let both finish."""
+    transport = httpx.ASGITransport(app=gate)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = asyncio.create_task(client.post("/api/projects/upload", content=first_body, headers=MULTIPART))
+        while gate.active == 0:
+            await asyncio.sleep(0)
+        second = await asyncio.wait_for(
+            client.post("/api/projects/upload", content=second_body, headers=MULTIPART), timeout=5
+        )
+        release.set()
+        return await first, second
+
+
+def test_concurrency_limit_returns_429_with_retry_after():
+    async def scenario():
+        release = asyncio.Event()
+        gate = _gated_app(release, max_concurrent=1, byte_budget=10_000)
+        first, second = await _run(gate, release, b"a" * 10, b"b" * 10)
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert second.headers["Retry-After"] == "7"
+        assert gate.active == 0 and gate.reserved_bytes == 0
+
+    asyncio.run(scenario())
+
+
+def test_byte_budget_returns_429():
+    async def scenario():
+        release = asyncio.Event()
+        gate = _gated_app(release, max_concurrent=5, byte_budget=1000)
+        first, second = await _run(gate, release, b"a" * 600, b"b" * 600)
+        assert first.status_code == 200
+        assert second.status_code == 429
+
+    asyncio.run(scenario())
+
+
+def test_json_requests_bypass_gate():
+    async def scenario():
+        release = asyncio.Event()
+        gate = _gated_app(release, max_concurrent=1, byte_budget=1000)
+        transport = httpx.ASGITransport(app=gate)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            upload = asyncio.create_task(client.post("/api/projects/upload", content=b"a", headers=MULTIPART))
+            while gate.active == 0:
+                await asyncio.sleep(0)
+            other = asyncio.create_task(client.post("/api/education/", json={"x": 1}))
+            await asyncio.sleep(0.05)
+            release.set()
+            assert (await other).status_code == 200
+            assert (await upload).status_code == 200
+
+    asyncio.run(scenario())
@@ -0,0 +1,167 @@
+"""
+Tests for the uploads/ reconciler (stale references and orphan files).
+"""
+import io
+import os
+import time
+
+import pytest
+
+from app.models.project import Project, ProjectDetail, ProjectAttachment
+from app.models.stored_file import StoredFile
+from app.services import upload_reconciler
+from app.services.upload_reconciler import reconcile_uploads
+
+OLD = time.time() - 2 * upload_reconciler.ORPHAN_GRACE_SECONDS
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    import app.api.upload_utils as upload_utils
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(upload_reconciler, "_last_cutoff", None)
+    return tmp_path
+
+
+def _orphan(upload_dir, name, mtime=OLD):
+    path = upload_dir / name
+    path.write_bytes(b"left over after a rollback")
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _upload_project(client, auth_headers, content=b"%PDF-1.4 attachment"):
+    response = client.post(
+        "/api/projects/upload",
+        data={"title_en": "P"},
+        files={"file": ("a.pdf", io.BytesIO(content), "application/pdf")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_stale_reference_cleared(client, auth_headers, upload_dir, db_session):
+    project = _upload_project(client, auth_headers)
+    # Another upload that is still there: uploads/ is mounted, one file is gone
+    _upload_project(client, auth_headers, content=b"%PDF-1.4 kept")
+    (upload_dir / project["attachment_url"].removeprefix("/uploads/")).unlink()
+
+    report = reconcile_uploads(db_session)
+    assert report["stale_cleared"] == 1
+    assert report["stored_files_removed"] == 1
+
+    db_session.expire_all()
+    row = db_session.get(Project, project["id"])
+    assert row.attachment_url is None and row.attachment_path is None
+    assert db_session.query(StoredFile).count() == 1  # the kept upload
+
+
+def test_stale_project_attachment_row_deleted(upload_dir, db_session):
+    project = Project(title_en="P")
+    detail = ProjectDetail(project=project, description_en="d")
+    db_session.add_all([project, detail, ProjectAttachment(
+        project_detail=detail, file_name="gone.pdf", file_url="/uploads/gone.pdf", file_type="pdf"
+    ), ProjectAttachment(
+        project_detail=detail, file_name="link", file_url="https://example.com/x.pdf", file_type="pdf"
+    ), ProjectAttachment(
+        project_detail=detail, file_name="kept.pdf", file_url="/uploads/kept.pdf", file_type="pdf"
+    )])
+    db_session.commit()
+    (upload_dir / "kept.pdf").write_bytes(b"%PDF-1.4 kept")
+
+    reconcile_uploads(db_session)
+    db_session.expire_all()
+    remaining = db_session.query(ProjectAttachment).all()
+    assert sorted(a.file_name for a in remaining) == ["kept.pdf", "link"]
+
+
+def test_orphans_quarantined_after_grace_period(client, auth_headers, upload_dir, db_session):
+    project = _upload_project(client, auth_headers)
+    old_orphan = _orphan(upload_dir, "old.pdf")
+    young_orphan = _orphan(upload_dir, "young.pdf", mtime=time.time())
+
+    report = reconcile_uploads(db_session)
+    assert report["orphans_quarantined"] == 1
+    assert not old_orphan.exists()
+    assert list((upload_dir / ".quarantine").rglob("old.pdf"))
+    assert young_orphan.exists()
+    # Referenced files are untouched
+    assert (upload_dir / project["attachment_url"].removeprefix("/uploads/")).exists()
+
+
+def test_incremental_run_only_checks_new_files(upload_dir, db_session):
+    reconcile_uploads(db_session)
+    # Written after the first run but with an mtime before its cutoff
+    before_cutoff = _orphan(upload_dir, "before.pdf", mtime=OLD - 60)
+
+    assert reconcile_uploads(db_session)["orphans_quarantined"] == 0
+    assert before_cutoff.exists()
+    assert reconcile_uploads(db_session, full=True)["orphans_quarantined"] == 1
+
+
+def test_ref_count_resynced(client, auth_headers, upload_dir, db_session):
+    _upload_project(client, auth_headers)
+    _upload_project(client, auth_headers)
+    stored = db_session.query(StoredFile).one()
+    stored.ref_count = 7
+    db_session.commit()
+
+    assert reconcile_uploads(db_session)["ref_counts_fixed"] == 1
+    db_session.expire_all()
+    assert db_session.query(StoredFile).one().ref_count == 2
+
+
+def test_reconcile_endpoint_requires_auth_and_supports_dry_run(client, auth_headers, upload_dir):
+    assert client.post("/api/uploads/reconcile").status_code == 401
+    orphan = _orphan(upload_dir, "old.pdf")
+
+    response = client.post("/api/uploads/reconcile", params={"dry_run": True}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["orphans_quarantined"] == 1
+    assert orphan.exists()
+
+
+def _projects_with_missing_files(db_session, count):
+    projects = [Project(title_en=f"P{i}", attachment_url=f"/uploads/gone{i}.pdf") for i in range(count)]
+    db_session.add_all(projects)
+    db_session.commit()
+    return projects
+
+
+def _attachment_urls(db_session):
+    db_session.expire_all()
+    return [p.attachment_url for p in db_session.query(Project).order_by(Project.id)]
+
+
+def test_missing_upload_dir_clears_nothing(upload_dir, db_session, monkeypatch):
+    import app.api.upload_utils as upload_utils
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", upload_dir / "not-mounted")
+    _projects_with_missing_files(db_session, 3)
+
+    report = reconcile_uploads(db_session, force=True)
+    assert report["dry_run"] is True
+    assert "missing" in report["refused"]
+    assert report["stale_cleared"] == 3
+    assert _attachment_urls(db_session) == [f"/uploads/gone{i}.pdf" for i in range(3)]
+
+
+def test_empty_upload_dir_clears_nothing_unless_forced(upload_dir, db_session):
+    _projects_with_missing_files(db_session, 2)
+
+    report = reconcile_uploads(db_session)
+    assert "empty" in report["refused"]
+    assert _attachment_urls(db_session) == ["/uploads/gone0.pdf", "/uploads/gone1.pdf"]
+
+    report = reconcile_uploads(db_session, force=True)
+    assert report["refused"] is None
+    assert _attachment_urls(db_session) == [None, None]
+
+
+def test_clearing_most_references_is_refused(upload_dir, db_session):
+    _projects_with_missing_files(db_session, upload_reconciler.MAX_STALE_MINIMUM + 1)
+    (upload_dir / "present.pdf").write_bytes(b"%PDF-1.4")
+
+    report = reconcile_uploads(db_session)
+    assert "stale" in report["refused"]
+    assert all(_attachment_urls(db_session))
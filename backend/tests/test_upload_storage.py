@@ -0,0 +1,164 @@
+"""
+Tests for content-addressed, deduplicated upload storage.
+Identical bytes are stored once under uploads/ab/cd/<sha256>.<ext> and a
+StoredFile row counts the records referencing them.
+"""
+import hashlib
+import io
+
+import pytest
+
+from app.db import file_transactions
+from app.models.stored_file import StoredFile
+
+PDF_BYTES = b"%PDF-1.4 shared attachment"
+PDF_SHA256 = hashlib.sha256(PDF_BYTES).hexdigest()
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    import app.api.upload_utils as upload_utils
+    monkeypatch.setattr(upload_utils, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+def _upload_project(client, auth_headers, title, content=PDF_BYTES):
+    return client.post(
+        "/api/projects/upload",
+        data={"title_en": title},
+        files={"file": ("report.pdf", io.BytesIO(content), "application/pdf")},
+        headers=auth_headers,
+    )
+
+
+def test_upload_uses_sharded_content_address(client, auth_headers, upload_dir):
+    """The stored path and URL are derived from the SHA-256 of the content."""
+    response = _upload_project(client, auth_headers, "A")
+    assert response.status_code == 200, response.text
+
+    key = f"{PDF_SHA256[:2]}/{PDF_SHA256[2:4]}/{PDF_SHA256}.pdf"
+    assert response.json()["attachment_url"] == f"/uploads/{key}"
+    assert (upload_dir / key).read_bytes() == PDF_BYTES
+    # No temp files are left behind at the top level
+    assert [p.name for p in upload_dir.iterdir()] == [PDF_SHA256[:2]]
+
+
+def test_identical_uploads_are_stored_once(client, auth_headers, upload_dir, db_session):
+    """The same PDF attached to a work experience and two projects is stored once."""
+    exp = client.post(
+        "/api/work-experience/upload",
+        data={"company_en": "Acme"},
+        files={"file": ("cv.pdf", io.BytesIO(PDF_BYTES), "application/pdf")},
+        headers=auth_headers,
+    )
+    assert exp.status_code == 201, exp.text
+    first = _upload_project(client, auth_headers, "A")
+    second = _upload_project(client, auth_headers, "B")
+
+    urls = {exp.json()["attachment_url"], first.json()["attachment_url"], second.json()["attachment_url"]}
+    assert len(urls) == 1
+    assert len(list(upload_dir.rglob("*.pdf"))) == 1
+
+    stored = db_session.query(StoredFile).filter(StoredFile.sha256 == PDF_SHA256).one()
+    assert stored.ref_count == 3
+
+
+def test_delete_decrements_and_removes_last_reference(client, auth_headers, upload_dir, db_session):
+    """Deleting a referencing record keeps the file until the last reference is gone."""
+    first = _upload_project(client, auth_headers, "A").json()
+    second = _upload_project(client, auth_headers, "B").json()
+    blob = upload_dir / first["attachment_url"].removeprefix("/uploads/")
+
+    assert client.delete(f"/api/projects/{first['id']}", headers=auth_headers).status_code == 200
+    db_session.expire_all()
+    assert db_session.query(StoredFile).one().ref_count == 1
+    assert blob.exists()
+
+    assert client.delete(f"/api/projects/{second['id']}", headers=auth_headers).status_code == 200
+    file_transactions.wait_for_pending()
+    db_session.expire_all()
+    assert db_session.query(StoredFile).count() == 0
+    assert not blob.exists()
+
+
+def test_reupload_identical_file_keeps_blob(client, auth_headers, upload_dir, db_session):
+    """Replacing an attachment with the same bytes must not delete the shared blob."""
+    project = _upload_project(client, auth_headers, "A").json()
+    response = client.put(
+        f"/api/projects/{project['id']}/upload",
+        data={"title_en": "A"},
+        files={"file": ("report.pdf", io.BytesIO(PDF_BYTES), "application/pdf")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert (upload_dir / response.json()["attachment_url"].removeprefix("/uploads/")).exists()
+    db_session.expire_all()
+    assert db_session.query(StoredFile).one().ref_count == 1
+
+
+def test_failed_commit_keeps_old_file_and_discards_new(client, auth_headers, upload_dir, db_session, monkeypatch):
+    """A rollback must not delete the file the row still points at, nor leak the new upload."""
+    project = _upload_project(client, auth_headers, "A").json()
+    old_blob = upload_dir / project["attachment_url"].removeprefix("/uploads/")
+
+    from sqlalchemy.orm import Session
+
+    def failing_commit(self):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(Session, "commit", failing_commit)
+    response = client.put(
+        f"/api/projects/{project['id']}/upload",
+        data={"title_en": "A"},
+        files={"file": ("new.pdf", io.BytesIO(b"%PDF-1.4 replacement"), "application/pdf")},
+        headers=auth_headers,
+    )
+    monkeypatch.undo()
+    file_transactions.wait_for_pending()
+
+    assert response.status_code == 500
+    assert old_blob.exists()
+    assert [p for p in upload_dir.rglob("*") if p.is_file()] == [old_blob]
+
+
+def test_file_promoted_only_after_commit(upload_dir, db_session):
+    """New content stays in its temp file until the transaction commits."""
+    import asyncio
+    from fastapi import UploadFile
+    from app.api.upload_utils import save_upload_file
+
+    meta = asyncio.run(save_upload_file(UploadFile(file=io.BytesIO(PDF_BYTES), filename="a.pdf"), db_session))
+    final = upload_dir / meta["attachment_url"].removeprefix("/uploads/")
+    assert not final.exists()
+
+    db_session.commit()
+    assert final.read_bytes() == PDF_BYTES
+
+
+def test_queued_delete_skipped_after_repromotion_and_guards_released(upload_dir, db_session):
+    """A delete queued before the same path is promoted again keeps the new file."""
+    import threading
+
+    final = upload_dir / "ab" / "cd" / "blob.pdf"
+    final.parent.mkdir(parents=True)
+    final.write_bytes(b"old")
+    release = threading.Event()
+    file_transactions._submit(release.wait)  # hold the worker
+
+    file_transactions.defer_delete(db_session, final)
+    db_session.commit()
+    temp = upload_dir / "upload.tmp"
+    temp.write_bytes(b"new")
+    file_transactions.defer_promote(db_session, temp, final)
+    db_session.commit()
+
+    release.set()
+    file_transactions.wait_for_pending()
+    assert final.read_bytes() == b"new"
+    assert file_transactions._delete_guards == {}
+
+    file_transactions.defer_delete(db_session, final)
+    db_session.commit()
+    file_transactions.wait_for_pending()
+    assert not final.exists()
+    assert file_transactions._delete_guards == {}